@@ -0,0 +1,5 @@
+"""Пакет с бенчмарками производительности бота.
+
+Каждый модуль пакета запускается отдельно из корня репозитория,
+например: python -m benchmarks.target_exclusion
+"""
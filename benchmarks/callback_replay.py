@@ -0,0 +1,306 @@
+"""Воспроизведение записанных событий Callback API.
+
+Отправляет записанные события сообщества на сервер Callback API так же,
+как их отправляет VK: каждое событие отдельным POST-запросом. Записанные
+события повторяются для REPLAY_USERS пользователей, события одного
+пользователя отправляются через одно соединение по порядку. Выводит
+количество событий в секунду и время ответа сервера.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.callback_replay
+
+По умолчанию запускается локальный VKCallbackServer, который вместо
+бота только записывает принятые сообщения, и проверяется, что все
+сообщения переданы обработчику в исходном порядке. Если задана
+переменная окружения REPLAY_WORKERS, сервер передает сообщения в
+настоящий CallbackWorkerPool с указанным количеством обработчиков
+(0 — обработчик в потоке), а вместо VKBot в обработчиках работает
+ReplayBot. Тогда после воспроизведения пул останавливается так же, как
+при завершении бота, и проверяется, что каждое сообщение обработано
+один раз, в исходном порядке и в обработчике своего пользователя.
+Чтобы отправить
+события на запущенный бот, передайте его адрес в переменной окружения
+CALLBACK_URL и секретный ключ в CALLBACK_SECRET. Файл с записанными
+событиями (по одному JSON на строку) задается переменной CALLBACK_EVENTS.
+"""
+import http.client
+import json
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import urlsplit
+
+# Пакет vk_bot импортирует модули базы данных, которым нужна строка
+# подключения. Сам бенчмарк к базе данных не обращается.
+os.environ.setdefault("DSN", "sqlite://")
+
+from vk_bot.callback_server import (  # noqa: E402
+    OK_RESPONSE, CallbackWorkerPool, VKCallbackServer
+)
+
+EVENTS_PATH = os.getenv(
+    "CALLBACK_EVENTS",
+    str(Path(__file__).parent / "data" / "callback_events.jsonl")
+)
+USERS = int(os.getenv("REPLAY_USERS", "1000"))
+CONNECTIONS = int(os.getenv("REPLAY_CONNECTIONS", "8"))
+WORKERS = os.getenv("REPLAY_WORKERS")
+
+
+class ReplayBot:
+    """Класс бота, который только запоминает полученные сообщения.
+
+    Заменяет VKBot в обработчиках пула. После того как пул передает
+    обработчику None, бот отправляет запомненные сообщения в очередь
+    результатов.
+    """
+    def __init__(self, results: Any) -> None:
+        """Инициализирует бота.
+
+        Args:
+            results (Any): Очередь, в которую отправляются ID процесса
+                обработчика и сообщения по пользователям.
+        """
+        self.results = results
+
+    def handle_events(
+            self, events: Iterable[tuple[int, str, str | None]]
+    ) -> None:
+        """Запоминает сообщения, пока обработчик не остановлен.
+
+        Args:
+            events (Iterable[tuple[int, str, str | None]]): ID
+                пользователя, текст сообщения и payload кнопки.
+        """
+        routed: dict[int, list[str]] = {}
+
+        for user_id, text, payload in events:
+            routed.setdefault(user_id, []).append(text)
+
+        self.results.put((os.getpid(), routed))
+
+
+def load_events(path: str) -> list[dict]:
+    """Загружает записанные события из файла.
+
+    Args:
+        path (str): Путь к файлу с событиями в формате JSON Lines.
+
+    Returns:
+        list[dict]: Список событий.
+    """
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def make_user_events(
+        events: list[dict], user_id: int, secret: str | None
+) -> list[bytes]:
+    """Создает тела запросов с записанными событиями одного пользователя.
+
+    Args:
+        events (list[dict]): Записанные события.
+        user_id (int): ID пользователя, от имени которого отправляются
+            сообщения.
+        secret (str | None): Секретный ключ Callback API.
+
+    Returns:
+        list[bytes]: Тела POST-запросов.
+    """
+    bodies = []
+
+    for event in events:
+        event = json.loads(json.dumps(event))
+        message = event.get("object", {}).get("message")
+
+        if message is not None:
+            message["from_id"] = message["peer_id"] = user_id
+
+        # Повторы одного event_id сервер отбрасывает, поэтому у событий
+        # каждого пользователя свои ID
+        if "event_id" in event:
+            event["event_id"] = f"{event['event_id']}-{user_id}"
+
+        if secret:
+            event["secret"] = secret
+
+        bodies.append(json.dumps(event, ensure_ascii=False).encode())
+
+    return bodies
+
+
+def replay(
+        url: str, bodies: list[bytes], latencies: list[float],
+        failures: list[bytes]
+) -> None:
+    """Отправляет события через одно соединение с keep-alive.
+
+    Args:
+        url (str): Адрес сервера Callback API.
+        bodies (list[bytes]): Тела POST-запросов.
+        latencies (list[float]): Список, в который добавляется время
+            ответа на каждый запрос в секундах.
+        failures (list[bytes]): Список, в который добавляются ответы,
+            отличные от "ok".
+    """
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port)
+    headers = {"Content-Type": "application/json"}
+
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            connection.request("POST", parts.path or "/", body, headers)
+            response = connection.getresponse().read()
+            latencies.append(time.perf_counter() - start)
+
+            if response != OK_RESPONSE.encode():
+                failures.append(response)
+    finally:
+        connection.close()
+
+
+def collect(results: Any, count: int, reports: list[dict]) -> None:
+    """Получает сообщения, запомненные ботами обработчиков.
+
+    Очередь результатов читается во время остановки пула: процесс с
+    неотправленными в очередь данными не может завершиться.
+
+    Args:
+        results (Any): Очередь результатов ReplayBot.
+        count (int): Количество обработчиков.
+        reports (list[dict]): Список, в который добавляются сообщения
+            каждого обработчика по пользователям.
+    """
+    for _ in range(count):
+        reports.append(results.get()[1])
+
+
+def check_routing(
+        reports: list[dict[int, list[str]]], expected: list[str]
+) -> None:
+    """Проверяет и выводит, как сообщения распределены по обработчикам.
+
+    Args:
+        reports (list[dict[int, list[str]]]): Сообщения каждого
+            обработчика по пользователям.
+        expected (list[str]): Тексты сообщений одного пользователя в
+            исходном порядке.
+    """
+    routed: dict[int, list[str]] = {}
+    single_worker = True
+
+    for report in reports:
+        for user_id, texts in report.items():
+            single_worker = single_worker and user_id not in routed
+            routed.setdefault(user_id, []).extend(texts)
+
+    in_order = all(texts == expected for texts in routed.values())
+    print(
+        f"Сообщений обработано: {sum(map(len, routed.values()))}, "
+        f"в исходном порядке: {in_order and len(routed) == USERS}, "
+        f"каждый пользователь в одном обработчике: {single_worker}"
+    )
+
+
+def main() -> None:
+    """Запускает воспроизведение событий."""
+    events = load_events(EVENTS_PATH)
+    url = os.getenv("CALLBACK_URL")
+    secret = os.getenv("CALLBACK_SECRET")
+    routed: dict[int, list[str]] = {}
+    server = pool = None
+
+    def record(user_id: int, text: str, payload: str | None) -> bool:
+        routed.setdefault(user_id, []).append(text)
+        return True
+
+    if url is None:
+        secret = "replay-secret"
+        route = record
+
+        if WORKERS is not None:
+            workers = int(WORKERS)
+            results = multiprocessing.Queue()
+            pool = CallbackWorkerPool(partial(ReplayBot, results), workers)
+            pool.start()
+            route = pool.dispatch
+
+        server = VKCallbackServer(
+            ("127.0.0.1", 0), route, "confirmation", secret
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    per_connection = [[] for _ in range(CONNECTIONS)]
+
+    for user_id in range(1, USERS + 1):
+        per_connection[user_id % CONNECTIONS].extend(
+            make_user_events(events, user_id, secret)
+        )
+
+    latencies: list[float] = []
+    failures: list[bytes] = []
+    threads = [
+        threading.Thread(
+            target=replay, args=(url, bodies, latencies, failures)
+        )
+        for bodies in per_connection
+    ]
+    start = time.perf_counter()
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"Событий: {len(latencies)}, соединений: {CONNECTIONS}")
+    print(f"Событий в секунду: {len(latencies) / elapsed:.0f}")
+    print(
+        f"Время ответа: медиана {statistics.median(latencies) * 1000:.2f} "
+        f"мс, 99-й процентиль "
+        f"{latencies[int(len(latencies) * 0.99)] * 1000:.2f} мс"
+    )
+    print(f"Ответов, отличных от \"ok\": {len(failures)}")
+
+    if server is None:
+        return
+
+    server.shutdown()
+    server.server_close()
+    expected = [
+        event["object"]["message"]["text"]
+        for event in events
+        if event.get("type") == "message_new"
+    ]
+
+    if pool is None:
+        check_routing([routed], expected)
+        return
+
+    reports: list[dict] = []
+    collector = threading.Thread(
+        target=collect, args=(results, max(workers, 1), reports)
+    )
+    collector.start()
+    start = time.perf_counter()
+    pool.stop()
+    collector.join()
+    print(
+        f"Обработчиков: {workers}, остановка пула: "
+        f"{(time.perf_counter() - start) * 1000:.0f} мс"
+    )
+    check_routing(reports, expected)
+
+
+if __name__ == "__main__":
+    main()
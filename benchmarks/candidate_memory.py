@@ -0,0 +1,165 @@
+"""Бенчмарк памяти, занимаемой найденными кандидатами.
+
+Сравнивает прежнее представление кандидата (словарь из ответа
+users.search, в который поиск добавляет ссылку, фотографии, лайки и ранг)
+с записью Candidate. Оба варианта строятся из одного и того же ответа
+users.search и дополняются одинаковыми фотографиями. Память измеряется
+модулем tracemalloc: учитываются только объекты, которые остаются после
+разбора ответа и дополнения кандидатов.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.candidate_memory
+
+Количество кандидатов задается переменной окружения MEMORY_CANDIDATES
+(по умолчанию 10000).
+"""
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+from typing import Callable
+
+# Пакет vk_bot импортирует модули базы данных, которым нужна строка
+# подключения. Сам бенчмарк к базе данных не обращается.
+os.environ.setdefault("DSN", "sqlite://")
+
+from vk_bot.candidate import Candidate  # noqa: E402
+from vk_bot.get_info import UserInfoRetriever  # noqa: E402
+
+CANDIDATES = int(os.getenv("MEMORY_CANDIDATES", "10000"))
+FIRST_NAMES = [f"Имя{i}" for i in range(50)]
+LAST_NAMES = [f"Фамилия{i}" for i in range(500)]
+
+
+def make_response() -> str:
+    """Создает ответ users.search с полями, которые запрашивал поиск.
+
+    Returns:
+        str: Текст ответа в формате JSON.
+    """
+    rnd = random.Random(0)
+    now = int(time.time())
+    items = [
+        {
+            "id": vk_id,
+            "bdate": (
+                f"{rnd.randint(1, 28)}.{rnd.randint(1, 12)}."
+                f"{rnd.randint(1975, 2006)}"
+            ),
+            "city": {"id": 1, "title": "Москва"},
+            "last_seen": {
+                "platform": rnd.randint(1, 7),
+                "time": now - rnd.randint(0, 10 * 86400)
+            },
+            "track_code": f"{rnd.getrandbits(224):056x}",
+            "first_name": rnd.choice(FIRST_NAMES),
+            "last_name": rnd.choice(LAST_NAMES),
+            "can_access_closed": True,
+            "is_closed": False
+        }
+        for vk_id in range(1, CANDIDATES + 1)
+    ]
+    return json.dumps(
+        {"response": {"count": CANDIDATES, "items": items}},
+        ensure_ascii=False
+    )
+
+
+def photos_for(vk_id: int) -> list[str]:
+    """Возвращает ID фотографий кандидата, как из кэша фотографий.
+
+    Args:
+        vk_id (int): ID кандидата.
+
+    Returns:
+        list[str]: ID трех фотографий.
+    """
+    return [str(457239000 + vk_id * 3 + i) for i in range(3)]
+
+
+def build_dicts(response: str) -> list[dict]:
+    """Разбирает ответ и дополняет кандидатов прежним способом.
+
+    Args:
+        response (str): Текст ответа users.search.
+
+    Returns:
+        list[dict]: Словари кандидатов.
+    """
+    users = json.loads(response)["response"]["items"]
+
+    for rank, item in enumerate(users):
+        user_photos = photos_for(item["id"])
+        item["likes"] = rank % 100
+        item["url"] = UserInfoRetriever.get_user_url(item["id"])
+
+        for i in range(3):
+            item[f"photo_id{i + 1}"] = user_photos[i]
+
+        item["rank"] = rank
+
+    return users
+
+
+def build_candidates(response: str) -> list[Candidate]:
+    """Разбирает ответ в записи Candidate и дополняет их.
+
+    Args:
+        response (str): Текст ответа users.search.
+
+    Returns:
+        list[Candidate]: Записи кандидатов.
+    """
+    users = [
+        Candidate.from_api(item)
+        for item in json.loads(response)["response"]["items"]
+    ]
+
+    for rank, item in enumerate(users):
+        item.photo_id1, item.photo_id2, item.photo_id3 = photos_for(item.id)
+        item.likes = rank % 100
+        item.rank = rank
+
+    return users
+
+
+def measure(name: str, build: Callable[[str], list], response: str) -> int:
+    """Строит кандидатов и выводит занимаемую ими память.
+
+    Args:
+        name (str): Название замера.
+        build (Callable[[str], list]): Функция, строящая кандидатов.
+        response (str): Текст ответа users.search.
+
+    Returns:
+        int: Память, занимаемая кандидатами, в байтах.
+    """
+    gc.collect()
+    tracemalloc.start()
+    users = build(response)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<10} всего: {current / 1024:>8.0f} КБ   "
+        f"на кандидата: {current / len(users):>6.0f} Б   "
+        f"пик: {peak / 1024:>8.0f} КБ"
+    )
+    del users
+    return current
+
+
+def main() -> None:
+    """Запускает бенчмарк."""
+    response = make_response()
+    print(f"Кандидатов: {CANDIDATES}")
+    before = measure("словари", build_dicts, response)
+    after = measure("Candidate", build_candidates, response)
+    print(f"Экономия памяти: в {before / after:.1f} раза")
+
+
+if __name__ == "__main__":
+    main()
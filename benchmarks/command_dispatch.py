@@ -0,0 +1,126 @@
+"""Бенчмарк выбора обработчика сообщения.
+
+Сравнивает прежний выбор обработчика цепочкой if/elif с проверками
+вхождения в кортежи команд и re.match с некомпилированным выражением с
+поиском по словарю в CommandRouter. Отдельно замеряется выбор по payload
+нажатой кнопки.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.command_dispatch
+"""
+import os
+import re
+import time
+
+# Пакет vk_bot импортирует модули базы данных, которым нужна строка
+# подключения. Сам бенчмарк к базе данных не обращается.
+os.environ.setdefault("DSN", "sqlite://")
+
+from settings import COMMANDS  # noqa: E402
+from vk_bot.router import CommandRouter  # noqa: E402
+
+VK_URL_PATTERN = r"https://vk\.com/id(\d+)"
+ROUNDS = 100000
+
+#: Сообщения в пропорциях, близких к реальным: чаще всего пользователи
+#: листают анкеты.
+MESSAGES = [
+    "👎", "👎", "👎", "продолжить поиск", "👍", "❌", "начать",
+    "показать избранных", "https://vk.com/id1", "абракадабра",
+]
+
+
+def handler(*args) -> None:
+    """Пустой обработчик команды."""
+
+
+def legacy_resolve(request: str):
+    """Выбирает обработчик прежним способом.
+
+    Args:
+        request (str): Текст сообщения.
+
+    Returns:
+        Обработчик сообщения.
+    """
+    request = request.strip().lower()
+
+    if request in COMMANDS["start"]:
+        return handler
+    elif request in COMMANDS["help"]:
+        return handler
+    elif request in COMMANDS["hello"]:
+        return handler
+    elif request in COMMANDS["goodbye"]:
+        return handler
+    elif request in COMMANDS["next"] or request in COMMANDS["show"]:
+        return handler
+    elif request in COMMANDS["add_to_favorites"]:
+        return handler
+    elif request in COMMANDS["show_favorites"]:
+        return handler
+    elif request in COMMANDS["add_to_black_list"]:
+        return handler
+    elif request in COMMANDS["show_black_list"]:
+        return handler
+    elif request in COMMANDS["del_from_black_list"]:
+        return handler
+    elif request in COMMANDS["del_from_favorites"]:
+        return handler
+    elif re.match(VK_URL_PATTERN, request):
+        return handler
+    else:
+        return handler
+
+
+def build_router() -> CommandRouter:
+    """Создает маршрутизатор со всеми командами бота.
+
+    Returns:
+        CommandRouter: Маршрутизатор команд.
+    """
+    router = CommandRouter(handler)
+
+    for command in COMMANDS:
+        router.add_command(command, handler)
+
+    router.add_pattern(VK_URL_PATTERN, handler)
+    return router
+
+
+def measure(name: str, func, messages: list) -> None:
+    """Выполняет функцию для всех сообщений и выводит время на сообщение.
+
+    Args:
+        name (str): Название замера.
+        func: Функция, принимающая элемент списка messages.
+        messages (list): Список аргументов функции.
+    """
+    start = time.perf_counter()
+
+    for _ in range(ROUNDS):
+        for message in messages:
+            func(message)
+
+    elapsed = time.perf_counter() - start
+    per_message = elapsed / (ROUNDS * len(messages)) * 1e9
+    print(f"{name:<25} {per_message:>8.0f} нс на сообщение")
+
+
+def main() -> None:
+    """Запускает бенчмарк."""
+    router = build_router()
+    payloads = ['{"command": "next"}'] * len(MESSAGES)
+    print(f"Сообщений: {ROUNDS * len(MESSAGES)}")
+    measure("прежний: текст", legacy_resolve, MESSAGES)
+    measure("текущий: текст", router.resolve, MESSAGES)
+    measure(
+        "текущий: payload",
+        lambda payload: router.resolve("", payload),
+        payloads
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Бенчмарк записи мэтчей в базу данных.
+
+Сравнивает прежнюю построчную запись мэтчей через ORM (два запроса на
+каждого кандидата) с пакетной записью UserDBManager.add_match_user_to_db
+через INSERT ... ON CONFLICT DO UPDATE.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.match_ingest
+
+По умолчанию используется SQLite в памяти. Для замера на PostgreSQL
+передайте строку подключения к отдельной тестовой базе в переменной
+окружения BENCH_DSN: бенчмарк пересоздает в ней таблицы.
+"""
+import os
+import time
+
+os.environ["DSN"] = os.getenv("BENCH_DSN", "sqlite://")
+
+from sqlalchemy import event  # noqa: E402
+
+from database.base import Base, Matches, Session, engine  # noqa: E402
+from database.db_funcs import UserDBManager  # noqa: E402
+from vk_bot.candidate import Candidate  # noqa: E402
+
+BOT_USER_VK_ID = 1
+MATCHES = 1000
+
+
+class QueryCounter:
+    """Класс для подсчета SQL-запросов, выполненных через engine."""
+    def __init__(self) -> None:
+        """Инициализирует счетчик и подписывается на события engine."""
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        """Увеличивает счетчик при каждом выполнении запроса."""
+        self.count += 1
+
+
+def make_matches(offset: int = 0) -> list[Candidate]:
+    """Создает список кандидатов в формате UserSearcher.search_users.
+
+    Args:
+        offset (int): Сдвиг VK ID кандидатов. По умолчанию 0.
+
+    Returns:
+        list[Candidate]: Список кандидатов.
+    """
+    return [
+        Candidate(
+            id=vk_id,
+            first_name="Имя",
+            last_name="Фамилия",
+            photo_id1="1",
+            photo_id2="2",
+            photo_id3="3"
+        )
+        for vk_id in range(offset + 1, offset + MATCHES + 1)
+    ]
+
+
+def reset_database(user_db: UserDBManager) -> None:
+    """Пересоздает таблицы и добавляет пользователя бота.
+
+    Args:
+        user_db (UserDBManager): Объект для работы с пользователями.
+    """
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    user_db.add_bot_user_to_db([{
+        "id": BOT_USER_VK_ID, "first_name": "Bench", "last_name": "User",
+        "sex": 1, "city": {"id": 1}
+    }])
+
+
+def legacy_add_match_user_to_db(
+        user_db: UserDBManager, match_data: list[Candidate]
+) -> None:
+    """Записывает мэтчи прежним способом: построчно через ORM.
+
+    Args:
+        user_db (UserDBManager): Объект для работы с пользователями.
+        match_data (list[Candidate]): Список кандидатов.
+    """
+    session = Session()
+
+    for item in match_data:
+        user_id = user_db.get_user_id_by_vk_id(BOT_USER_VK_ID)
+        existing_match = user_db.get_user_matches(
+            matched_vk_id=item.id, return_all=False
+        )
+
+        if existing_match:
+            existing_match.first_name = item.first_name
+            existing_match.last_name = item.last_name
+            existing_match.profile_link = item.url
+            existing_match.photo_id_1 = item.photo_id1
+            existing_match.photo_id_2 = item.photo_id2
+            existing_match.photo_id_3 = item.photo_id3
+        else:
+            session.add(Matches(
+                user_id=user_id,
+                matched_vk_id=item.id,
+                first_name=item.first_name,
+                last_name=item.last_name,
+                profile_link=item.url,
+                photo_id_1=item.photo_id1,
+                photo_id_2=item.photo_id2,
+                photo_id_3=item.photo_id3
+            ))
+
+    session.commit()
+    session.close()
+
+
+def measure(name: str, func, counter: QueryCounter) -> float:
+    """Выполняет функцию и выводит количество запросов и время работы.
+
+    Args:
+        name (str): Название замера.
+        func: Функция без аргументов.
+        counter (QueryCounter): Счетчик SQL-запросов.
+
+    Returns:
+        float: Время работы в секундах.
+    """
+    counter.count = 0
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    suffix = f"   {result}" if result else ""
+    print(
+        f"{name:<30} запросов: {counter.count:>5}   "
+        f"время: {elapsed * 1000:>8.1f} мс{suffix}"
+    )
+    return elapsed
+
+
+def main() -> None:
+    """Запускает бенчмарк.
+
+    Каждый способ записывает 1000 новых мэтчей, а затем еще 1000, из
+    которых половина уже есть в базе данных и обновляется.
+    """
+    user_db = UserDBManager()
+    counter = QueryCounter()
+    print(f"Мэтчей: {MATCHES}, база: {engine.dialect.name}")
+
+    for name, ingest in (
+        ("прежний", lambda data: legacy_add_match_user_to_db(user_db, data)),
+        ("текущий", lambda data: user_db.add_match_user_to_db(
+            data, BOT_USER_VK_ID
+        )),
+    ):
+        reset_database(user_db)
+        measure(f"{name}: новые", lambda: ingest(make_matches()), counter)
+        measure(
+            f"{name}: половина обновлений",
+            lambda: ingest(make_matches(MATCHES // 2)),
+            counter
+        )
+
+
+if __name__ == "__main__":
+    main()
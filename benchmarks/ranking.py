@@ -0,0 +1,168 @@
+"""Бенчмарк ранжирования кандидатов.
+
+Замеряет UserSearcher.rank_candidates — стадию поиска, которая получает
+лайки всех кандидатов из кэша фотографий и ранжирует их за один проход.
+Для сравнения оценки вычисляются также циклом на Python, и проверяется,
+что оба способа дают одинаковый порядок.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.ranking
+
+Количество кандидатов задается переменной окружения RANKING_CANDIDATES
+(по умолчанию 10000). По умолчанию используется SQLite в памяти. Для
+замера на PostgreSQL передайте строку подключения к отдельной тестовой
+базе в переменной окружения BENCH_DSN: бенчмарк пересоздает в ней
+таблицы.
+"""
+import os
+import random
+import statistics
+import time
+
+os.environ["DSN"] = os.getenv("BENCH_DSN", "sqlite://")
+
+from database.base import Base, engine  # noqa: E402
+from database.db_funcs import PhotoCacheDBManager  # noqa: E402
+from vk_bot.candidate import Candidate  # noqa: E402
+from vk_bot.ranking import FEATURES, parse_birth_year  # noqa: E402
+from vk_bot.searcher import UserSearcher  # noqa: E402
+
+CANDIDATES = int(os.getenv("RANKING_CANDIDATES", "10000"))
+REPEATS = 20
+USER_BDATE = "1.1.1995"
+
+
+def make_candidates(now: float) -> list[Candidate]:
+    """Создает кандидатов и сохраняет фотографии части из них в кэш.
+
+    У части кандидатов скрыт год рождения или нет записи в кэше
+    фотографий, как в настоящих результатах поиска.
+
+    Args:
+        now (float): Текущее время в секундах.
+
+    Returns:
+        list[Candidate]: Список кандидатов.
+    """
+    rnd = random.Random(0)
+    candidates = []
+    photos = {}
+
+    for vk_id in range(1, CANDIDATES + 1):
+        year = rnd.randint(1975, 2006)
+        candidates.append(Candidate(
+            id=vk_id,
+            first_name="Имя",
+            last_name="Фамилия",
+            bdate=(
+                f"{rnd.randint(1, 28)}.{rnd.randint(1, 12)}"
+                + (f".{year}" if rnd.random() < 0.7 else "")
+            ),
+            last_seen=int(now - rnd.randint(0, 10 * 86400))
+        ))
+
+        if rnd.random() < 0.9:
+            photos[vk_id] = (["1", "2", "3"], rnd.randint(0, 500))
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    PhotoCacheDBManager().store_photos(photos)
+    return candidates
+
+
+def python_scores(
+        candidates: list[Candidate], weights: dict[str, float], now: float
+) -> list[float]:
+    """Вычисляет оценки кандидатов циклом по кандидатам.
+
+    Args:
+        candidates (list[Candidate]): Список кандидатов.
+        weights (dict[str, float]): Веса признаков.
+        now (float): Текущее время в секундах.
+
+    Returns:
+        list[float]: Оценки кандидатов.
+    """
+    user_year = parse_birth_year(USER_BDATE)
+    columns = {feature: [] for feature in FEATURES}
+
+    for candidate in candidates:
+        columns["recency"].append((now - candidate.last_seen) / 3600)
+        columns["likes"].append(candidate.likes)
+        year = parse_birth_year(candidate.bdate)
+        columns["age"].append(None if year != year else abs(year - user_year))
+
+    normalized = {}
+
+    for feature, column in columns.items():
+        known = [value for value in column if value is not None]
+        mean = sum(known) / len(known) if known else 0.0
+        column = [mean if value is None else value for value in column]
+        low, high = min(column), max(column)
+        span = high - low
+        values = [(value - low) / span if span else 0.0 for value in column]
+        normalized[feature] = (
+            values if feature == "likes" else [1.0 - v for v in values]
+        )
+
+    return [
+        sum(weights[feature] * normalized[feature][i] for feature in FEATURES)
+        for i in range(len(candidates))
+    ]
+
+
+def measure(name: str, func) -> None:
+    """Выполняет функцию REPEATS раз и выводит медиану времени работы.
+
+    Args:
+        name (str): Название замера.
+        func: Функция без аргументов.
+    """
+    timings = []
+
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    print(f"{name:<22} медиана: {statistics.median(timings) * 1000:>8.2f} мс")
+
+
+def main() -> None:
+    """Запускает бенчмарк."""
+    now = time.time()
+    candidates = make_candidates(now)
+    searcher = UserSearcher("token", 5.199)
+    ranker = searcher.ranker
+    weights = dict(zip(FEATURES, ranker.weights))
+    print(
+        f"Кандидатов: {CANDIDATES}, повторов: {REPEATS}, "
+        f"база: {engine.dialect.name}"
+    )
+
+    measure(
+        "rank_candidates",
+        lambda: searcher.rank_candidates(candidates, USER_BDATE)
+    )
+    # Лайки из кэша уже записаны в кандидатов первым замером
+    measure("цикл на Python", lambda: python_scores(candidates, weights, now))
+    measure(
+        "NumPy: оценки",
+        lambda: ranker.score(ranker.features(candidates, USER_BDATE, now))
+    )
+
+    scores = python_scores(candidates, weights, now)
+    expected = sorted(range(CANDIDATES), key=lambda i: -scores[i])
+    vector_scores = ranker.score(ranker.features(candidates, USER_BDATE, now))
+    max_error = max(abs(a - b) for a, b in zip(scores, vector_scores))
+    ranked = searcher.rank_candidates(candidates, USER_BDATE)
+    print(f"Максимальное расхождение оценок: {max_error:.2e}")
+    print(
+        "Порядок совпадает: "
+        f"{[c.id - 1 for c in ranked] == expected}"
+    )
+
+
+if __name__ == "__main__":
+    main()
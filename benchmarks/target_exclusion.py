@@ -0,0 +1,183 @@
+"""Бенчмарк исключения избранных и заблокированных из списка кандидатов.
+
+Сравнивает прежний способ фильтрации (запросы к базе данных на каждого
+кандидата и проверка по спискам) с TargetUserSearcher.get_target_users,
+который загружает исключаемые ID одним запросом во множество.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.target_exclusion
+
+По умолчанию используется SQLite в памяти. Для замера на PostgreSQL
+передайте строку подключения к отдельной тестовой базе в переменной
+окружения BENCH_DSN: бенчмарк создает в ней таблицы и заполняет их.
+"""
+import os
+import time
+
+os.environ["DSN"] = os.getenv("BENCH_DSN", "sqlite://")
+
+from sqlalchemy import event  # noqa: E402
+
+from database.base import (  # noqa: E402
+    Base, BlackList, Favorites, Session, Users, engine
+)
+from database.db_funcs import TargetUserSearcher  # noqa: E402
+from vk_bot.candidate import Candidate  # noqa: E402
+
+BOT_USER_VK_ID = 1
+CANDIDATES = 1000
+BLOCKED = 10_000
+FAVORITES = 10_000
+
+
+class QueryCounter:
+    """Класс для подсчета SQL-запросов, выполненных через engine."""
+    def __init__(self) -> None:
+        """Инициализирует счетчик и подписывается на события engine."""
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        """Увеличивает счетчик при каждом выполнении запроса."""
+        self.count += 1
+
+
+def fill_database() -> list[Candidate]:
+    """Создает таблицы и заполняет их тестовыми данными.
+
+    Returns:
+        list[Candidate]: Список кандидатов из ответа users.search.
+            Каждый пятый кандидат находится в черном списке или избранных.
+    """
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = Session()
+
+    user = Users(vk_id=BOT_USER_VK_ID, first_name="Bench", last_name="User")
+    session.add(user)
+    session.flush()
+
+    row = {"first_name": "A", "last_name": "B", "profile_link": "link"}
+    session.execute(BlackList.__table__.insert(), [
+        {"user_id": user.user_id, "blocked_vk_id": vk_id, **row}
+        for vk_id in range(1, BLOCKED + 1)
+    ])
+    session.execute(Favorites.__table__.insert(), [
+        {"user_id": user.user_id, "favorite_vk_id": vk_id, **row}
+        for vk_id in range(BLOCKED + 1, BLOCKED + FAVORITES + 1)
+    ])
+    session.commit()
+    Session.remove()
+
+    step = (BLOCKED + FAVORITES) // CANDIDATES
+    return [
+        Candidate(
+            id=vk_id if i % 5 == 0 else BLOCKED + FAVORITES + vk_id,
+            first_name="A",
+            last_name="B"
+        )
+        for i, vk_id in enumerate(range(1, CANDIDATES * step + 1, step))
+    ]
+
+
+def legacy_rejected_ids(
+        searcher: TargetUserSearcher, user_id: int
+) -> dict[str, list[int]]:
+    """Получает списки исключаемых ID прежним способом: двумя запросами.
+
+    Args:
+        searcher (TargetUserSearcher): Объект для поиска в базе данных.
+        user_id (int): ID пользователя в базе данных.
+
+    Returns:
+        dict[str, list[int]]: Словарь с ID заблокированных и избранных
+            пользователей.
+    """
+    blocked = searcher.session.query(BlackList.blocked_vk_id)
+    favorites = searcher.session.query(Favorites.favorite_vk_id)
+    return {
+        "blocked": [
+            item[0] for item in blocked.filter_by(user_id=user_id).all()
+        ],
+        "favorites": [
+            item[0] for item in favorites.filter_by(user_id=user_id).all()
+        ]
+    }
+
+
+def legacy_get_target_users(
+        searcher: TargetUserSearcher, candidates: list[Candidate]
+) -> dict[int, Candidate]:
+    """Фильтрует кандидатов прежним способом: запросы на каждого кандидата.
+
+    Args:
+        searcher (TargetUserSearcher): Объект для поиска в базе данных.
+        candidates (list[Candidate]): Список кандидатов.
+
+    Returns:
+        dict[int, Candidate]: Словарь отфильтрованных кандидатов.
+    """
+    filtered_users = {}
+
+    for candidate in candidates:
+        target_vk_id = candidate.id
+        user_id = searcher.user_db.get_user_id_by_vk_id(BOT_USER_VK_ID)
+        rejected_ids = legacy_rejected_ids(searcher, user_id)
+
+        if (target_vk_id not in rejected_ids['blocked']
+                and target_vk_id not in rejected_ids['favorites']):
+            filtered_users[candidate.id] = candidate
+
+    return filtered_users
+
+
+def measure(
+        name: str, func, counter: QueryCounter
+) -> dict[int, Candidate]:
+    """Выполняет функцию и выводит количество запросов и время работы.
+
+    Args:
+        name (str): Название замера.
+        func: Функция без аргументов.
+        counter (QueryCounter): Счетчик SQL-запросов.
+
+    Returns:
+        dict[int, Candidate]: Результат функции.
+    """
+    counter.count = 0
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<10} запросов: {counter.count:>5}   "
+        f"время: {elapsed * 1000:>9.1f} мс   кандидатов: {len(result)}"
+    )
+    return result
+
+
+def main() -> None:
+    """Запускает бенчмарк."""
+    candidates = fill_database()
+    counter = QueryCounter()
+    searcher = TargetUserSearcher()
+
+    print(
+        f"Кандидатов: {CANDIDATES}, в черном списке: {BLOCKED}, "
+        f"в избранных: {FAVORITES}, база: {engine.dialect.name}"
+    )
+    legacy = measure(
+        "прежний",
+        lambda: legacy_get_target_users(searcher, candidates),
+        counter
+    )
+    current = measure(
+        "текущий",
+        lambda: searcher.get_target_users(candidates, BOT_USER_VK_ID),
+        counter
+    )
+    assert legacy == current
+
+
+if __name__ == "__main__":
+    main()
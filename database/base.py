@@ -4,19 +4,252 @@
 создания объекта сессии и соединения с базой данных.
 """
 import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
 
 import sqlalchemy as sq
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, ForeignKey
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy import create_engine, event, ForeignKey, Table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import (
+    declarative_base, relationship, scoped_session, sessionmaker
+)
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.pool import QueuePool
+
+from settings import DB_SETTINGS
 
 load_dotenv()
 DSN = os.getenv('DSN')
 
 Base = declarative_base()
 
-engine = create_engine(DSN)
-Session = sessionmaker(bind=engine)
+
+class PoolStats:
+    """Класс со статистикой ожидания соединений из пула."""
+    def __init__(self) -> None:
+        """Инициализирует пустую статистику."""
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+        self._reporter: threading.Thread | None = None
+        self._stop_reporting = threading.Event()
+
+    def record(self, wait: float) -> None:
+        """Учитывает одно получение соединения из пула.
+
+        Args:
+            wait (float): Время ожидания соединения в секундах.
+        """
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict[str, float]:
+        """Возвращает текущую статистику.
+
+        Returns:
+            dict[str, float]: Количество получений соединения (checkouts),
+                среднее (avg_wait_ms) и максимальное (max_wait_ms) время
+                ожидания в миллисекундах.
+        """
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "avg_wait_ms": (
+                    self.total_wait / self.checkouts * 1000
+                    if self.checkouts
+                    else 0.0
+                ),
+                "max_wait_ms": self.max_wait * 1000
+            }
+
+    def start_reporting(self, interval: float) -> None:
+        """Запускает периодический вывод статистики в фоновом потоке.
+
+        Args:
+            interval (float): Интервал вывода в секундах. Если 0,
+                статистика не выводится.
+        """
+        if interval <= 0 or self._reporter is not None:
+            return
+
+        self._stop_reporting.clear()
+        self._reporter = threading.Thread(
+            target=self._report,
+            args=(interval,),
+            name="pool-stats",
+            daemon=True
+        )
+        self._reporter.start()
+
+    def stop_reporting(self) -> None:
+        """Останавливает периодический вывод статистики."""
+        if self._reporter is None:
+            return
+
+        self._stop_reporting.set()
+        self._reporter.join()
+        self._reporter = None
+
+    def _report(self, interval: float) -> None:
+        """Выводит статистику каждые interval секунд до остановки.
+
+        Args:
+            interval (float): Интервал вывода в секундах.
+        """
+        while not self._stop_reporting.wait(interval):
+            print(f"Статистика пула соединений: {self.snapshot()}")
+
+
+#: Статистика ожидания соединений из пула engine.
+POOL_STATS = PoolStats()
+#: Время начала получения соединения и время открытия новых соединений
+#: при этом получении в текущем потоке.
+_checkout_timing = threading.local()
+
+
+class TimedQueuePool(QueuePool):
+    """Пул соединений, отмечающий начало получения соединения.
+
+    Время ожидания записывается обработчиками событий пула, которые
+    подключает функция _track_checkout_wait.
+    """
+    def connect(self):
+        """Отмечает начало получения соединения и получает его из пула."""
+        _checkout_timing.start = time.perf_counter()
+        _checkout_timing.connecting = 0.0
+        return super().connect()
+
+
+def _track_checkout_wait(engine: Engine) -> None:
+    """Подключает учет времени ожидания соединения из пула.
+
+    Время ожидания считается от вызова TimedQueuePool.connect до события
+    checkout без времени открытия новых соединений с базой данных, то
+    есть включает ожидание свободного соединения и проверку соединения
+    перед использованием.
+
+    Args:
+        engine (Engine): Engine с пулом TimedQueuePool.
+    """
+    @event.listens_for(engine, "do_connect")
+    def _on_do_connect(*args) -> None:
+        _checkout_timing.connect_start = time.perf_counter()
+
+    @event.listens_for(engine.pool, "connect")
+    def _on_connect(*args) -> None:
+        connect_start = getattr(_checkout_timing, "connect_start", None)
+
+        if connect_start is not None:
+            _checkout_timing.connecting += (
+                time.perf_counter() - connect_start
+            )
+            _checkout_timing.connect_start = None
+
+    @event.listens_for(engine.pool, "checkout")
+    def _on_checkout(*args) -> None:
+        start = getattr(_checkout_timing, "start", None)
+
+        if start is not None:
+            POOL_STATS.record(
+                time.perf_counter() - start - _checkout_timing.connecting
+            )
+            _checkout_timing.start = None
+
+
+def _engine_options(dsn: str) -> dict:
+    """Возвращает параметры пула соединений для create_engine.
+
+    SQLite используется только для локальных замеров и работает со
+    своим пулом по умолчанию, поэтому параметры пула к нему не
+    применяются.
+
+    Args:
+        dsn (str): Строка подключения к базе данных.
+
+    Returns:
+        dict: Именованные аргументы create_engine.
+    """
+    if make_url(dsn).get_backend_name() == "sqlite":
+        return {}
+
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_SETTINGS["pool_size"],
+        "max_overflow": DB_SETTINGS["max_overflow"],
+        "pool_timeout": DB_SETTINGS["pool_timeout"],
+        "pool_pre_ping": DB_SETTINGS["pool_pre_ping"],
+        "pool_recycle": DB_SETTINGS["pool_recycle"],
+    }
+
+
+engine = create_engine(DSN, **_engine_options(DSN))
+
+if isinstance(engine.pool, TimedQueuePool):
+    _track_checkout_wait(engine)
+
+# Реестр сессий: каждый поток получает собственную сессию, поэтому
+# менеджеры базы данных можно использовать из нескольких потоков.
+Session = scoped_session(sessionmaker(bind=engine))
+
+
+@contextmanager
+def session_scope() -> Iterator[OrmSession]:
+    """Ограничивает время жизни сессии текущего потока одной операцией.
+
+    Все менеджеры базы данных, вызванные внутри блока with, используют
+    одну сессию. При выходе из блока незафиксированные изменения
+    откатываются, сессия закрывается, а соединение возвращается в пул.
+
+    Yields:
+        OrmSession: Сессия текущего потока.
+    """
+    try:
+        yield Session()
+    finally:
+        Session.remove()
+
+
+def call_in_session_scope(func: Callable[..., Any], *args: Any) -> Any:
+    """Вызывает функцию в отдельной сессии базы данных.
+
+    Используется, когда запрос к базе данных выполняется в пуле потоков
+    асинхронной среды выполнения.
+
+    Args:
+        func (Callable[..., Any]): Функция, работающая с базой данных.
+        *args (Any): Аргументы функции.
+
+    Returns:
+        Any: Результат функции.
+    """
+    with session_scope():
+        return func(*args)
+
+
+def upsert_insert(table: Table) -> postgresql.Insert | sqlite.Insert:
+    """Создает INSERT с поддержкой ON CONFLICT для диалекта базы данных.
+
+    Основная база данных бота — PostgreSQL, SQLite поддерживается для
+    локальных замеров производительности.
+
+    Args:
+        table (Table): Таблица, в которую выполняется вставка.
+
+    Returns:
+        postgresql.Insert | sqlite.Insert: Конструкция INSERT, у которой
+            есть метод on_conflict_do_update.
+    """
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(table)
+
+    return postgresql.insert(table)
 
 
 class Users(Base):
@@ -29,6 +262,8 @@ class Users(Base):
     last_name = sq.Column(sq.String, nullable=False)
     gender = sq.Column(sq.String)
     city = sq.Column(sq.String)
+    # Дата рождения из профиля VK в формате D.M.YYYY или D.M
+    bdate = sq.Column(sq.String)
 
     matches = relationship(
         "Matches",
@@ -53,16 +288,32 @@ class Matches(Base):
 
     id = sq.Column(sq.Integer, primary_key=True)
     user_id = sq.Column(sq.Integer, ForeignKey("users.user_id"), nullable=False)
-    matched_vk_id = sq.Column(sq.Integer, nullable=False, unique=True)
+    matched_vk_id = sq.Column(sq.Integer, nullable=False)
     first_name = sq.Column(sq.String, nullable=False)
     last_name = sq.Column(sq.String, nullable=False)
     profile_link = sq.Column(sq.String, nullable=False)
     photo_id_1 = sq.Column(sq.String)
     photo_id_2 = sq.Column(sq.String)
     photo_id_3 = sq.Column(sq.String)
+    # Позиция мэтча в выдаче пользователю: чем меньше, тем раньше мэтч
+    # будет показан
+    rank = sq.Column(sq.Integer, nullable=False, default=0, server_default="0")
 
     user = relationship("Users", back_populates="matches")
 
+    __table_args__ = (
+        # Один и тот же человек может быть мэтчем нескольких пользователей,
+        # но только один раз для каждого из них
+        sq.Index(
+            "ux_matches_user_id_matched_vk_id",
+            "user_id", "matched_vk_id",
+            unique=True
+        ),
+        # Индекс для постраничной выборки мэтчей пользователя по ключу
+        # (rank, id) в порядке ранжирования
+        sq.Index("ix_matches_user_id_rank_id", "user_id", "rank", "id"),
+    )
+
 
 class Favorites(Base):
     """Инициализация таблицы избранных пользователей."""
@@ -70,13 +321,22 @@ class Favorites(Base):
 
     id = sq.Column(sq.Integer, primary_key=True)
     user_id = sq.Column(sq.Integer, ForeignKey("users.user_id"), nullable=False)
-    favorite_vk_id = sq.Column(sq.Integer, nullable=False, unique=True)
+    favorite_vk_id = sq.Column(sq.Integer, nullable=False)
     first_name = sq.Column(sq.String, nullable=False)
     last_name = sq.Column(sq.String, nullable=False)
     profile_link = sq.Column(sq.String, nullable=False)
 
     user = relationship("Users", back_populates="favorites")
 
+    __table_args__ = (
+        # Покрывает выборку избранных пользователя и проверку наличия
+        sq.Index(
+            "ux_favorites_user_id_favorite_vk_id",
+            "user_id", "favorite_vk_id",
+            unique=True
+        ),
+    )
+
 
 class BlackList(Base):
     """Инициализация таблицы черного списка."""
@@ -84,9 +344,41 @@ class BlackList(Base):
 
     id = sq.Column(sq.Integer, primary_key=True)
     user_id = sq.Column(sq.Integer, ForeignKey("users.user_id"), nullable=False)
-    blocked_vk_id = sq.Column(sq.Integer, nullable=False, unique=True)
+    blocked_vk_id = sq.Column(sq.Integer, nullable=False)
     first_name = sq.Column(sq.String, nullable=False)
     last_name = sq.Column(sq.String, nullable=False)
     profile_link = sq.Column(sq.String, nullable=False)
 
     user = relationship("Users", back_populates="blacklist")
+
+    __table_args__ = (
+        # Покрывает выборку черного списка пользователя и проверку наличия
+        sq.Index(
+            "ux_blacklist_user_id_blocked_vk_id",
+            "user_id", "blocked_vk_id",
+            unique=True
+        ),
+    )
+
+
+class CandidatePhotos(Base):
+    """Инициализация таблицы кэша фотографий найденных пользователей.
+
+    Кэш общий для всех пользователей бота: лучшие фотографии кандидата
+    не зависят от того, кто его нашел.
+    """
+    __tablename__ = "candidate_photos"
+
+    vk_id = sq.Column(sq.Integer, primary_key=True)
+    photo_id_1 = sq.Column(sq.String)
+    photo_id_2 = sq.Column(sq.String)
+    photo_id_3 = sq.Column(sq.String)
+    # Сумма лайков лучших фотографий, используется при ранжировании
+    likes = sq.Column(sq.Integer)
+    # Время получения фотографий из VK API (Unix time)
+    fetched_at = sq.Column(sq.Integer, nullable=False)
+
+    __table_args__ = (
+        # Индекс для удаления устаревших записей
+        sq.Index("ix_candidate_photos_fetched_at", "fetched_at"),
+    )
@@ -4,10 +4,12 @@
 импортируются в этот модуль.
 """
 
+from .identity_cache import USER_ID_CACHE, IdentityCache
 from .user import UserDBManager
 from .black_list import BlackListDBManager
 from .favorites import FavoritesDBManager
 from .target_searcher import TargetUserSearcher
+from .photo_cache import PhotoCacheDBManager
 
 
 __all__ = [
@@ -15,4 +17,7 @@ __all__ = [
     "BlackListDBManager",
     "FavoritesDBManager",
     "TargetUserSearcher",
+    "PhotoCacheDBManager",
+    "IdentityCache",
+    "USER_ID_CACHE",
 ]
@@ -12,26 +12,24 @@ class BlackListDBManager:
     """Класс для работы с черным списком пользователя и базой данных."""
     def __init__(self) -> None:
         """Инициализирует объект для работы с черным списком пользователя."""
-        self.session = Session()
+        self.session = Session
         self.user_db = UserDBManager()
 
-    def add_match_to_black_list(
-            self, user_id: int, black_list: list, selected_match: int
-    ) -> None:
+    def add_match_to_black_list(self, user_id: int, match: list) -> None:
         """Добавляет предложенного мэтча в черный список пользователя.
 
         Args:
             user_id (int): ID пользователя VK, для которого добавляется мэтч.
-            black_list (list): Список потенциальных мэтчей с их данными.
-            selected_match (int): Индекс выбранного мэтча в списке.
+            match (list): Данные мэтча в формате
+                UserDBManager.get_next_matches.
         """
         vk_user_id = self.user_db.get_user_id_by_vk_id(user_id)
 
         if not vk_user_id:
             return
 
-        blocked_vk_id = black_list[selected_match][2]
-        first_name, last_name = black_list[selected_match][0].split()
+        blocked_vk_id = match[2]
+        first_name, last_name = match[0].split()
 
         existing_entry = self._get_existing_black_list_entry(
             vk_user_id, blocked_vk_id
@@ -45,7 +43,7 @@ class BlackListDBManager:
             blocked_vk_id=blocked_vk_id,
             first_name=first_name,
             last_name=last_name,
-            profile_link=black_list[selected_match][1]
+            profile_link=match[1]
         )
 
         self.session.add(new_blocked_entry)
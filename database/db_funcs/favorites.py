@@ -12,26 +12,24 @@ class FavoritesDBManager:
     """Класс для работы с избранным списком пользователя и базой данных."""
     def __init__(self) -> None:
         """Инициализирует объект для работы с избранным списком пользователя."""
-        self.session = Session()
+        self.session = Session
         self.user_db = UserDBManager()
 
-    def add_match_to_favorites(
-            self, user_id: int, favorites: list, selected_match: int
-    ) -> None:
+    def add_match_to_favorites(self, user_id: int, match: list) -> None:
         """Добавляет предложенного мэтча в избранный список пользователя.
 
         Args:
             user_id (int): ID пользователя VK, для которого добавляется мэтч.
-            favorites (list): Список потенциальных мэтчей с их данными.
-            selected_match (int): Индекс выбранного мэтча в списке.
+            match (list): Данные мэтча в формате
+                UserDBManager.get_next_matches.
         """
         vk_user_id = self.user_db.get_user_id_by_vk_id(user_id)
 
         if not vk_user_id:
             return
 
-        favorite_vk_id = favorites[selected_match][2]
-        first_name, last_name = favorites[selected_match][0].split()
+        favorite_vk_id = match[2]
+        first_name, last_name = match[0].split()
 
         existing_entry = self._get_existing_favorite_entry(
             vk_user_id, favorite_vk_id
@@ -45,7 +43,7 @@ class FavoritesDBManager:
             favorite_vk_id=favorite_vk_id,
             first_name=first_name,
             last_name=last_name,
-            profile_link=favorites[selected_match][1]
+            profile_link=match[1]
         )
 
         self.session.add(new_favorite_entry)
@@ -0,0 +1,90 @@
+"""Модуль с кэшем ID пользователей бота.
+
+Модуль содержит класс IdentityCache для хранения соответствия VK ID
+пользователя и его ID в базе данных. ID пользователя не меняется после
+регистрации, поэтому повторные запросы к таблице пользователей не нужны.
+"""
+import threading
+from collections import OrderedDict
+
+from settings import DB_SETTINGS
+
+
+class IdentityCache:
+    """Класс ограниченного LRU-кэша соответствия VK ID и ID пользователя."""
+    def __init__(
+            self, max_size: int = DB_SETTINGS["identity_cache_size"]
+    ) -> None:
+        """Инициализирует кэш.
+
+        Args:
+            max_size (int): Максимальное количество записей в кэше.
+                По умолчанию берется из настроек.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._ids: OrderedDict[int, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, vk_id: int) -> int | None:
+        """Возвращает ID пользователя из кэша.
+
+        Args:
+            vk_id (int): ID пользователя VK.
+
+        Returns:
+            int: ID пользователя в базе данных.
+            None: Если записи нет в кэше.
+        """
+        with self._lock:
+            user_id = self._ids.get(vk_id)
+
+            if user_id is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._ids.move_to_end(vk_id)
+            return user_id
+
+    def set(self, vk_id: int, user_id: int) -> None:
+        """Сохраняет ID пользователя в кэш.
+
+        Args:
+            vk_id (int): ID пользователя VK.
+            user_id (int): ID пользователя в базе данных.
+        """
+        with self._lock:
+            self._ids[vk_id] = user_id
+            self._ids.move_to_end(vk_id)
+
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def invalidate(self, vk_id: int) -> None:
+        """Удаляет запись пользователя из кэша.
+
+        Args:
+            vk_id (int): ID пользователя VK.
+        """
+        with self._lock:
+            self._ids.pop(vk_id, None)
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает статистику использования кэша.
+
+        Returns:
+            dict[str, int]: Количество попаданий (hits), промахов (misses)
+                и записей в кэше (size).
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._ids)
+            }
+
+
+#: Общий кэш ID пользователей для всех менеджеров базы данных.
+USER_ID_CACHE = IdentityCache()
@@ -0,0 +1,207 @@
+"""Модуль для работы с кэшем фотографий найденных пользователей.
+
+Модуль содержит класс PhotoCacheDBManager, который хранит лучшие
+фотографии кандидатов в базе данных. Фотографии профиля меняются редко,
+поэтому повторные поиски в том же городе не запрашивают их у VK API.
+Пользователи без доступных фотографий тоже сохраняются в кэш, чтобы их
+фотографии не запрашивались при каждом поиске.
+"""
+import threading
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.base import CandidatePhotos, Session, upsert_insert
+from settings import DB_SETTINGS
+
+
+class PhotoCacheDBManager:
+    """Класс для работы с кэшем фотографий кандидатов в базе данных."""
+    def __init__(
+            self,
+            ttl: int = DB_SETTINGS["photo_cache_ttl"],
+            max_size: int = DB_SETTINGS["photo_cache_max_size"],
+            evict_every: int = DB_SETTINGS["photo_cache_evict_every"]
+    ) -> None:
+        """Инициализирует объект для работы с кэшем фотографий.
+
+        Args:
+            ttl (int): Время жизни записи в секундах. По умолчанию
+                берется из настроек.
+            max_size (int): Максимальное количество записей в кэше.
+                По умолчанию берется из настроек.
+            evict_every (int): Количество сохраненных записей, после
+                которого из кэша удаляются лишние записи. По умолчанию
+                берется из настроек.
+        """
+        self.session = Session
+        self.ttl = ttl
+        self.max_size = max_size
+        self.evict_every = evict_every
+        self._stored_since_evict = 0
+        self._evict_lock = threading.Lock()
+
+    def get_fresh_photos(
+            self, vk_ids: list[int]
+    ) -> dict[int, tuple[list[str], int | None]]:
+        """Получает из кэша фотографии, которые еще не устарели.
+
+        Args:
+            vk_ids (list[int]): Список ID пользователей VK.
+
+        Returns:
+            dict[int, tuple[list[str], int | None]]: Словарь с ID
+                пользователя, списком ID его фотографий и суммой их
+                лайков. Для пользователей без доступных фотографий список
+                пуст. Если сумма лайков неизвестна, вместо нее
+                возвращается None. Пользователей без свежей записи в кэше
+                в словаре нет.
+        """
+        if not vk_ids:
+            return {}
+
+        try:
+            rows = self.session.execute(
+                select(
+                    CandidatePhotos.vk_id,
+                    CandidatePhotos.likes,
+                    CandidatePhotos.photo_id_1,
+                    CandidatePhotos.photo_id_2,
+                    CandidatePhotos.photo_id_3
+                )
+                .where(CandidatePhotos.vk_id.in_(vk_ids))
+                .where(CandidatePhotos.fetched_at >= time.time() - self.ttl)
+            ).all()
+            return {
+                vk_id: ([photo for photo in photos if photo], likes)
+                for vk_id, likes, *photos in rows
+            }
+        except SQLAlchemyError as e:
+            print(f"Ошибка при чтении кэша фотографий: {e}")
+            return {}
+        finally:
+            # Чтение открывает транзакцию, которая держит соединение до
+            # конца сессии. Поиск выполняется в одной сессии и после
+            # чтения кэша ждет ответов VK API, поэтому соединение
+            # возвращается в пул сразу
+            self.session.close()
+
+    def get_fresh_likes(self, vk_ids: list[int]) -> dict[int, int]:
+        """Получает из кэша сумму лайков фотографий пользователей.
+
+        Args:
+            vk_ids (list[int]): Список ID пользователей VK.
+
+        Returns:
+            dict[int, int]: Словарь с ID пользователя и суммой лайков его
+                лучших фотографий. Пользователей без свежей записи в кэше
+                или без учтенных лайков в словаре нет.
+        """
+        if not vk_ids:
+            return {}
+
+        try:
+            rows = self.session.execute(
+                select(CandidatePhotos.vk_id, CandidatePhotos.likes)
+                .where(CandidatePhotos.vk_id.in_(vk_ids))
+                .where(CandidatePhotos.likes.isnot(None))
+                .where(CandidatePhotos.fetched_at >= time.time() - self.ttl)
+            ).all()
+            return dict(rows)
+        except SQLAlchemyError as e:
+            print(f"Ошибка при чтении кэша фотографий: {e}")
+            return {}
+        finally:
+            # Как и в get_fresh_photos, соединение не должно простаивать,
+            # пока поиск запрашивает фотографии у VK API
+            self.session.close()
+
+    def store_photos(
+            self, photos: dict[int, tuple[list[str], int | None]]
+    ) -> None:
+        """Сохраняет фотографии в кэш.
+
+        После каждых evict_every сохраненных записей из кэша удаляются
+        устаревшие записи и записи сверх max_size.
+
+        Args:
+            photos (dict[int, tuple[list[str], int | None]]): Словарь с ID
+                пользователя, списком ID его лучших фотографий и суммой
+                их лайков. Пустой список сохраняется для пользователей
+                без доступных фотографий.
+        """
+        if not photos:
+            return
+
+        fetched_at = int(time.time())
+        rows = [
+            {
+                "vk_id": vk_id,
+                "photo_id_1": user_photos[0] if len(user_photos) > 0 else None,
+                "photo_id_2": user_photos[1] if len(user_photos) > 1 else None,
+                "photo_id_3": user_photos[2] if len(user_photos) > 2 else None,
+                "likes": likes,
+                "fetched_at": fetched_at
+            }
+            for vk_id, (user_photos, likes) in photos.items()
+        ]
+        stmt = upsert_insert(CandidatePhotos.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CandidatePhotos.vk_id],
+            set_={
+                column: stmt.excluded[column]
+                for column in (
+                    "photo_id_1", "photo_id_2", "photo_id_3", "likes",
+                    "fetched_at"
+                )
+            }
+        )
+
+        with self._evict_lock:
+            self._stored_since_evict += len(rows)
+            evict = self._stored_since_evict >= self.evict_every
+
+            if evict:
+                self._stored_since_evict = 0
+
+        try:
+            self.session.execute(stmt, rows)
+
+            if evict:
+                self._evict(fetched_at)
+
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Ошибка при сохранении кэша фотографий: {e}")
+
+    def _evict(self, now: int) -> None:
+        """Удаляет устаревшие записи и записи сверх max_size.
+
+        Сначала удаляются записи старше ttl. Если записей все еще больше
+        max_size, удаляются самые давно полученные.
+
+        Args:
+            now (int): Текущее время (Unix time).
+        """
+        self.session.execute(
+            delete(CandidatePhotos)
+            .where(CandidatePhotos.fetched_at < now - self.ttl)
+        )
+        # Время получения самой новой из записей, которые не помещаются
+        # в кэш. Все записи не новее нее удаляются, кроме только что
+        # сохраненных.
+        cutoff = self.session.execute(
+            select(CandidatePhotos.fetched_at)
+            .order_by(CandidatePhotos.fetched_at.desc())
+            .offset(self.max_size)
+            .limit(1)
+        ).scalar()
+
+        if cutoff is not None:
+            self.session.execute(
+                delete(CandidatePhotos)
+                .where(CandidatePhotos.fetched_at <= cutoff)
+                .where(CandidatePhotos.fetched_at < now)
+            )
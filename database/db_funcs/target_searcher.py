@@ -4,10 +4,15 @@
 Модуль содержит в себе класс и методы для поиска пользователей в избранных и
 черном списке пользователя в базе данных.
 """
+from typing import TYPE_CHECKING, Iterable, Iterator
+
 from sqlalchemy.exc import SQLAlchemyError
 from database.base import BlackList, Favorites, Session
 from database.db_funcs.user import UserDBManager
 
+if TYPE_CHECKING:
+    from vk_bot.candidate import Candidate
+
 
 class TargetUserSearcher:
     """Класс для поиска пользователей в избранных и черном списке пользователя
@@ -15,73 +20,81 @@ class TargetUserSearcher:
     def __init__(self):
         """Инициализирует объект для поиска целевого пользователя."""
         self.user_db = UserDBManager()
-        self.session = Session()
+        self.session = Session
 
-    def get_target_users(self, candidates: list[dict], target_user_vk_id: int) \
-            -> dict[int, dict[str, int | str | dict[str, int | str]] | bool]:
+    def get_target_users(
+            self, candidates: list["Candidate"], target_user_vk_id: int
+    ) -> dict[int, "Candidate"]:
         """Получает информацию о целевом пользователе.
 
+        ID заблокированных и избранных пользователей загружаются одним
+        запросом до обхода кандидатов, а проверка выполняется по множеству.
+
         Args:
-            candidates (list[dict]): Список кандидатов для поиска.
+            candidates (list[Candidate]): Список кандидатов для поиска.
             target_user_vk_id (int): ID целевого пользователя.
 
         Returns:
-            dict[int, dict[str, int | str | dict[str, int | str]] | bool]:
-                Словарь с ID пользователя и его информацией. Если
-                пользователь не найден, возвращает False.
+            dict[int, Candidate]: Словарь с ID пользователя и записью
+                кандидата.
         """
-        filtered_users = {}
+        # Если пользователь не в черном списке и не в избранных,
+        # то добавляем его в словарь
+        return {
+            candidate.id: candidate
+            for candidate in self.iter_target_users(
+                candidates, target_user_vk_id
+            )
+        }
+
+    def iter_target_users(
+            self, candidates: Iterable["Candidate"], target_user_vk_id: int
+    ) -> Iterator["Candidate"]:
+        """Пропускает кандидатов, которых нет в избранных и черном списке.
+
+        Кандидаты обрабатываются по мере поступления. ID заблокированных и
+        избранных пользователей загружаются одним запросом перед обработкой
+        первого кандидата.
 
-        for candidate in candidates:
-            target_vk_id = candidate.get('id', {})
-            user_id = self.user_db.get_user_id_by_vk_id(target_user_vk_id)
-            rejected_ids = self.get_blocked_and_favorites_by_vk_id(user_id)
+        Args:
+            candidates (Iterable[Candidate]): Поток кандидатов.
+            target_user_vk_id (int): ID целевого пользователя.
+
+        Yields:
+            Candidate: Кандидат, которого можно предложить пользователю.
+        """
+        user_id = self.user_db.get_user_id_by_vk_id(target_user_vk_id)
+        rejected_ids = self.get_rejected_vk_ids(user_id)
 
-            if (target_vk_id not in rejected_ids['blocked']
-                    and target_vk_id not in rejected_ids['favorites']):
-                # Если пользователь не в черном списке и не в избранных,
-                # то добавляем его в словарь
-                filtered_users[candidate['id']] = candidate
+        for candidate in candidates:
+            if candidate.id not in rejected_ids:
+                yield candidate
 
-        return filtered_users
+    def get_rejected_vk_ids(self, user_id: int) -> set[int]:
+        """Получает множество ID заблокированных и избранных пользователей.
 
-    def get_blocked_and_favorites_by_vk_id(self, user_id: int) \
-            -> dict[str, list[int]]:
-        """Получает ID заблокированных и избранных пользователей.
+        Оба списка выбираются одним запросом с объединением (UNION).
 
         Args:
             user_id (int): ID пользователя.
 
         Returns:
-            dict[str, list[int]]: Словарь с ID заблокированных и
-                избранных пользователей.
+            set[int]: Множество VK ID пользователей, которых не нужно
+                предлагать пользователю.
         """
         if not user_id:
-            return {"blocked": [], "favorites": []}
+            return set()
 
         try:
-            blocked_ids = self._get_ids_by_table_type("blocked", user_id)
-            favorite_ids = self._get_ids_by_table_type("favorites", user_id)
-
-            return {"blocked": blocked_ids, "favorites": favorite_ids}
+            query = (
+                self.session.query(BlackList.blocked_vk_id)
+                .filter_by(user_id=user_id)
+                .union(
+                    self.session.query(Favorites.favorite_vk_id)
+                    .filter_by(user_id=user_id)
+                )
+            )
+            return {item[0] for item in query.all()}
         except SQLAlchemyError as e:
             print(f"Произошла ошибка при получении данных: {e}")
-            return {"blocked": [], "favorites": []}
-
-    def _get_ids_by_table_type(self, table_type: str, user_id: int) \
-            -> list[int]:
-        """Получает ID заблокированных и избранных пользователей из базы данных.
-
-        Args:
-            table_type (str): Тип таблицы: blocked или favorites.
-            user_id (int): ID пользователя.
-
-        Returns:
-            list[int]: Список ID заблокированных и избранных пользователей.
-        """
-        query = self.session.query(
-            BlackList.blocked_vk_id
-            if table_type == "blocked"
-            else Favorites.favorite_vk_id
-        )
-        return [item[0] for item in query.filter_by(user_id=user_id).all()]
+            return set()
@@ -2,16 +2,26 @@
 
 Модуль содержит в себе класс и методы для работы с пользователями и базой данных
 """
+from typing import TYPE_CHECKING
+
+from sqlalchemy import bindparam, func, tuple_, update
 from sqlalchemy.exc import SQLAlchemyError
 
-from database.base import Matches, Session, Users
+from database.base import Matches, Session, Users, upsert_insert
+from database.db_funcs.identity_cache import USER_ID_CACHE
+from settings import DB_SETTINGS
+
+if TYPE_CHECKING:
+    # Пакет vk_bot импортирует модули базы данных, поэтому запись
+    # кандидата импортируется только для проверки типов
+    from vk_bot.candidate import Candidate
 
 
 class UserDBManager:
     """Класс для работы с пользователями и базой данных."""
     def __init__(self) -> None:
         """Инициализирует объект для работы с пользователями."""
-        self.session = Session()
+        self.session = Session
 
     def add_bot_user_to_db(self, data_list: list[dict]) -> None:
         """Добавляет пользователя в базу данных.
@@ -26,6 +36,7 @@ class UserDBManager:
                 last_name = item.get('last_name')
                 gender = item.get('sex')
                 city_id = item.get('city', {}).get('id')
+                bdate = item.get('bdate')
 
                 existing_user = self.get_user_by_vk_id(vk_id)
 
@@ -34,13 +45,15 @@ class UserDBManager:
                     existing_user.last_name = last_name
                     existing_user.gender = gender
                     existing_user.city = city_id
+                    existing_user.bdate = bdate
                 else:
                     new_user = Users(
                         vk_id=vk_id,
                         first_name=first_name,
                         last_name=last_name,
                         gender=gender,
-                        city=city_id
+                        city=city_id,
+                        bdate=bdate
                     )
                     self.session.add(new_user)
 
@@ -50,145 +63,240 @@ class UserDBManager:
             self.session.rollback()
             print(f"Ошибка при добавлении пользователей: {e}")
         finally:
-            self.session.close()
+            for item in data_list:
+                USER_ID_CACHE.invalidate(item.get('id'))
+
+    def add_match_user_to_db(
+            self,
+            match_data: list["Candidate"],
+            f_user_id: int,
+            chunk_size: int = DB_SETTINGS["match_upsert_chunk_size"]
+    ) -> dict[str, int]:
+        """Добавляет мэтчи в базу данных.
 
-    def add_match_user_to_db(self, match_data: list[dict], f_user_id: int) \
-            -> None:
-        """Добавляет мэтч в базу данных.
+        Мэтчи записываются пакетами по chunk_size штук запросом
+        INSERT ... ON CONFLICT DO UPDATE: новые мэтчи добавляются,
+        а данные существующих обновляются.
 
         Args:
-            match_data (list[dict]): Список словарей с данными мэтча.
+            match_data (list[Candidate]): Список найденных кандидатов.
             f_user_id (int): ID пользователя VK, для которого добавляется мэтч.
+            chunk_size (int): Количество мэтчей в одном запросе.
+                По умолчанию берется из настроек.
+
+        Returns:
+            dict[str, int]: Количество добавленных (inserted) и
+                обновленных (updated) мэтчей.
         """
+        result = {"inserted": 0, "updated": 0}
+        user_id = self.get_user_id_by_vk_id(f_user_id)
+
+        if not user_id:
+            return result
+
+        # В одном запросе ON CONFLICT строка не может обновляться дважды,
+        # поэтому повторы кандидатов схлопываются до последнего значения.
+        rows = list({
+            item.id: {
+                "user_id": user_id,
+                "matched_vk_id": item.id,
+                "first_name": item.first_name,
+                "last_name": item.last_name,
+                "profile_link": item.url,
+                "photo_id_1": item.photo_id1,
+                "photo_id_2": item.photo_id2,
+                "photo_id_3": item.photo_id3,
+                "rank": item.rank,
+            }
+            for item in match_data
+        }.values())
+
         try:
-            for item in match_data:
-                vk_id = item.get('id')
-                first_name = item.get('first_name')
-                last_name = item.get('last_name')
-                profile_link = item.get('url')
-                photo_id_1 = item.get('photo_id1')
-                photo_id_2 = item.get('photo_id2')
-                photo_id_3 = item.get('photo_id3')
-
-                user_id = self.get_user_id_by_vk_id(f_user_id)
-
-                existing_match = self.get_user_matches(
-                    matched_vk_id=vk_id, return_all=False
-                )
-
-                if existing_match:
-                    existing_match.first_name = first_name
-                    existing_match.last_name = last_name
-                    existing_match.profile_link = profile_link
-                    existing_match.photo_id_1 = photo_id_1
-                    existing_match.photo_id_2 = photo_id_2
-                    existing_match.photo_id_3 = photo_id_3
-                else:
-                    new_match = Matches(
-                        user_id=user_id,
-                        matched_vk_id=vk_id,
-                        first_name=first_name,
-                        last_name=last_name,
-                        profile_link=profile_link,
-                        photo_id_1=photo_id_1,
-                        photo_id_2=photo_id_2,
-                        photo_id_3=photo_id_3
-                    )
-                    self.session.add(new_match)
+            for i in range(0, len(rows), chunk_size):
+                chunk_result = self._upsert_matches(rows[i:i + chunk_size])
+                result["inserted"] += chunk_result["inserted"]
+                result["updated"] += chunk_result["updated"]
+
             self.session.commit()
-            print("Пользователи успешно добавлены/обновлены в базе данных.")
+            print(
+                f"Мэтчи успешно добавлены/обновлены в базе данных: "
+                f"добавлено {result['inserted']}, "
+                f"обновлено {result['updated']}."
+            )
         except SQLAlchemyError as e:
             self.session.rollback()
             print(f"Ошибка при добавлении пользователей: {e}")
-        finally:
-            self.session.close()
+            result = {"inserted": 0, "updated": 0}
+
+        return result
 
-    def match_data_layout(self, f_user_id: int) -> list[list]:
-        """Подготавливает данные о мэтчах для вывода в чат бота.
+    def _upsert_matches(self, rows: list[dict]) -> dict[str, int]:
+        """Записывает пакет мэтчей одним запросом INSERT ... ON CONFLICT.
 
         Args:
-            f_user_id (int): ID пользователя VK.
+            rows (list[dict]): Строки таблицы мэтчей.
 
         Returns:
-            list: Список списков с данными о мэтчах.
+            dict[str, int]: Количество добавленных (inserted) и
+                обновленных (updated) мэтчей.
         """
-        match_info: list[dict] = self.get_match_info_to_print(f_user_id)
-        all_match_info_list = []
-
-        if match_info:
-            for result in match_info:
-                match_info_list = []
-                match_mess_info = f"{result["first_name"]} {result["last_name"]}"
-                match_url_info: str = result["profile_link"]
-                match_vk_id: int = result["vk_id"]
-
-                match_info_list.append(match_mess_info)
-                match_info_list.append(match_url_info)
-                match_info_list.append(match_vk_id)
-
-                photos = []
-                if result.get("photo_id_1"):
-                    photos.append(
-                        f'photo{result["vk_id"]}_{result["photo_id_1"]}'
-                    )
-                if result.get("photo_id_2"):
-                    photos.append(
-                        f'photo{result["vk_id"]}_{result["photo_id_2"]}'
-                    )
-                if result.get("photo_id_3"):
-                    photos.append(
-                        f'photo{result["vk_id"]}_{result["photo_id_3"]}'
-                    )
+        vk_ids = [row["matched_vk_id"] for row in rows]
+        existing_ids = {
+            item[0]
+            for item in self.session.query(Matches.matched_vk_id)
+            .filter(Matches.user_id == rows[0]["user_id"])
+            .filter(Matches.matched_vk_id.in_(vk_ids))
+        }
+
+        statement = upsert_insert(Matches.__table__)
+        set_ = {
+            column: statement.excluded[column]
+            for column in ("first_name", "last_name", "profile_link", "rank")
+        }
+        # Мэтчи могут записываться без фотографий, если они загружаются
+        # позже. В этом случае уже полученные фотографии сохраняются.
+        set_.update({
+            column: func.coalesce(
+                statement.excluded[column], Matches.__table__.c[column]
+            )
+            for column in ("photo_id_1", "photo_id_2", "photo_id_3")
+        })
+        statement = statement.on_conflict_do_update(
+            index_elements=[Matches.user_id, Matches.matched_vk_id],
+            set_=set_
+        )
+        self.session.execute(statement, rows)
+
+        return {
+            "inserted": len(rows) - len(existing_ids),
+            "updated": len(existing_ids)
+        }
+
+    def update_match_photos(self, match_photos: dict[int, list[str]]) -> None:
+        """Записывает фотографии мэтчей, загруженные после их добавления.
 
-                match_info_list.append(photos)
-                all_match_info_list.append(match_info_list)
+        Args:
+            match_photos (dict[int, list[str]]): Словарь с ID мэтча в
+                таблице мэтчей и списком ID его фотографий.
+        """
+        if not match_photos:
+            return
+
+        rows = [
+            {
+                "match_id": match_id,
+                "photo_1": photos[0] if len(photos) > 0 else None,
+                "photo_2": photos[1] if len(photos) > 1 else None,
+                "photo_3": photos[2] if len(photos) > 2 else None
+            }
+            for match_id, photos in match_photos.items()
+        ]
+        table = Matches.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("match_id"))
+            .values(
+                photo_id_1=bindparam("photo_1"),
+                photo_id_2=bindparam("photo_2"),
+                photo_id_3=bindparam("photo_3")
+            )
+        )
 
-        return all_match_info_list
+        try:
+            self.session.execute(statement, rows)
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Ошибка при обновлении фотографий мэтчей: {e}")
 
-    def get_match_info_to_print(self, f_user_id: int) -> list[dict] | None:
-        """Получает информацию о мэтчах для вывода в чат бота.
+    def get_next_matches(
+            self,
+            f_user_id: int,
+            after: tuple[int, int] = (-1, 0),
+            limit: int = 10
+    ) -> list[list]:
+        """Получает следующие мэтчи пользователя после указанного мэтча.
+
+        Мэтчи выдаются в порядке ранжирования и выбираются по ключу
+        (user_id, rank, id) с помощью индекса, поэтому стоимость запроса
+        не зависит от общего количества мэтчей пользователя.
 
         Args:
             f_user_id (int): ID пользователя VK.
+            after (tuple[int, int]): Ранг и ID последнего полученного
+                мэтча в таблице мэтчей. По умолчанию (-1, 0) — с начала
+                списка.
+            limit (int): Максимальное количество мэтчей. По умолчанию 10.
 
         Returns:
-            list: Список словарей с информацией о мэтчах.
-            None: Если мэтчи не найдены или произошла ошибка при получении
-                данных из базы данных.
+            list[list]: Список мэтчей. Каждый мэтч — список из имени и
+                фамилии, ссылки на профиль, ID пользователя VK, списка
+                вложений с фотографиями, ID мэтча в таблице мэтчей и его
+                ранга.
+            list: Пустой список, если мэтчей больше нет или произошла
+                ошибка при получении данных из базы данных.
         """
-        user_id: int = self.get_user_id_by_vk_id(f_user_id)
+        user_id = self.get_user_id_by_vk_id(f_user_id)
+
+        if not user_id:
+            return []
 
         try:
-            matches = self.get_user_matches(
-                user_id=user_id, return_all=True
+            matches = (
+                self.session.query(Matches)
+                .filter(Matches.user_id == user_id)
+                .filter(tuple_(Matches.rank, Matches.id) > after)
+                .order_by(Matches.rank, Matches.id)
+                .limit(limit)
+                .all()
             )
-
-            if matches:
-                result_list = []
-                for match in matches:
-                    match_dict = {
-                        "first_name": match.first_name,
-                        "last_name": match.last_name,
-                        "profile_link": match.profile_link,
-                        "vk_id": match.matched_vk_id
-                    }
-                    if match.photo_id_1:
-                        match_dict["photo_id_1"] = match.photo_id_1
-                    if match.photo_id_2:
-                        match_dict["photo_id_2"] = match.photo_id_2
-                    if match.photo_id_3:
-                        match_dict["photo_id_3"] = match.photo_id_3
-
-                    result_list.append(match_dict)
-
-                return result_list
-            else:
-                return None
         except SQLAlchemyError as e:
-            print(
-                f"Произошла ошибка при получении параметров пользователя: {e}"
-            )
-            return None
+            print(f"Произошла ошибка при получении мэтчей: {e}")
+            return []
+
+        return [self._format_match(match) for match in matches]
+
+    @staticmethod
+    def _format_match(match: Matches) -> list:
+        """Форматирует мэтч для вывода в чат бота.
+
+        Args:
+            match (Matches): Запись мэтча из базы данных.
+
+        Returns:
+            list: Имя и фамилия, ссылка на профиль, VK ID, список
+                вложений с фотографиями, ID мэтча в таблице мэтчей и его
+                ранг.
+        """
+        return [
+            f"{match.first_name} {match.last_name}",
+            match.profile_link,
+            match.matched_vk_id,
+            UserDBManager.get_photo_attachments(
+                match.matched_vk_id,
+                [match.photo_id_1, match.photo_id_2, match.photo_id_3]
+            ),
+            match.id,
+            match.rank
+        ]
+
+    @staticmethod
+    def get_photo_attachments(
+            vk_id: int, photo_ids: list[str | None]
+    ) -> list[str]:
+        """Форматирует ID фотографий как вложения сообщения.
+
+        Args:
+            vk_id (int): ID владельца фотографий в VK.
+            photo_ids (list[str | None]): Список ID фотографий. Пустые
+                значения пропускаются.
+
+        Returns:
+            list[str]: Список вложений вида photo<vk_id>_<photo_id>.
+        """
+        return [
+            f"photo{vk_id}_{photo_id}" for photo_id in photo_ids if photo_id
+        ]
 
     def get_user_params(self, user_id: int) -> dict | None:
         """Получает параметры пользователя из базы данных.
@@ -206,7 +314,8 @@ class UserDBManager:
             return (
                 {
                     "city_id": user.city,
-                    "sex": user.gender
+                    "sex": user.gender,
+                    "bdate": user.bdate
                 }
                 if user
                 else None
@@ -220,6 +329,9 @@ class UserDBManager:
     def get_user_id_by_vk_id(self, vk_id: int) -> int | None:
         """Получает ID пользователя из базы данных по его VK ID.
 
+        Найденные ID сохраняются в общий кэш USER_ID_CACHE, поэтому
+        повторные вызовы не обращаются к базе данных.
+
         Args:
             vk_id (int): ID пользователя VK.
 
@@ -228,13 +340,20 @@ class UserDBManager:
             None: Если произошла ошибка при получении данных из базы данных
                 или пользователь не найден.
         """
+        user_id = USER_ID_CACHE.get(vk_id)
+
+        if user_id is not None:
+            return user_id
+
         try:
             user = self.get_user_by_vk_id(vk_id)
-            return (
-                user.user_id
-                if user
-                else (print(f"Пользователь с vk_id {vk_id} не найден.") or None)
-            )
+
+            if not user:
+                print(f"Пользователь с vk_id {vk_id} не найден.")
+                return None
+
+            USER_ID_CACHE.set(vk_id, user.user_id)
+            return user.user_id
         except SQLAlchemyError as e:
             print(f"Произошла ошибка при получении user_id: {e}")
             return None
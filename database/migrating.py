@@ -0,0 +1,109 @@
+"""Модуль для обновления схемы существующей базы данных.
+
+В отличие от refreshing.py, таблицы не удаляются: недостающие таблицы
+создаются, а индексы и ограничения меняются на месте с сохранением данных.
+Все шаги идемпотентны, поэтому скрипт можно запускать повторно.
+"""
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Скрипт запускается из папки database, а base.py импортирует настройки
+# из пакета settings в корне репозитория
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from base import Base, engine  # noqa: E402
+
+#: Шаги миграции в порядке выполнения: описание и SQL-запрос (PostgreSQL).
+#: Индексы строятся с CONCURRENTLY, чтобы не блокировать запись в таблицы.
+#: Новые уникальные индексы создаются до удаления старых ограничений,
+#: поэтому уникальность данных не нарушается ни на одном шаге.
+MIGRATIONS = [
+    (
+        "Уникальный индекс мэтчей (user_id, matched_vk_id)",
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "
+        "ux_matches_user_id_matched_vk_id ON matches (user_id, matched_vk_id)"
+    ),
+    (
+        "Уникальный индекс избранных (user_id, favorite_vk_id)",
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "
+        "ux_favorites_user_id_favorite_vk_id "
+        "ON favorites (user_id, favorite_vk_id)"
+    ),
+    (
+        "Уникальный индекс черного списка (user_id, blocked_vk_id)",
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "
+        "ux_blacklist_user_id_blocked_vk_id "
+        "ON blacklist (user_id, blocked_vk_id)"
+    ),
+    (
+        "Колонка ранга мэтча",
+        "ALTER TABLE matches "
+        "ADD COLUMN IF NOT EXISTS rank INTEGER NOT NULL DEFAULT 0"
+    ),
+    (
+        "Индекс выборки мэтчей в порядке ранжирования (user_id, rank, id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+        "ix_matches_user_id_rank_id ON matches (user_id, rank, id)"
+    ),
+    (
+        "Удаление индекса выборки мэтчей (user_id, id)",
+        "DROP INDEX CONCURRENTLY IF EXISTS ix_matches_user_id_id"
+    ),
+    (
+        "Колонка даты рождения пользователя",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS bdate VARCHAR"
+    ),
+    (
+        "Колонка лайков в кэше фотографий",
+        "ALTER TABLE candidate_photos ADD COLUMN IF NOT EXISTS likes INTEGER"
+    ),
+    (
+        "Удаление глобальной уникальности matched_vk_id",
+        "ALTER TABLE matches "
+        "DROP CONSTRAINT IF EXISTS matches_matched_vk_id_key"
+    ),
+    (
+        "Удаление глобальной уникальности favorite_vk_id",
+        "ALTER TABLE favorites "
+        "DROP CONSTRAINT IF EXISTS favorites_favorite_vk_id_key"
+    ),
+    (
+        "Удаление глобальной уникальности blocked_vk_id",
+        "ALTER TABLE blacklist "
+        "DROP CONSTRAINT IF EXISTS blacklist_blocked_vk_id_key"
+    ),
+]
+
+
+def migrate_tables(engine) -> None:
+    """Приводит схему существующей базы данных к актуальной.
+
+    Если построение индекса с CONCURRENTLY прервется, PostgreSQL оставит
+    невалидный индекс, который нужно удалить вручную перед повторным
+    запуском.
+
+    Args:
+        engine: Объект соединения с базой данных.
+    """
+    # Создание таблиц, которых еще нет в базе данных
+    Base.metadata.create_all(engine)
+
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+    ) as conn:
+        for description, statement in MIGRATIONS:
+            try:
+                conn.execute(text(statement))
+                print(f"Выполнено: {description}")
+            except Exception as e:
+                print(f"Ошибка на шаге «{description}»: {e}")
+                return
+
+    print("Схема базы данных обновлена.")
+
+
+if __name__ == "__main__":
+    migrate_tables(engine)
@@ -1,6 +1,13 @@
+import sys
+from pathlib import Path
+
 from sqlalchemy import text
 
-from base import Base, engine
+# Скрипт запускается из папки database, а base.py импортирует настройки
+# из пакета settings в корне репозитория
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from base import Base, engine  # noqa: E402
 
 
 def drop_tables_with_cascade(engine) -> None:
@@ -1,17 +1,41 @@
 import os
 
 from dotenv import load_dotenv
-from database.base import Session
-
 
+from settings import BOT_SETTINGS
 from vk_bot.bot import VKBot
 
 load_dotenv()
 
 
+def create_bot() -> VKBot:
+    """Создает бота для обработчика событий Callback API.
+
+    Returns:
+        VKBot: Бот с токенами из переменных окружения.
+    """
+    return VKBot(os.getenv('VK_GROUP_TOKEN'), os.getenv("VK_TOKEN"))
+
+
 if __name__ == '__main__':
-    db_session = Session()
     group_token = os.getenv('VK_GROUP_TOKEN')
     vk_token = os.getenv("VK_TOKEN")
-    bot = VKBot(group_token, vk_token, db_session)
-    bot.start()
+
+    if BOT_SETTINGS["callback_server"]:
+        from vk_bot.callback_server import serve_callback
+
+        # Каждый процесс-обработчик создает собственного бота
+        serve_callback(
+            create_bot,
+            os.getenv("VK_CALLBACK_CONFIRMATION"),
+            os.getenv("VK_CALLBACK_SECRET")
+        )
+    elif BOT_SETTINGS["async_runtime"]:
+        from vk_bot.async_bot import AsyncVKBot
+
+        group_id = os.getenv("VK_GROUP_ID")
+        AsyncVKBot(
+            group_token, vk_token, int(group_id) if group_id else None
+        ).start()
+    else:
+        VKBot(group_token, vk_token).start()
@@ -5,10 +5,18 @@
 from .messages import MESSAGES
 from .commands import COMMANDS
 from .keyboards import KEYBOARDS
+from .vk_api import VK_API_SETTINGS
+from .bot import BOT_SETTINGS
+from .database import DB_SETTINGS
+from .ranking import RANKING_SETTINGS
 
 
 __all__ = [
     "MESSAGES",
     "COMMANDS",
-    "KEYBOARDS"
+    "KEYBOARDS",
+    "VK_API_SETTINGS",
+    "BOT_SETTINGS",
+    "DB_SETTINGS",
+    "RANKING_SETTINGS"
 ]
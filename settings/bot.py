@@ -0,0 +1,88 @@
+"""Модуль с настройками работы бота.
+
+Этот модуль определяет словарь параметров обработки событий бота.
+"""
+
+BOT_SETTINGS = {
+    # Количество потоков, параллельно обрабатывающих события пользователей.
+    # События одного пользователя обрабатываются по порядку, по одному.
+    "event_workers": 8,
+    # Максимальное количество необработанных событий. При превышении
+    # прием новых событий приостанавливается.
+    "event_queue_size": 800,
+    # Максимальное количество сессий пользователей в памяти. При
+    # превышении вытесняются сессии, к которым дольше всего не обращались.
+    "max_sessions": 10000,
+    # Время бездействия пользователя в секундах, после которого его
+    # сессия удаляется из памяти.
+    "session_idle_ttl": 60 * 60,
+    # Количество мэтчей, загружаемых из базы данных за один запрос при
+    # просмотре анкет.
+    "match_window_size": 10,
+    # Количество поисков мэтчей, одновременно выполняемых в фоне.
+    "search_job_workers": 4,
+    # Количество мэтчей, которые дополняются фотографиями и записываются
+    # в базу данных за один раз при фоновом поиске. Первая анкета
+    # становится доступна после записи первого пакета.
+    "search_job_chunk_size": 50,
+    # Загружать фотографии мэтчей только при просмотре анкет. Мэтчи
+    # записываются в базу данных без фотографий, а фотографии следующих
+    # photo_prefetch_size анкет загружаются в фоне заранее.
+    "lazy_photos": True,
+    "photo_prefetch_size": 3,
+    # Количество потоков для фоновой загрузки фотографий анкет.
+    "photo_prefetch_workers": 2,
+    # Количество клавиатур, собранных во время работы бота, JSON которых
+    # хранится в кэше. Клавиатуры из настроек создаются заранее.
+    "keyboard_cache_size": 128,
+    # Запускать бота в асинхронной среде выполнения: события сообщества
+    # получаются через Bots Long Poll API, а сообщения отправляются через
+    # aiohttp без блокировки потоков. По умолчанию используется
+    # синхронная среда выполнения с пулом потоков.
+    "async_runtime": False,
+    # Время ожидания событий одним запросом к серверу Long Poll в секундах.
+    "longpoll_wait": 25,
+    # Задержка перед повтором запроса к серверу Long Poll после ошибки в
+    # секундах (удваивается с каждой ошибкой подряд) и ее максимум.
+    "longpoll_retry_delay": 1,
+    "longpoll_max_retry_delay": 60,
+    # Максимальное количество событий, одновременно обрабатываемых в
+    # асинхронной среде выполнения. При превышении прием новых событий
+    # приостанавливается.
+    "async_max_events": 1000,
+    # Количество потоков, в которых асинхронная среда выполнения выполняет
+    # обработчики команд. Обработчики работают с базой данных, поэтому
+    # значение не должно превышать размер пула соединений.
+    "async_handler_workers": 8,
+    # Получать события сообщества через Callback API вместо Long Poll.
+    # Бот запускает HTTP-сервер, адрес которого указывается в настройках
+    # Callback API сообщества.
+    "callback_server": False,
+    # Адрес и порт HTTP-сервера Callback API.
+    "callback_host": "0.0.0.0",
+    "callback_port": 8080,
+    # Количество процессов, обрабатывающих сообщения в режиме Callback
+    # API. Сообщения одного пользователя всегда обрабатываются одним
+    # процессом. Лимиты запросов токенов делятся между процессами
+    # поровну. Значение 0 обрабатывает сообщения в процессе сервера.
+    "callback_workers": 4,
+    # Максимальное количество сообщений в очереди одного процесса.
+    "callback_queue_size": 1000,
+    # Время ожидания места в заполненной очереди в секундах. Если место
+    # не освободилось, VK получает ошибку и повторяет событие позже.
+    "callback_queue_timeout": 0.5,
+    # Количество последних event_id, по которым отбрасываются повторно
+    # доставленные VK события.
+    "callback_dedup_size": 10000,
+    # Количество потоков, отправляющих сообщения пользователям. Сообщения
+    # одному пользователю всегда отправляются одним потоком по порядку.
+    "outbox_workers": 4,
+    # Максимальное количество сообщений в очереди одного потока отправки.
+    # При заполнении очереди обработчики ждут освобождения места.
+    "outbox_queue_size": 1000,
+    # Количество повторов отправки при ошибках сети и внутренних ошибках
+    # VK и начальная задержка перед повтором в секундах (удваивается с
+    # каждой попыткой).
+    "outbox_retries": 3,
+    "outbox_retry_backoff": 0.5,
+}
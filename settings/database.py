@@ -0,0 +1,38 @@
+"""Модуль с настройками работы с базой данных.
+
+Этот модуль определяет словарь параметров, которые управляют
+производительностью запросов к базе данных.
+"""
+
+DB_SETTINGS = {
+    # Параметры пула соединений с PostgreSQL. Одновременно соединения
+    # могут понадобиться потокам обработки событий, фоновых поисков и
+    # загрузки фотографий, поэтому размер пула должен быть не меньше их
+    # суммарного количества.
+    "pool_size": 16,
+    "max_overflow": 8,
+    # Время ожидания свободного соединения в секундах.
+    "pool_timeout": 30,
+    # Проверять соединение перед использованием и переоткрывать
+    # соединения старше pool_recycle секунд.
+    "pool_pre_ping": True,
+    "pool_recycle": 30 * 60,
+    # Интервал в секундах, с которым работающий бот выводит статистику
+    # ожидания соединений из пула. Значение 0 отключает вывод, и
+    # статистика выводится только при остановке бота.
+    "pool_stats_interval": 5 * 60,
+    # Количество мэтчей, записываемых в базу данных одним запросом
+    # INSERT ... ON CONFLICT DO UPDATE.
+    "match_upsert_chunk_size": 500,
+    # Максимальное количество записей в кэше соответствия VK ID и ID
+    # пользователя в базе данных.
+    "identity_cache_size": 10000,
+    # Время жизни записи в кэше фотографий кандидатов в секундах.
+    "photo_cache_ttl": 7 * 24 * 60 * 60,
+    # Максимальное количество записей в кэше фотографий кандидатов.
+    # При превышении удаляются записи, полученные раньше остальных.
+    "photo_cache_max_size": 200000,
+    # Количество сохраненных записей, после которого из кэша фотографий
+    # удаляются устаревшие записи и записи сверх максимального размера.
+    "photo_cache_evict_every": 5000,
+}
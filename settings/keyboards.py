@@ -1,68 +1,71 @@
 """ Модуль с клавиатурными настройками.
 
 Каждый элемент клавиатуры представлен словарем с настройками.
+Кнопка задается кортежем (текст, цвет, команда): название команды из
+COMMANDS передается в payload кнопки, и бот обрабатывает нажатие без
+разбора текста. Команду можно не указывать.
 """
 
 KEYBOARDS = {
 	"start": {
 		"btns": [
-			("Начать поиск", "positive"),
-			("Помощь", "primary"),
+			("Начать поиск", "positive", "show"),
+			("Помощь", "primary", "help"),
 		],
 		"one_time": True,
 		"inline": False
 	},
 	"help": {
 		"btns": [
-			("Начать поиск", "positive"),
+			("Начать поиск", "positive", "show"),
 		],
 		"one_time": True,
 		"inline": False,
 	},
 	"card": {
 		"btns": [
-			("👍", "positive"),
-			("👎", "secondary"),
-			("❌", "negative")
+			("👍", "positive", "add_to_favorites"),
+			("👎", "secondary", "next"),
+			("❌", "negative", "add_to_black_list")
 		],
 		"one_time": True,
 		"inline": False
 	},
 	"add_to_favorites": {
 		"btns": [
-			("Продолжить поиск", "positive"),
-			("Список избранных", "secondary"),
+			("Продолжить поиск", "positive", "next"),
+			("Список избранных", "secondary", "show_favorites"),
 		],
 		"one_time": True,
 		"inline": False
 	},
 	"del_from_favorites": {
 		"btns": [
-			("Продолжить поиск", "positive"),
-			("Убрать из избранного", "secondary"),
+			("Продолжить поиск", "positive", "next"),
+			("Убрать из избранного", "secondary", "del_from_favorites"),
 		],
 		"one_time": True,
 		"inline": False
 	},
 	"next": {
 		"btns": [
-			("Продолжить поиск", "positive"),
+			("Продолжить поиск", "positive", "next"),
 		],
 		"one_time": True,
 		"inline": False
 	},
 	"add_to_black_list": {
 		"btns": [
-			("Продолжить поиск", "positive"),
-			("Черный список", "secondary"),
+			("Продолжить поиск", "positive", "next"),
+			("Черный список", "secondary", "show_black_list"),
 		],
 		"one_time": True,
 		"inline": False
 	},
 	"del_from_black_list": {
 		"btns": [
-			("Продолжить поиск", "positive"),
-			("Убрать из черного списка", "secondary"),
+			("Продолжить поиск", "positive", "next"),
+			("Убрать из черного списка", "secondary", "del_from_black_list"),
 		],
 		"one_time": True,
 		"inline": False
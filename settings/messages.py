@@ -59,4 +59,7 @@ MESSAGES = {
         "К сожалению, по вашему запросу не было найдено дополнительных анкет. "
         "Похоже, вы уже ознакомились со всеми имеющимися."
     ),
+    "search_in_progress": (
+        "Поиск анкет ещё идёт 🔎 Попробуйте через несколько секунд."
+    ),
 }
@@ -0,0 +1,22 @@
+"""Модуль с настройками ранжирования кандидатов.
+
+Этот модуль определяет словарь параметров, по которым кандидаты из
+результатов поиска упорядочиваются перед сохранением в мэтчи.
+"""
+
+RANKING_SETTINGS = {
+    # Веса признаков в итоговой оценке кандидата. Каждый признак
+    # нормализуется среди всех кандидатов поиска к диапазону от 0 до 1,
+    # где 1 — лучшее значение:
+    # recency — как давно кандидат был в сети (чем недавнее, тем лучше);
+    # likes — сумма лайков трех лучших фотографий из кэша фотографий
+    # (кандидатам, которых еще нет в кэше, подставляется среднее);
+    # age — разница в годе рождения с пользователем бота (чем меньше,
+    # тем лучше).
+    # Признак с нулевым весом не влияет на порядок.
+    "weights": {
+        "recency": 0.5,
+        "likes": 0.3,
+        "age": 0.2
+    }
+}
@@ -0,0 +1,54 @@
+"""Модуль с настройками работы с VK API.
+
+Этот модуль определяет словарь параметров, которые управляют
+производительностью запросов к VK API: количество потоков, размеры пакетов
+и прочие ограничения.
+"""
+
+VK_API_SETTINGS = {
+    # Количество потоков для параллельного получения фотографий кандидатов.
+    # Значение 1 отключает параллельный режим.
+    "photo_workers": 3,
+    # Количество вызовов API, объединяемых в один запрос execute (до 25).
+    "execute_batch_size": 25,
+    # Максимальное количество соединений в общем пуле HTTP-клиента.
+    "pool_size": 10,
+    # Таймауты установки соединения и чтения ответа в секундах.
+    "connect_timeout": 3.05,
+    "read_timeout": 10,
+    # Количество повторных попыток при временных ошибках сети и
+    # множитель экспоненциальной задержки между ними.
+    "retries": 3,
+    "retry_backoff": 0.5,
+    # Лимит запросов в секунду для одного пользовательского токена.
+    "requests_per_second": 3,
+    # Лимит запросов в секунду для токена сообщества, через который
+    # отправляются сообщения.
+    "group_requests_per_second": 20,
+    # Дополнительные лимиты запросов в секунду для отдельных методов,
+    # например {"users.search": 1}.
+    "method_rate_limits": {},
+    # Количество повторов при ошибках VK API 6 и 9 и начальная задержка
+    # перед повтором в секундах (удваивается с каждой попыткой).
+    "rate_limit_retries": 5,
+    "rate_limit_backoff": 1.0,
+    # Время жизни результатов users.search в общем кэше в секундах и
+    # максимальное количество наборов параметров поиска в кэше.
+    "search_cache_ttl": 600,
+    "search_cache_size": 256,
+    # Режим обхода: поиск разбивается на подзапросы по году возраста (а
+    # при достижении лимита в 1000 человек — по месяцу рождения), чтобы
+    # получить больше кандидатов, чем возвращает один запрос users.search.
+    "search_sweep": False,
+    # Количество потоков для параллельного выполнения подзапросов и
+    # максимальное количество кандидатов, собираемых в режиме обхода.
+    "search_workers": 3,
+    "search_sweep_limit": 3000,
+    # Количество кандидатов, ранжируемых вместе в режиме обхода. Кандидаты
+    # ранжируются группами по мере поступления, поэтому первые анкеты
+    # готовы до окончания обхода.
+    "search_rank_window": 1000,
+    # Количество пакетов кандидатов с фотографиями, которые готовятся
+    # заранее, пока предыдущие пакеты записываются в базу данных.
+    "pipeline_buffer_size": 2,
+}
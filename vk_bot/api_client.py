@@ -0,0 +1,162 @@
+"""Модуль с клиентом для выполнения запросов к VK API.
+
+Модуль содержит класс VKApiClient, через который выполняются все
+REST-запросы к VK API. Клиент использует общий пул соединений с
+keep-alive, таймауты и повторные попытки при временных ошибках сети,
+а частота запросов ограничивается планировщиком токена.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from settings import VK_API_SETTINGS
+from vk_bot.rate_limiter import VKRequestScheduler, get_scheduler
+
+
+class VKApiError(requests.exceptions.RequestException):
+    """Ошибка, возвращенная VK API в поле error ответа.
+
+    Наследуется от RequestException, поэтому обрабатывается там же,
+    где и ошибки сети.
+    """
+    def __init__(self, method: str, error: dict) -> None:
+        """Инициализирует ошибку VK API.
+
+        Args:
+            method (str): Название метода API.
+            error (dict): Содержимое поля error ответа.
+        """
+        self.method = method
+        self.code = error.get("error_code")
+        self.msg = error.get("error_msg")
+        super().__init__(f"{method}: [{self.code}] {self.msg}")
+
+
+class VKApiClient:
+    """Класс клиента VK API с пулом соединений."""
+    def __init__(
+            self,
+            token: str,
+            vk_api_version: float,
+            pool_size: int = VK_API_SETTINGS["pool_size"],
+            connect_timeout: float = VK_API_SETTINGS["connect_timeout"],
+            read_timeout: float = VK_API_SETTINGS["read_timeout"],
+            retries: int = VK_API_SETTINGS["retries"],
+            backoff_factor: float = VK_API_SETTINGS["retry_backoff"],
+            scheduler: VKRequestScheduler | None = None
+    ) -> None:
+        """Инициализирует объект класса VKApiClient.
+
+        Args:
+            token (str): Токен для доступа к API ВКонтакте.
+            vk_api_version (float): Версия API ВКонтакте.
+            pool_size (int): Максимальное количество соединений в пуле.
+                Должно быть не меньше количества потоков, которые
+                одновременно используют клиент.
+            connect_timeout (float): Таймаут установки соединения в секундах.
+            read_timeout (float): Таймаут чтения ответа в секундах.
+            retries (int): Количество повторных попыток при временных
+                ошибках сети и ответах 5xx.
+            backoff_factor (float): Множитель экспоненциальной задержки
+                между повторными попытками.
+            scheduler (VKRequestScheduler | None, optional): Планировщик
+                запросов. По умолчанию используется общий планировщик
+                токена.
+        """
+        self.URL = "https://api.vk.com/method/"
+        self.TOKEN = token
+        self.vk_api_version = vk_api_version
+        self.timeout = (connect_timeout, read_timeout)
+        self._adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=(500, 502, 503, 504),
+                # Повтор POST-запросов безопасен: кроме читающих методов
+                # клиент вызывает только messages.send, а его повтор с
+                # тем же random_id VK не доставляет повторно.
+                allowed_methods=frozenset({"GET", "POST"})
+            )
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.scheduler = scheduler or get_scheduler(token)
+
+    def call(self, method: str, params: dict, post: bool = False) -> dict:
+        """Выполняет запрос к методу VK API.
+
+        Токен и версия API добавляются к параметрам автоматически.
+        Запрос выполняется в пределах лимитов планировщика, а ответы с
+        ошибками 6 и 9 повторяются с задержкой.
+
+        Args:
+            method (str): Название метода API, например "users.get".
+            params (dict): Параметры метода.
+            post (bool): Отправлять параметры в теле POST-запроса.
+                Используется для длинных запросов, например execute.
+                По умолчанию False.
+
+        Returns:
+            dict: Разобранный JSON-ответ VK API.
+
+        Raises:
+            VKApiError: Если VK API вернул ошибку.
+            requests.exceptions.RequestException: При ошибке сети или
+                некорректном JSON в ответе.
+        """
+        request_params = {
+            "access_token": self.TOKEN,
+            "v": self.vk_api_version,
+            **params
+        }
+
+        def send() -> dict:
+            if post:
+                response = self.session.post(
+                    f"{self.URL}{method}", data=request_params,
+                    timeout=self.timeout
+                )
+            else:
+                response = self.session.get(
+                    f"{self.URL}{method}", params=request_params,
+                    timeout=self.timeout
+                )
+            return response.json()
+
+        data = self.scheduler.execute(method, send)
+
+        if "error" in data:
+            raise VKApiError(method, data["error"])
+
+        return data
+
+    def connection_stats(self) -> dict[str, int]:
+        """Возвращает статистику использования пула соединений.
+
+        Returns:
+            dict[str, int]: Словарь с количеством выполненных HTTP-запросов
+                (requests), новых соединений с TLS-рукопожатием (handshakes)
+                и запросов, выполненных в уже открытых соединениях (reused).
+        """
+        pools = self._adapter.poolmanager.pools
+        handshakes = 0
+        total_requests = 0
+
+        for key in pools.keys():
+            pool = pools.get(key)
+
+            if pool is not None:
+                handshakes += pool.num_connections
+                total_requests += pool.num_requests
+
+        return {
+            "requests": total_requests,
+            "handshakes": handshakes,
+            "reused": total_requests - handshakes
+        }
+
+    def close(self) -> None:
+        """Закрывает все соединения пула."""
+        self.session.close()
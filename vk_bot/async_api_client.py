@@ -0,0 +1,252 @@
+"""Модуль с асинхронным клиентом для выполнения запросов к VK API.
+
+Модуль содержит класс AsyncVKApiClient для асинхронной среды выполнения
+бота и класс AsyncVKExecuteBatcher для пакетных запросов через него.
+Запросы выполняются через aiohttp, поэтому ожидание ответа не занимает
+поток, а все клиенты бота используют одну HTTP-сессию с общим пулом
+соединений. Частота запросов ограничивается тем же планировщиком
+токена, что и у синхронного клиента.
+"""
+import asyncio
+from itertools import chain
+
+import aiohttp
+
+from settings import VK_API_SETTINGS
+from vk_bot.api_client import VKApiError
+from vk_bot.batch import VKExecuteBatcher
+from vk_bot.rate_limiter import VKRequestScheduler, get_scheduler
+
+#: Коды ответа HTTP, при которых запрос повторяется.
+RETRYABLE_STATUSES = (500, 502, 503, 504)
+
+#: Ошибки, которые могут возникнуть при запросе через AsyncVKApiClient.
+REQUEST_ERRORS = (
+    VKApiError, aiohttp.ClientError, asyncio.TimeoutError, ValueError
+)
+
+
+def create_http_session(
+        pool_size: int = VK_API_SETTINGS["pool_size"],
+        connect_timeout: float = VK_API_SETTINGS["connect_timeout"],
+        read_timeout: float = VK_API_SETTINGS["read_timeout"]
+) -> aiohttp.ClientSession:
+    """Создает HTTP-сессию с общим пулом соединений.
+
+    Должна вызываться внутри запущенного цикла событий.
+
+    Args:
+        pool_size (int): Максимальное количество соединений в пуле.
+            По умолчанию берется из настроек.
+        connect_timeout (float): Таймаут установки соединения в секундах.
+        read_timeout (float): Таймаут чтения ответа в секундах.
+
+    Returns:
+        aiohttp.ClientSession: HTTP-сессия.
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=pool_size),
+        timeout=aiohttp.ClientTimeout(
+            sock_connect=connect_timeout, sock_read=read_timeout
+        )
+    )
+
+
+class AsyncVKApiClient:
+    """Класс асинхронного клиента VK API."""
+    def __init__(
+            self,
+            token: str,
+            vk_api_version: float,
+            http_session: aiohttp.ClientSession,
+            retries: int = VK_API_SETTINGS["retries"],
+            backoff_factor: float = VK_API_SETTINGS["retry_backoff"],
+            scheduler: VKRequestScheduler | None = None
+    ) -> None:
+        """Инициализирует объект класса AsyncVKApiClient.
+
+        Args:
+            token (str): Токен для доступа к API ВКонтакте.
+            vk_api_version (float): Версия API ВКонтакте.
+            http_session (aiohttp.ClientSession): Общая HTTP-сессия,
+                созданная create_http_session. Клиент не закрывает ее.
+            retries (int): Количество повторных попыток при временных
+                ошибках сети и ответах 5xx.
+            backoff_factor (float): Множитель экспоненциальной задержки
+                между повторными попытками.
+            scheduler (VKRequestScheduler | None, optional): Планировщик
+                запросов. По умолчанию используется общий планировщик
+                токена.
+        """
+        self.URL = "https://api.vk.com/method/"
+        self.TOKEN = token
+        self.vk_api_version = vk_api_version
+        self.http_session = http_session
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.scheduler = scheduler or get_scheduler(token)
+
+    async def call(
+            self, method: str, params: dict, post: bool = False
+    ) -> dict:
+        """Выполняет запрос к методу VK API.
+
+        Токен и версия API добавляются к параметрам автоматически.
+        Параметры со значением None не передаются.
+
+        Args:
+            method (str): Название метода API, например "users.get".
+            params (dict): Параметры метода.
+            post (bool): Отправлять параметры в теле POST-запроса.
+                По умолчанию False.
+
+        Returns:
+            dict: Разобранный JSON-ответ VK API.
+
+        Raises:
+            VKApiError: Если VK API вернул ошибку.
+            aiohttp.ClientError: При ошибке сети или ответе с ошибкой HTTP.
+            asyncio.TimeoutError: Если ответ не получен за время таймаута.
+            ValueError: При некорректном JSON в ответе.
+        """
+        request_params = {
+            "access_token": self.TOKEN,
+            "v": self.vk_api_version,
+            **params
+        }
+        request_params = {
+            key: str(value)
+            for key, value in request_params.items()
+            if value is not None
+        }
+
+        async def send() -> dict:
+            if post:
+                return await self.request(
+                    "POST", f"{self.URL}{method}", data=request_params
+                )
+            return await self.request(
+                "GET", f"{self.URL}{method}", params=request_params
+            )
+
+        data = await self.scheduler.execute_async(method, send)
+
+        if "error" in data:
+            raise VKApiError(method, data["error"])
+
+        return data
+
+    async def request(
+            self,
+            http_method: str,
+            url: str,
+            timeout: aiohttp.ClientTimeout | None = None,
+            **kwargs
+    ) -> dict:
+        """Выполняет HTTP-запрос с повторами при временных ошибках.
+
+        Используется для запросов к VK API и к серверу Long Poll.
+
+        Args:
+            http_method (str): Метод HTTP, например "GET".
+            url (str): Адрес запроса.
+            timeout (aiohttp.ClientTimeout | None, optional): Таймаут
+                запроса. По умолчанию используется таймаут сессии.
+            **kwargs: Параметры запроса aiohttp, например params или data.
+
+        Returns:
+            dict: Разобранный JSON-ответ.
+
+        Raises:
+            aiohttp.ClientError: При ошибке сети, если повторы исчерпаны,
+                или при ответе с ошибкой HTTP.
+            asyncio.TimeoutError: Если ответ не получен за время таймаута
+                и повторы исчерпаны.
+            ValueError: При некорректном JSON в ответе.
+        """
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        # Повторяются и POST-запросы: единственный пишущий метод,
+        # messages.send, VK не выполняет повторно с тем же random_id
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.http_session.request(
+                        http_method, url, **kwargs
+                ) as response:
+                    if (response.status not in RETRYABLE_STATUSES
+                            or attempt == self.retries):
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+
+            await asyncio.sleep(self.backoff_factor * 2 ** attempt)
+
+
+class AsyncVKExecuteBatcher(VKExecuteBatcher):
+    """Класс для пакетного выполнения запросов через AsyncVKApiClient."""
+    def __init__(
+            self,
+            api_client: AsyncVKApiClient,
+            batch_size: int = VK_API_SETTINGS["execute_batch_size"]
+    ) -> None:
+        """Инициализирует объект класса AsyncVKExecuteBatcher.
+
+        Args:
+            api_client (AsyncVKApiClient): Клиент VK API, через который
+                выполняются запросы execute.
+            batch_size (int): Количество вызовов в одном запросе execute.
+                Не может превышать 25. По умолчанию берется из настроек.
+        """
+        super().__init__(api_client, batch_size)
+
+    async def call_many(
+            self, method: str, params_list: list[dict]
+    ) -> list[dict | list | bool | None]:
+        """Выполняет несколько вызовов одного метода API пакетами.
+
+        Запросы execute выполняются одновременно, а их частота
+        ограничивается планировщиком токена.
+
+        Args:
+            method (str): Название метода API, например "photos.get".
+            params_list (list[dict]): Список параметров для каждого вызова.
+
+        Returns:
+            list[dict | list | bool | None]: Результаты вызовов в формате
+                VKExecuteBatcher.call_many.
+        """
+        batches = await asyncio.gather(*(
+            self._execute_batch(method, params_list[i:i + self.batch_size])
+            for i in range(0, len(params_list), self.batch_size)
+        ))
+        return list(chain.from_iterable(batches))
+
+    async def _execute_batch(
+            self, method: str, params_list: list[dict]
+    ) -> list[dict | list | bool | None]:
+        """Выполняет один запрос execute.
+
+        Args:
+            method (str): Название метода API.
+            params_list (list[dict]): Параметры вызовов, не более 25.
+
+        Returns:
+            list[dict | list | bool | None]: Результаты вызовов в формате
+                VKExecuteBatcher.call_many.
+        """
+        try:
+            data = await self.api_client.call(
+                "execute",
+                {"code": self._build_script(method, params_list)},
+                post=True
+            )
+        except VKApiError as e:
+            print(f"Ошибка при выполнении execute ({method}): {e}")
+            return [None] * len(params_list)
+        except REQUEST_ERRORS:
+            return [None] * len(params_list)
+
+        return self._parse_results(data, len(params_list))
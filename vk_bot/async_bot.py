@@ -0,0 +1,450 @@
+"""Модуль с асинхронной средой выполнения бота.
+
+Модуль содержит класс AsyncVKBot, который получает события сообщества и
+отправляет сообщения в одном цикле событий asyncio. События получаются
+через Bots Long Poll API, а сообщения отправляются через aiohttp с общим
+пулом соединений. Ожидание ответа VK API не занимает поток, поэтому
+отправка ответов не ограничена количеством потоков.
+
+Команды обрабатываются теми же синхронными обработчиками, что и в
+синхронной среде выполнения. Обработчик выполняется в пуле потоков, так
+как работает с синхронным SQLAlchemy, и выполняет только работу с базой
+данных. Запросы с токеном пользователя выполняются в цикле событий:
+профиль пользователя по команде «Начать» и фотографии анкет при
+отложенной загрузке. Сообщения, отправленные обработчиком, передаются в
+цикл событий, и карточка мэтча отправляется после загрузки фотографий.
+
+Поиск мэтчей по-прежнему выполняется в фоновых потоках через синхронный
+клиент VK API, так как результаты сохраняются в базу данных пакетами по
+мере поиска.
+"""
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Coroutine
+
+from vk_api.utils import get_random_id
+
+from database.base import POOL_STATS, call_in_session_scope
+from settings import BOT_SETTINGS, DB_SETTINGS, VK_API_SETTINGS
+from vk_bot.async_api_client import (
+    REQUEST_ERRORS, AsyncVKApiClient, AsyncVKExecuteBatcher,
+    create_http_session
+)
+from vk_bot.async_photo_prefetcher import AsyncPhotoPrefetcher
+from vk_bot.bot import VKBot
+from vk_bot.bots_longpoll import AsyncBotsLongPoll
+from vk_bot.get_info import PROFILE_FIELDS
+from vk_bot.rate_limiter import get_scheduler
+from vk_bot.user_session import UserSession
+
+
+class AsyncVKBot(VKBot):
+    """Класс бота с асинхронной средой выполнения."""
+    def __init__(
+            self,
+            group_token: str,
+            vk_token: str,
+            group_id: int | None = None
+    ) -> None:
+        """Инициализация бота.
+
+        Args:
+            group_token (str): Токен для доступа к группе Vk.
+            vk_token (str): Токен для доступа к VK API.
+            group_id (int | None, optional): ID сообщества. Если не
+                передан, определяется по токену сообщества при запуске.
+                По умолчанию None.
+        """
+        super().__init__(group_token, vk_token)
+        self.group_id = group_id
+        # Блокировки, по которым события одного пользователя
+        # обрабатываются по порядку, и количество ожидающих их событий
+        self._user_locks: dict[int, list[asyncio.Lock | int]] = {}
+        # Последняя задача отправки сообщения каждому пользователю.
+        # Следующее сообщение отправляется после нее
+        self._send_tasks: dict[int, asyncio.Task] = {}
+        # Запросы, которые обработчик события передал в цикл событий.
+        # Событие считается обработанным после их выполнения
+        self._deferred: dict[int, list[Future]] = {}
+
+    def _setup_runtime(self) -> None:
+        """Метод для создания объектов асинхронной среды выполнения.
+
+        Клиенты VK API и загрузка фотографий создаются при запуске в
+        цикле событий. Подключение vk_api, очередь отправки сообщений и
+        диспетчер событий синхронной среды выполнения не создаются.
+        """
+        self.group_api: AsyncVKApiClient | None = None
+        self.user_api: AsyncVKApiClient | None = None
+        self.photo_prefetcher: AsyncPhotoPrefetcher | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def start(self) -> None:
+        """Метод для запуска бота в цикле событий asyncio."""
+        asyncio.run(self.run())
+
+    async def run(self) -> None:
+        """Метод для прослушивания событий сообщества.
+
+        Каждое сообщение обрабатывается в отдельной задаче: сообщения
+        разных пользователей обрабатываются одновременно, а сообщения
+        одного пользователя — по порядку.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._loop.set_default_executor(
+            ThreadPoolExecutor(
+                max_workers=BOT_SETTINGS["async_handler_workers"],
+                thread_name_prefix="handler"
+            )
+        )
+        POOL_STATS.start_reporting(DB_SETTINGS["pool_stats_interval"])
+        event_slots = asyncio.Semaphore(BOT_SETTINGS["async_max_events"])
+        tasks: set[asyncio.Task] = set()
+
+        async with create_http_session() as http_session:
+            self.group_api = AsyncVKApiClient(
+                self.group_token, self.vk_api_version, http_session,
+                scheduler=get_scheduler(
+                    self.group_token,
+                    VK_API_SETTINGS["group_requests_per_second"]
+                )
+            )
+            # Планировщик токена пользователя общий с фоновым поиском
+            self.user_api = AsyncVKApiClient(
+                self.vk_token, self.vk_api_version, http_session
+            )
+            self.photo_prefetcher = AsyncPhotoPrefetcher(
+                self.searcher,
+                self.user_db,
+                AsyncVKExecuteBatcher(self.user_api),
+                self._loop
+            )
+
+            try:
+                if self.group_id is None:
+                    self.group_id = await self._get_group_id()
+
+                longpoll = AsyncBotsLongPoll(self.group_api, self.group_id)
+
+                async for event in longpoll.listen():
+                    if (not isinstance(event, dict)
+                            or event.get("type") != "message_new"):
+                        continue
+
+                    try:
+                        message = event["object"]["message"]
+                        user_id = int(message["from_id"])
+                    except (KeyError, TypeError, ValueError) as e:
+                        print(f"Некорректное событие сообщества: {e!r}")
+                        continue
+
+                    await event_slots.acquire()
+                    task = asyncio.create_task(
+                        self._handle_event(
+                            user_id,
+                            message.get("text", ""),
+                            # payload есть только у сообщений,
+                            # отправленных нажатием кнопки
+                            message.get("payload"),
+                        )
+                    )
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    task.add_done_callback(lambda _: event_slots.release())
+            finally:
+                if tasks:
+                    await asyncio.gather(*tasks, return_exceptions=True)
+
+                # Ответы на уже обработанные сообщения отправляются
+                # до закрытия HTTP-сессии
+                while self._send_tasks:
+                    await asyncio.gather(
+                        *self._send_tasks.values(), return_exceptions=True
+                    )
+
+                await asyncio.to_thread(self._stop_background_jobs)
+
+    def send_message(
+            self,
+            user_id: int,
+            msg: str,
+            btns: dict[str, list[tuple[str, ...]] | bool] | None = None,
+            attachment: str = None,
+    ) -> None:
+        """Метод для отправки сообщения пользователю.
+
+        Может вызываться из любого потока. Сообщение передается в цикл
+        событий, и метод не ждет ответа VK. Сообщения одному
+        пользователю отправляются в порядке вызова метода.
+
+        Args:
+            user_id (int): ID пользователя.
+            msg (str): Текст сообщения.
+            btns (dict[str, list[tuple[str, ...]] | bool] | None, optional):
+                Кнопки необходимые для отображения с сообщением.
+                По умолчанию None.
+            attachment (str, optional): Вложения (фото). По умолчанию None.
+        """
+        self._loop.call_soon_threadsafe(
+            self._queue_send,
+            user_id,
+            self._message_params(user_id, msg, btns, attachment)
+        )
+
+    def send_match_info(
+            self,
+            vk_user_id: int,
+            match: list,
+            btns: dict[str, list[tuple[str, ...]] | bool] | None = None,
+            attachment: str = None
+    ) -> None:
+        """Метод для отправки карточки мэтча пользователю.
+
+        При отложенной загрузке фотографий они загружаются в цикле
+        событий, и карточка отправляется после загрузки. Метод не ждет
+        ни загрузки фотографий, ни ответа VK.
+
+        Args:
+            vk_user_id (int): ID пользователя.
+            match (list): Данные мэтча в формате
+                UserDBManager.get_next_matches.
+            btns (dict[str, list[tuple[str, ...]] | bool] | None, optional):
+                Кнопки необходимые для отображения с сообщением.
+                По умолчанию None.
+            attachment (str, optional): Вложения (фото). По умолчанию None.
+        """
+        user_info_text, _ = self._get_match_card(match)
+
+        self._loop.call_soon_threadsafe(
+            self._queue_send,
+            vk_user_id,
+            self._message_params(vk_user_id, user_info_text, btns, attachment),
+            match
+        )
+
+    def _message_params(
+            self,
+            user_id: int,
+            msg: str,
+            btns: dict[str, list[tuple[str, ...]] | bool] | None,
+            attachment: str | None
+    ) -> dict[str, Any]:
+        """Метод для получения параметров метода messages.send.
+
+        Args:
+            user_id (int): ID пользователя.
+            msg (str): Текст сообщения.
+            btns (dict[str, list[tuple[str, ...]] | bool] | None): Кнопки
+                необходимые для отображения с сообщением.
+            attachment (str | None): Вложения (фото).
+
+        Returns:
+            dict[str, Any]: Параметры запроса.
+        """
+        return {
+            "user_id": user_id,
+            "message": msg,
+            "keyboard": self.keyboard.create_markup(btns),
+            "attachment": attachment,
+            "random_id": get_random_id()
+        }
+
+    def _queue_send(
+            self,
+            user_id: int,
+            params: dict[str, Any],
+            match: list | None = None
+    ) -> None:
+        """Метод для постановки сообщения в очередь отправки пользователю.
+
+        Выполняется в цикле событий.
+
+        Args:
+            user_id (int): ID пользователя.
+            params (dict[str, Any]): Параметры метода messages.send.
+            match (list | None, optional): Мэтч, карточка которого
+                отправляется. Его фотографии добавляются во вложения.
+                По умолчанию None.
+        """
+        photos = None
+
+        if match is not None and self.lazy_photos:
+            # Фотографии загружаются, пока отправляются предыдущие
+            # сообщения пользователю
+            photos = asyncio.ensure_future(
+                self.photo_prefetcher.ensure_photos(match)
+            )
+
+        task = asyncio.create_task(
+            self._send_after(
+                self._send_tasks.get(user_id), params, match, photos
+            )
+        )
+        self._send_tasks[user_id] = task
+        task.add_done_callback(partial(self._forget_send, user_id))
+
+    def _forget_send(self, user_id: int, task: asyncio.Task) -> None:
+        """Метод для удаления завершенной задачи отправки пользователю.
+
+        Задача удаляется, только если после нее сообщений пользователю
+        не ставилось, поэтому количество задач в памяти не растет с
+        числом пользователей.
+
+        Args:
+            user_id (int): ID пользователя.
+            task (asyncio.Task): Завершенная задача отправки.
+        """
+        if self._send_tasks.get(user_id) is task:
+            del self._send_tasks[user_id]
+
+    async def _send_after(
+            self,
+            previous: asyncio.Task | None,
+            params: dict[str, Any],
+            match: list | None = None,
+            photos: asyncio.Future | None = None
+    ) -> None:
+        """Метод для отправки сообщения после предыдущего сообщения.
+
+        Args:
+            previous (asyncio.Task | None): Задача отправки предыдущего
+                сообщения пользователю или None.
+            params (dict[str, Any]): Параметры метода messages.send.
+            match (list | None, optional): Мэтч, карточка которого
+                отправляется. По умолчанию None.
+            photos (asyncio.Future | None, optional): Загрузка фотографий
+                мэтча. По умолчанию None.
+        """
+        if previous is not None:
+            await asyncio.wait((previous,))
+
+        try:
+            if photos is not None:
+                await photos
+
+            if match is not None:
+                _, photos_attachment = self._get_match_card(match)
+                params["attachment"] = (
+                    photos_attachment or params["attachment"]
+                )
+
+            await self.group_api.call("messages.send", params, post=True)
+        except REQUEST_ERRORS as e:
+            print(
+                f"Ошибка при отправке сообщения пользователю "
+                f"{params['user_id']}: {e}"
+            )
+
+    def _register_user(self, user_session: UserSession) -> None:
+        """Метод для получения профиля пользователя и запуска поиска.
+
+        Вызывается обработчиком команды в пуле потоков. Профиль
+        запрашивается в цикле событий, и обработка события завершается
+        после сохранения пользователя.
+
+        Args:
+            user_session (UserSession): Сессия пользователя.
+        """
+        self._defer(
+            user_session.user_id, self._register_user_async(user_session)
+        )
+
+    async def _register_user_async(self, user_session: UserSession) -> None:
+        """Метод для получения профиля пользователя в цикле событий.
+
+        Args:
+            user_session (UserSession): Сессия пользователя.
+        """
+        try:
+            response = await self.user_api.call(
+                "users.get",
+                {
+                    "user_ids": user_session.user_id,
+                    "fields": PROFILE_FIELDS
+                }
+            )
+            data = response["response"]
+        except REQUEST_ERRORS:
+            data = None
+
+        await asyncio.to_thread(
+            call_in_session_scope, self._start_search, user_session, data
+        )
+
+    def _defer(self, user_id: int, coro: Coroutine) -> None:
+        """Метод для выполнения корутины в цикле событий из обработчика.
+
+        Args:
+            user_id (int): ID пользователя, событие которого
+                обрабатывается.
+            coro (Coroutine): Корутина, которую нужно выполнить.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        self._deferred.setdefault(user_id, []).append(future)
+
+    async def _get_group_id(self) -> int:
+        """Метод для получения ID сообщества по токену сообщества.
+
+        Returns:
+            int: ID сообщества.
+        """
+        response = await self.group_api.call("groups.getById", {})
+        groups = response["response"]
+
+        # В новых версиях API сообщества возвращаются в поле groups
+        if isinstance(groups, dict):
+            groups = groups["groups"]
+
+        return groups[0]["id"]
+
+    @asynccontextmanager
+    async def _user_lock(self, user_id: int) -> AsyncIterator[None]:
+        """Метод для последовательной обработки событий пользователя.
+
+        Блокировка удаляется, когда событий пользователя больше нет,
+        поэтому их количество в памяти не растет с числом пользователей.
+
+        Args:
+            user_id (int): ID пользователя.
+        """
+        entry = self._user_locks.get(user_id)
+
+        if entry is None:
+            entry = self._user_locks[user_id] = [asyncio.Lock(), 0]
+
+        entry[1] += 1
+
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+
+            if not entry[1]:
+                del self._user_locks[user_id]
+
+    async def _handle_event(
+            self, user_id: int, request: str, payload: str | None
+    ) -> None:
+        """Метод для обработки одного сообщения пользователя.
+
+        Args:
+            user_id (int): ID пользователя.
+            request (str): Текст сообщения.
+            payload (str | None): Payload нажатой кнопки.
+        """
+        try:
+            async with self._user_lock(user_id):
+                try:
+                    await asyncio.to_thread(
+                        self._handle_user_request, user_id, request, payload
+                    )
+                finally:
+                    # Следующее событие пользователя обрабатывается после
+                    # запросов, переданных обработчиком в цикл событий
+                    for future in self._deferred.pop(user_id, ()):
+                        await asyncio.wrap_future(future)
+        except Exception as e:
+            print(f"Ошибка при обработке события: {e}")
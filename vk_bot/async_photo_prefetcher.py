@@ -0,0 +1,185 @@
+"""Модуль для отложенной загрузки фотографий анкет в цикле событий.
+
+Модуль содержит класс AsyncPhotoPrefetcher для асинхронной среды
+выполнения. Фотографии запрашиваются у VK API в цикле событий через
+aiohttp, поэтому ожидание ответа не занимает поток. В пуле потоков
+выполняется только работа с базой данных: чтение кэша фотографий и
+сохранение результата.
+"""
+import asyncio
+from itertools import islice
+from typing import Iterable
+
+from database.base import call_in_session_scope
+from database.db_funcs import UserDBManager
+from settings import BOT_SETTINGS
+from vk_bot.async_api_client import AsyncVKExecuteBatcher
+from vk_bot.photo_prefetcher import store_match_photos
+from vk_bot.searcher import UserSearcher
+
+
+class AsyncPhotoPrefetcher:
+    """Класс для загрузки фотографий анкет в цикле событий."""
+    def __init__(
+            self,
+            searcher: UserSearcher,
+            user_db: UserDBManager,
+            batcher: AsyncVKExecuteBatcher,
+            loop: asyncio.AbstractEventLoop,
+            prefetch_size: int = BOT_SETTINGS["photo_prefetch_size"]
+    ) -> None:
+        """Инициализирует объект для загрузки фотографий анкет.
+
+        Args:
+            searcher (UserSearcher): Объект для поиска пользователей, через
+                который читается и пополняется кэш фотографий.
+            user_db (UserDBManager): Объект для работы с пользователями в
+                базе данных.
+            batcher (AsyncVKExecuteBatcher): Объект для пакетного
+                выполнения запросов photos.get.
+            loop (asyncio.AbstractEventLoop): Цикл событий, в котором
+                загружаются фотографии.
+            prefetch_size (int): Количество следующих анкет, фотографии
+                которых загружаются заранее. По умолчанию берется из
+                настроек.
+        """
+        self.searcher = searcher
+        self.user_db = user_db
+        self.batcher = batcher
+        self.prefetch_size = prefetch_size
+        self._loop = loop
+        # Выполняется только в цикле событий, поэтому блокировка не нужна
+        self._pending: dict[int, asyncio.Task] = {}
+
+    async def ensure_photos(self, match: list) -> None:
+        """Дожидается загрузки фотографий мэтча.
+
+        Если фотографии уже загружаются, метод ждет завершения
+        загрузки, иначе запускает ее.
+
+        Args:
+            match (list): Данные мэтча в формате
+                UserDBManager.get_next_matches. Список фотографий мэтча
+                заполняется на месте.
+        """
+        if match[3]:
+            return
+
+        task = self._pending.get(match[4]) or self._start([match])
+
+        if task is not None:
+            await asyncio.shield(task)
+
+    def prefetch(self, matches: Iterable[list]) -> None:
+        """Запускает загрузку фотографий следующих анкет.
+
+        Может вызываться из любого потока. Загружаются фотографии первых
+        prefetch_size мэтчей, у которых их еще нет.
+
+        Args:
+            matches (Iterable[list]): Следующие мэтчи пользователя в
+                порядке просмотра.
+        """
+        to_load = [
+            match for match in islice(matches, self.prefetch_size)
+            if not match[3]
+        ]
+
+        if to_load:
+            self._loop.call_soon_threadsafe(self._start, to_load)
+
+    def stop(self) -> None:
+        """Дожидается завершения загрузок.
+
+        Вызывается из потока, отличного от потока цикла событий.
+        """
+        asyncio.run_coroutine_threadsafe(self.wait(), self._loop).result()
+
+    async def wait(self) -> None:
+        """Дожидается завершения всех запущенных загрузок."""
+        while self._pending:
+            await asyncio.gather(
+                *set(self._pending.values()), return_exceptions=True
+            )
+
+    def _start(self, matches: list[list]) -> asyncio.Task | None:
+        """Запускает загрузку фотографий мэтчей, которые еще не загружаются.
+
+        Args:
+            matches (list[list]): Мэтчи, фотографии которых нужно
+                загрузить.
+
+        Returns:
+            asyncio.Task | None: Задача загрузки или None, если все
+                мэтчи уже загружаются.
+        """
+        to_load = [match for match in matches if match[4] not in self._pending]
+
+        if not to_load:
+            return None
+
+        task = self._loop.create_task(self._load(to_load))
+
+        for match in to_load:
+            self._pending[match[4]] = task
+
+        return task
+
+    async def _load(self, matches: list[list]) -> None:
+        """Загружает фотографии мэтчей и сохраняет их в базу данных.
+
+        Args:
+            matches (list[list]): Мэтчи, фотографии которых нужно
+                загрузить.
+        """
+        try:
+            user_ids = [match[2] for match in matches]
+            cached_photos = await asyncio.to_thread(
+                call_in_session_scope,
+                self.searcher.photo_cache.get_fresh_photos,
+                user_ids
+            )
+            missing_ids = [
+                user_id for user_id in user_ids
+                if user_id not in cached_photos
+            ]
+            user_info = self.searcher.user_info
+            responses = await self.batcher.call_many(
+                "photos.get", user_info.photos_params(missing_ids)
+            )
+            await asyncio.to_thread(
+                call_in_session_scope,
+                self._store,
+                matches,
+                cached_photos,
+                missing_ids,
+                user_info.parse_users_photos(responses)
+            )
+        except Exception as e:
+            print(f"Ошибка при загрузке фотографий анкет: {e}")
+        finally:
+            for match in matches:
+                self._pending.pop(match[4], None)
+
+    def _store(
+            self,
+            matches: list[list],
+            cached_photos: dict[int, tuple[list[str], int | None]],
+            missing_ids: list[int],
+            users_photos: list[tuple[list[str], int | None] | None]
+    ) -> None:
+        """Сохраняет полученные фотографии в кэш и в мэтчи.
+
+        Args:
+            matches (list[list]): Мэтчи, фотографии которых загружались.
+            cached_photos (dict[int, tuple[list[str], int | None]]):
+                Фотографии из кэша.
+            missing_ids (list[int]): ID пользователей, фотографии которых
+                запрашивались у VK API.
+            users_photos (list[tuple[list[str], int | None] | None]):
+                Фотографии, полученные у VK API, для missing_ids.
+        """
+        photos = self.searcher.merge_photos(
+            cached_photos, missing_ids, users_photos
+        )
+        store_match_photos(self.user_db, matches, photos)
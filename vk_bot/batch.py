@@ -0,0 +1,159 @@
+"""Модуль для пакетного выполнения запросов к VK API.
+
+Модуль содержит класс VKExecuteBatcher, который объединяет однотипные
+вызовы методов VK API в скрипты метода execute. Один запрос execute
+выполняет до 25 вызовов API.
+"""
+import json
+
+import requests
+
+from settings import VK_API_SETTINGS
+from vk_bot.api_client import VKApiClient, VKApiError
+
+#: Коды ошибок вызова, означающие, что данные пользователя закрыты или
+#: удалены: доступ запрещен, страница удалена, профиль закрыт, альбом
+#: закрыт. Повторный вызов вернет ту же ошибку.
+ACCESS_ERROR_CODES = (15, 18, 30, 200)
+
+
+class VKExecuteBatcher:
+    """Класс для пакетного выполнения запросов через метод execute."""
+    #: Максимальное количество вызовов API в одном запросе execute.
+    MAX_CALLS = 25
+
+    def __init__(
+            self,
+            api_client: VKApiClient,
+            batch_size: int = VK_API_SETTINGS["execute_batch_size"]
+    ) -> None:
+        """Инициализирует объект класса VKExecuteBatcher.
+
+        Args:
+            api_client (VKApiClient): Клиент VK API, через который
+                выполняются запросы execute.
+            batch_size (int): Количество вызовов в одном запросе execute.
+                Не может превышать 25. По умолчанию берется из настроек.
+        """
+        self.api_client = api_client
+        self.batch_size = min(max(1, batch_size), self.MAX_CALLS)
+
+    def call_many(
+            self, method: str, params_list: list[dict]
+    ) -> list[dict | list | bool | None]:
+        """Выполняет несколько вызовов одного метода API пакетами.
+
+        Вызовы группируются по batch_size штук в запросы execute, а
+        результаты возвращаются в порядке переданных параметров.
+
+        Args:
+            method (str): Название метода API, например "photos.get".
+            params_list (list[dict]): Список параметров для каждого вызова.
+
+        Returns:
+            list[dict | list | bool | None]: Результаты вызовов. Для
+                вызовов, завершившихся ошибкой доступа из
+                ACCESS_ERROR_CODES, в списке стоит False, для остальных
+                ошибок — None.
+        """
+        results = []
+
+        for i in range(0, len(params_list), self.batch_size):
+            results.extend(
+                self._execute_batch(
+                    method, params_list[i:i + self.batch_size]
+                )
+            )
+
+        return results
+
+    def _execute_batch(
+            self, method: str, params_list: list[dict]
+    ) -> list[dict | list | bool | None]:
+        """Выполняет один запрос execute.
+
+        Args:
+            method (str): Название метода API.
+            params_list (list[dict]): Параметры вызовов, не более 25.
+
+        Returns:
+            list[dict | list | bool | None]: Результаты вызовов. Для
+                вызовов, завершившихся ошибкой доступа, в списке стоит
+                False, для остальных ошибок — None.
+        """
+        empty_results = [None] * len(params_list)
+
+        try:
+            data = self.api_client.call(
+                "execute",
+                {"code": self._build_script(method, params_list)},
+                post=True
+            )
+        except VKApiError as e:
+            print(f"Ошибка при выполнении execute ({method}): {e}")
+            return empty_results
+        except requests.exceptions.RequestException:
+            return empty_results
+
+        return self._parse_results(data, len(params_list))
+
+    def _parse_results(
+            self, data: dict, count: int
+    ) -> list[dict | list | bool | None]:
+        """Разбирает ответ execute на результаты отдельных вызовов.
+
+        Args:
+            data (dict): Ответ VK API на запрос execute.
+            count (int): Количество вызовов в запросе.
+
+        Returns:
+            list[dict | list | bool | None]: Результаты вызовов в формате
+                _execute_batch.
+        """
+        errors = data.get("execute_errors", [])
+        self._report_execute_errors(errors)
+        items = data.get("response") or []
+        # Вызовы, завершившиеся ошибкой, VK возвращает как false, не
+        # указывая, какая ошибка относится к какому вызову. Поэтому false
+        # остается в результатах, только если все ошибки пакета — ошибки
+        # доступа
+        denied = all(
+            error.get("error_code") in ACCESS_ERROR_CODES for error in errors
+        )
+
+        return [
+            items[i]
+            if i < len(items) and (items[i] is not False or denied)
+            else None
+            for i in range(count)
+        ]
+
+    @staticmethod
+    def _build_script(method: str, params_list: list[dict]) -> str:
+        """Формирует код VKScript для метода execute.
+
+        Args:
+            method (str): Название метода API.
+            params_list (list[dict]): Параметры вызовов.
+
+        Returns:
+            str: Код VKScript, возвращающий массив результатов вызовов.
+        """
+        calls = ",".join(
+            f"API.{method}({json.dumps(params, ensure_ascii=False)})"
+            for params in params_list
+        )
+        return f"return [{calls}];"
+
+    @staticmethod
+    def _report_execute_errors(errors: list[dict]) -> None:
+        """Выводит ошибки отдельных вызовов внутри execute.
+
+        Args:
+            errors (list[dict]): Список ошибок из поля execute_errors.
+        """
+        for error in errors:
+            print(
+                f"Ошибка вызова {error.get('method')} в execute: "
+                f"{error.get('error_code')} {error.get('error_msg')}"
+            )
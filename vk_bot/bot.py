@@ -5,24 +5,36 @@
 модули, необходимые для работы таких функций, как поиск пользователей,
 черный список, список избранных и база данных."""
 import re
+from typing import Iterable
 
 import vk_api
 from vk_api.longpoll import VkEventType, VkLongPoll
 
+from database.base import POOL_STATS, session_scope
 from database.db_funcs import (
     BlackListDBManager, FavoritesDBManager, UserDBManager
 )
-from settings import COMMANDS, KEYBOARDS, MESSAGES
+from settings import (
+    BOT_SETTINGS, DB_SETTINGS, KEYBOARDS, MESSAGES, VK_API_SETTINGS
+)
 from vk_bot import UserInfoRetriever
+from vk_bot.api_client import VKApiClient
+from vk_bot.dispatcher import EventDispatcher
+from vk_bot.jobs import SearchJobRunner
 from vk_bot.keyboard import VKKeyboard
+from vk_bot.outbox import MessageOutbox
+from vk_bot.photo_prefetcher import PhotoPrefetcher
+from vk_bot.rate_limiter import get_scheduler
+from vk_bot.router import CommandRouter
 from vk_bot.searcher import UserSearcher
+from vk_bot.user_session import UserSession, UserSessionStore
 
 VK_URL_PATTERN = r"https://vk\.com/id(\d+)"
 
 
 class VKBot:
     """Класс для работы с ботом."""
-    def __init__(self, group_token: str, vk_token: str, db_session) -> None:
+    def __init__(self, group_token: str, vk_token: str) -> None:
         """Инициализация бота.
 
         Инициализация всех необходимых зависимых модулей.
@@ -30,285 +42,493 @@ class VKBot:
         Args:
             group_token (str): Токен для доступа к группе Vk.
             vk_token (str): Токен для доступа к VK API.
-            db_session: Сессия базы данных.
         """
-        self.user_id = None
         self.group_token = group_token
         self.vk_token = vk_token
         self.vk_api_version = 5.199
-        self.session = db_session
-        self.vk = vk_api.VkApi(token=self.group_token)
-        self.longpoll = VkLongPoll(self.vk)
         self.user_db = UserDBManager()
         self.favorites_db = FavoritesDBManager()
         self.black_list_db = BlackListDBManager()
+        # Общий клиент VK API с пулом соединений для всех REST-запросов
+        self.api_client = VKApiClient(self.vk_token, self.vk_api_version)
         self.received_profile_info = UserInfoRetriever(
-            self.vk_token, self.vk_api_version
+            self.vk_token, self.vk_api_version, self.api_client
         )
         self.keyboard = VKKeyboard()
         # Инициализация поискового объекта
-        self.searcher = UserSearcher(self.vk_token, self.vk_api_version)
-        # Инициализация счетчика актуального мэтча
-        self.match_info_count = 0
-        # Для хранения полученного актуального списка мэтчей.
-        # Нужен для работы со списком избранных и черным списком.
-        self.current_match_list = None
-        # Для хранения состояний выбранного действия в меню.
-        # Ключ - id пользователя, значение - состояние в меню
-        self.USER_STATE = {}
+        self.searcher = UserSearcher(
+            self.vk_token, self.vk_api_version, api_client=self.api_client
+        )
+        # Поиск мэтчей выполняется в фоне, а мэтчи записываются в базу
+        # данных пакетами по мере получения фотографий
+        self.search_jobs = SearchJobRunner(self.searcher, self.user_db)
+        # При отложенной загрузке фотографии анкет загружаются только при
+        # просмотре, а фотографии следующих анкет — заранее в фоне
+        self.lazy_photos = BOT_SETTINGS["lazy_photos"]
+        # Для хранения состояния диалога каждого пользователя:
+        # счетчика мэтчей, списка мэтчей и выбранного действия в меню
+        self.user_sessions = UserSessionStore()
+        # Получение событий, отправка сообщений и загрузка фотографий
+        # зависят от среды выполнения
+        self._setup_runtime()
+        # Таблица обработчиков команд строится один раз при запуске
+        self.router = self._build_router()
+
+    def _setup_runtime(self) -> None:
+        """Метод для создания объектов синхронной среды выполнения.
+
+        Создает подключение к Long Poll API, очередь отправки сообщений,
+        фоновую загрузку фотографий и диспетчер событий.
+        """
+        self.vk = vk_api.VkApi(token=self.group_token)
+        # Сообщения отправляются из отдельных потоков в пределах лимита
+        # токена сообщества, а обработчики только ставят их в очередь
+        self.group_api_client = VKApiClient(
+            self.group_token,
+            self.vk_api_version,
+            scheduler=get_scheduler(
+                self.group_token, VK_API_SETTINGS["group_requests_per_second"]
+            )
+        )
+        self.outbox = MessageOutbox(self.group_api_client)
+        # Подключение к серверу Long Poll выполняется при запуске бота
+        self.longpoll: VkLongPoll | None = None
+        self.photo_prefetcher = PhotoPrefetcher(self.searcher, self.user_db)
+        # Диспетчер для параллельной обработки событий пользователей
+        self.dispatcher = EventDispatcher(self._handle_user_request)
 
     def send_message(
             self,
             user_id: int,
             msg: str,
-            btns: dict[str, list[tuple[str, str]] | bool] | None = None,
+            btns: dict[str, list[tuple[str, ...]] | bool] | None = None,
             attachment: str = None,
     ) -> None:
         """Метод для отправки сообщения пользователю.
 
-        Поддерживает отправку с кнопками и вложениями.
+        Поддерживает отправку с кнопками и вложениями. Сообщение ставится
+        в очередь отправки, и метод не ждет ответа VK. Сообщения одному
+        пользователю отправляются в порядке вызова метода.
 
         Args:
             user_id (int): ID пользователя.
             msg (str): Текст сообщения.
-            btns (dict[str, list[tuple[str, str]] | bool] | None, optional):
+            btns (dict[str, list[tuple[str, ...]] | bool] | None, optional):
                 Кнопки необходимые для отображения с сообщением.
                 По умолчанию None.
             attachment (str, optional): Вложения (фото). По умолчанию None.
         """
         keyboard_json: str | None = self.keyboard.create_markup(btns)
 
-        self.vk.method(
-            "messages.send",
-            {
-                "user_id": user_id,
-                "message": msg,
-                "keyboard": keyboard_json,
-                "attachment": attachment,
-                "random_id": 0
-            }
-        )
+        self.outbox.send(user_id, msg, keyboard_json, attachment)
 
     def send_match_info(
             self,
             vk_user_id: int,
-            count: int = 0,
-            btns: dict[str, list[tuple[str, str]] | bool] | None = None,
+            match: list,
+            btns: dict[str, list[tuple[str, ...]] | bool] | None = None,
             attachment: str = None
-    ) -> list:
-        """Метод для отправки актуального списка мэтчей пользователю.
+    ) -> None:
+        """Метод для отправки карточки мэтча пользователю.
+
+        При отложенной загрузке фотографий метод сначала дожидается
+        загрузки фотографий мэтча.
 
         Args:
             vk_user_id (int): ID пользователя.
-            count (int, optional): Счетчик актуального списка мэтчей.
-                По умолчанию 0.
-            btns (dict[str, list[tuple[str, str]] | bool] | None, optional):
+            match (list): Данные мэтча в формате
+                UserDBManager.get_next_matches.
+            btns (dict[str, list[tuple[str, ...]] | bool] | None, optional):
                 Кнопки необходимые для отображения с сообщением.
                 По умолчанию None.
             attachment (str, optional): Вложения (фото). По умолчанию None.
+        """
+        if self.lazy_photos:
+            self.photo_prefetcher.ensure_photos(match)
+
+        user_info_text, photos_attachment = self._get_match_card(match)
+
+        self.send_message(
+            vk_user_id,
+            user_info_text,
+            btns,
+            photos_attachment or attachment
+        )
+
+    @staticmethod
+    def _get_match_card(match: list) -> tuple[str, str | None]:
+        """Метод для получения текста и вложений карточки мэтча.
+
+        Args:
+            match (list): Данные мэтча в формате
+                UserDBManager.get_next_matches.
 
         Returns:
-            list: Актуальный список мэтчей.
+            tuple[str, str | None]: Текст карточки с именем и ссылкой на
+                профиль и вложения с фотографиями мэтча. Если фотографий
+                нет, вместо вложений возвращается None.
         """
-        match_info = self.user_db.match_data_layout(vk_user_id)
+        user_name_lastname = match[0]
+        user_profile_url = match[1]
+        user_photos = match[3]
 
-        if 0 <= count < len(match_info):
-            user_name_lastname = match_info[count][0]
-            user_profile_url = match_info[count][1]
-            user_photos = match_info[count][3]
+        user_info_text = f'{user_name_lastname}\n{user_profile_url}'
 
-            user_info_text = f'{user_name_lastname}\n{user_profile_url}'
+        if user_photos:
+            return user_info_text, ','.join(user_photos)
 
-            if user_photos:
-                attachment = ','.join(user_photos)
+        return user_info_text, None
 
-            self.send_message(
-                vk_user_id,
-                user_info_text,
-                btns,
-                attachment
+    def get_next_match(self, user_session: UserSession) -> list | None:
+        """Метод для получения следующего мэтча пользователя.
+
+        Мэтчи загружаются из базы данных небольшими окнами по ключу
+        последнего загруженного мэтча, поэтому в памяти хранится только
+        окно, а не весь список мэтчей пользователя. При отложенной
+        загрузке фотографий окно пополняется заранее, чтобы в нем всегда
+        были анкеты для фоновой загрузки фотографий.
+
+        Args:
+            user_session (UserSession): Сессия пользователя.
+
+        Returns:
+            list: Данные следующего мэтча.
+            None: Если мэтчей больше нет.
+        """
+        refill_threshold = (
+            BOT_SETTINGS["photo_prefetch_size"] if self.lazy_photos else 0
+        )
+
+        if len(user_session.match_window) <= refill_threshold:
+            matches = self.user_db.get_next_matches(
+                user_session.user_id,
+                (user_session.last_match_rank, user_session.last_match_id),
+                BOT_SETTINGS["match_window_size"]
             )
-        elif count == len(match_info):
-            self.send_message(vk_user_id, MESSAGES["no_more_matches"])
 
-        return match_info
+            if matches:
+                user_session.match_window.extend(matches)
+                user_session.last_match_rank = matches[-1][5]
+                user_session.last_match_id = matches[-1][4]
+
+        if not user_session.match_window:
+            return None
+
+        return user_session.match_window.popleft()
 
     def start(self) -> None:
         """Метод для запуска бота и прослушивания событий."""
-        for event in self.longpoll.listen():
-            if event.type == VkEventType.MESSAGE_NEW and event.to_me:
-                request = event.text.strip().lower()
-                self.user_id = event.user_id
-                self._handle_user_request(request)
+        self.longpoll = VkLongPoll(self.vk)
+        self.handle_events(
+            # payload есть только у сообщений, отправленных нажатием кнопки
+            (event.user_id, event.text, getattr(event, "payload", None))
+            for event in self.longpoll.listen()
+            if event.type == VkEventType.MESSAGE_NEW and event.to_me
+        )
+
+    def handle_events(
+            self, events: Iterable[tuple[int, str, str | None]]
+    ) -> None:
+        """Метод для обработки потока сообщений пользователей.
+
+        Сообщения передаются в диспетчер событий: запросы разных
+        пользователей обрабатываются параллельно, а запросы одного
+        пользователя — по порядку. После окончания потока метод
+        дожидается обработки всех сообщений, отправки ответов и фоновых
+        задач.
+
+        Args:
+            events (Iterable[tuple[int, str, str | None]]): Сообщения в
+                виде ID пользователя, текста и payload нажатой кнопки.
+        """
+        self.outbox.start()
+        self.dispatcher.start()
+        POOL_STATS.start_reporting(DB_SETTINGS["pool_stats_interval"])
+
+        try:
+            for event in events:
+                self.dispatcher.dispatch(*event)
+        finally:
+            self.dispatcher.stop()
+            # Ответы на уже обработанные сообщения отправляются до выхода
+            self.outbox.stop()
+            print(f"Статистика отправки сообщений: {self.outbox.stats()}")
+            self._stop_background_jobs()
+
+    def _stop_background_jobs(self) -> None:
+        """Метод для остановки фоновых поисков и загрузки фотографий.
+
+        Дожидается завершения уже запущенных задач, останавливает
+        периодический вывод статистики пула соединений с базой данных и
+        выводит ее итоговые значения.
+        """
+        self.search_jobs.stop()
+        self.photo_prefetcher.stop()
+        POOL_STATS.stop_reporting()
+        print(f"Статистика пула соединений: {POOL_STATS.snapshot()}")
 
-    def _handle_user_request(self, request: str) -> None:
+    def _build_router(self) -> CommandRouter:
+        """Метод для построения таблицы обработчиков команд.
+
+        Returns:
+            CommandRouter: Маршрутизатор команд бота.
+        """
+        router = CommandRouter(self._handle_unknown_command)
+        router.add_command("start", self._handle_start_command)
+        router.add_command("help", self._handle_help_command)
+        router.add_command("hello", self._handle_hello_command)
+        router.add_command("goodbye", self._handle_goodbye_command)
+        router.add_command("next", self._handle_next_command)
+        router.add_command("show", self._handle_next_command)
+        router.add_command(
+            "add_to_favorites", self._handle_add_to_favorites_command
+        )
+        router.add_command(
+            "show_favorites", self._handle_show_favorites_command
+        )
+        router.add_command(
+            "add_to_black_list", self._handle_add_to_black_list_command
+        )
+        router.add_command(
+            "show_black_list", self._handle_show_black_list_command
+        )
+        router.add_command(
+            "del_from_black_list",
+            self._handle_delete_from_black_list_command
+        )
+        router.add_command(
+            "del_from_favorites",
+            self._handle_delete_from_favorites_command
+        )
+        router.add_pattern(VK_URL_PATTERN, self._handle_url_request)
+        return router
+
+    def _handle_user_request(
+            self, user_id: int, request: str, payload: str | None = None
+    ) -> None:
         """Метод для обработки запроса пользователя.
 
-        Пользователь отправляет сообщение боту. Это сообщение обрабатывается
-        по указанным командам и вызывает соответствующие методы.
-        При несуществующей команде бот отправляет сообщение об ошибке.
+        Пользователь отправляет сообщение боту. Обработчик сообщения
+        выбирается маршрутизатором команд по payload нажатой кнопки или
+        по тексту сообщения. При несуществующей команде бот отправляет
+        сообщение об ошибке.
 
         Args:
+            user_id (int): ID пользователя.
             request (str): Запрос пользователя.
+            payload (str | None, optional): Payload нажатой кнопки.
+                По умолчанию None.
+        """
+        user_session = self.user_sessions.get(user_id)
+
+        # Все менеджеры базы данных используют одну сессию на событие,
+        # которая закрывается после его обработки
+        with session_scope():
+            self.router.dispatch(user_session, request, payload)
+
+    def _handle_start_command(self, user_session: UserSession) -> None:
+        """Метод для обработки команды start.
+
+        Поиск мэтчей запускается в фоне, и обработчик не ждет его
+        завершения. Если предыдущий поиск пользователя еще идет, новый
+        не запускается.
         """
-        if request in COMMANDS["start"]:
-            self._handle_start_command()
-        elif request in COMMANDS["help"]:
-            self._handle_help_command()
-        elif request in COMMANDS["hello"]:
-            self._handle_hello_command()
-        elif request in COMMANDS["goodbye"]:
-            self._handle_goodbye_command()
-        elif request in COMMANDS["next"] or request in COMMANDS["show"]:
-            self._handle_next_command()
-        elif request in COMMANDS["add_to_favorites"]:
-            self._handle_add_to_favorites_command()
-        elif request in COMMANDS["show_favorites"]:
-            self._handle_show_favorites_command()
-        elif request in COMMANDS["add_to_black_list"]:
-            self._handle_add_to_black_list_command()
-        elif request in COMMANDS["show_black_list"]:
-            self._handle_show_black_list_command()
-        elif request in COMMANDS["del_from_black_list"]:
-            self._handle_delete_from_black_list_command()
-        elif request in COMMANDS["del_from_favorites"]:
-            self._handle_delete_from_favorites_command()
-        elif re.match(VK_URL_PATTERN, request):
-            self._handle_url_request(request)
-        else:
-            self._handle_unknown_command()
-
-    def _handle_start_command(self) -> None:
-        """Метод для обработки команды start."""
         self.send_message(
-            self.user_id,
+            user_session.user_id,
             MESSAGES["start"],
             KEYBOARDS["start"]
         )
+        self._register_user(user_session)
+
+    def _register_user(self, user_session: UserSession) -> None:
+        """Метод для получения профиля пользователя и запуска поиска.
+
+        Args:
+            user_session (UserSession): Сессия пользователя.
+        """
         #: Получаю информацию о пользователе,
         #: который взаимодействует с ботом
-        data = self.received_profile_info.get_profile_info(self.user_id)
+        data = self.received_profile_info.get_profile_info(
+            user_session.user_id
+        )
+        self._start_search(user_session, data)
+
+    def _start_search(
+            self,
+            user_session: UserSession,
+            data: dict[str, str | int] | None
+    ) -> None:
+        """Метод для сохранения пользователя и запуска поиска мэтчей.
+
+        Args:
+            user_session (UserSession): Сессия пользователя.
+            data (dict[str, str | int] | None): Информация о профиле
+                пользователя или None, если ее получить не удалось.
+        """
         #: Загружаю данные пользователя в БД
         self.user_db.add_bot_user_to_db(data)
-        # Делаю поиск подходящих пользователей для мэтчей.
-        match = self.searcher.search_users(self.user_id)
-        #: Загружаю данные найденных подходящих пользователей в БД
-        self.user_db.add_match_user_to_db(match, self.user_id)
+        # Начинаю просмотр мэтчей с начала списка
+        user_session.reset_matches()
+
+        if (user_session.search_job is None
+                or not user_session.search_job.in_progress):
+            # Запускаю поиск подходящих пользователей для мэтчей.
+            # Найденные пользователи загружаются в БД пакетами
+            user_session.search_job = self.search_jobs.submit(
+                user_session.user_id
+            )
 
-    def _handle_help_command(self) -> None:
+    def _handle_help_command(self, user_session: UserSession) -> None:
         """Метод для обработки команды help."""
-        self.send_message(self.user_id, MESSAGES["help_1"])
-        self.send_message(self.user_id, MESSAGES["help_2"])
-        self.send_message(self.user_id, MESSAGES["help_3"])
-        self.send_message(self.user_id, MESSAGES["help_4"], KEYBOARDS["help"])
+        user_id = user_session.user_id
+        self.send_message(user_id, MESSAGES["help_1"])
+        self.send_message(user_id, MESSAGES["help_2"])
+        self.send_message(user_id, MESSAGES["help_3"])
+        self.send_message(user_id, MESSAGES["help_4"], KEYBOARDS["help"])
 
-    def _handle_hello_command(self) -> None:
+    def _handle_hello_command(self, user_session: UserSession) -> None:
         """Метод для обработки команды hello."""
         self.send_message(
-            self.user_id,
+            user_session.user_id,
             MESSAGES["hello"]
         )
 
-    def _handle_goodbye_command(self) -> None:
+    def _handle_goodbye_command(self, user_session: UserSession) -> None:
         """Метод для обработки команды goodbye."""
-        self.send_message(self.user_id, MESSAGES["goodbye"])
+        self.send_message(user_session.user_id, MESSAGES["goodbye"])
 
-    def _handle_next_command(self) -> None:
+    def _handle_next_command(self, user_session: UserSession) -> None:
         """Метод для обработки команды next."""
-        self.current_match_list = self.send_match_info(
-            self.user_id,
-            self.match_info_count,
+        user_session.current_match = self.get_next_match(user_session)
+
+        if user_session.current_match is None:
+            search_job = user_session.search_job
+            # Пока идет фоновый поиск, новые мэтчи еще могут появиться
+            message = (
+                MESSAGES["search_in_progress"]
+                if search_job is not None and search_job.in_progress
+                else MESSAGES["no_more_matches"]
+            )
+            self.send_message(user_session.user_id, message)
+            return
+
+        self.send_match_info(
+            user_session.user_id,
+            user_session.current_match,
             KEYBOARDS["card"]
         )
-        self.match_info_count += 1  # Увеличиваем счетчик подходящих юзеров
 
-    def _handle_add_to_favorites_command(self) -> None:
+        if self.lazy_photos:
+            self.photo_prefetcher.prefetch(user_session.match_window)
+
+    def _handle_add_to_favorites_command(
+            self, user_session: UserSession
+    ) -> None:
         """Метод для обработки команды add_to_favorites."""
-        self.favorites_db.add_match_to_favorites(
-            self.user_id,
-            self.current_match_list,
-            self.match_info_count - 1
-        )
+        if user_session.current_match is not None:
+            self.favorites_db.add_match_to_favorites(
+                user_session.user_id,
+                user_session.current_match
+            )
+
         self.send_message(
-            self.user_id,
+            user_session.user_id,
             MESSAGES["add_to_favorites"],
             KEYBOARDS["add_to_favorites"]
         )
 
-    def _handle_show_favorites_command(self) -> None:
+    def _handle_show_favorites_command(
+            self, user_session: UserSession
+    ) -> None:
         """Метод для обработки команды show_favorites."""
         self.send_message(
-            self.user_id,
-            self.favorites_db.show_favorites(self.user_id),
+            user_session.user_id,
+            self.favorites_db.show_favorites(user_session.user_id),
             KEYBOARDS["del_from_favorites"]
         )
 
-    def _handle_add_to_black_list_command(self) -> None:
+    def _handle_add_to_black_list_command(
+            self, user_session: UserSession
+    ) -> None:
         """Метод для обработки команды add_to_black_list."""
-        self.black_list_db.add_match_to_black_list(
-            self.user_id,
-            self.current_match_list,
-            self.match_info_count - 1
-        )
+        if user_session.current_match is not None:
+            self.black_list_db.add_match_to_black_list(
+                user_session.user_id,
+                user_session.current_match
+            )
+
         self.send_message(
-            self.user_id,
+            user_session.user_id,
             MESSAGES["add_to_black_list"],
             KEYBOARDS["add_to_black_list"]
         )
 
-    def _handle_show_black_list_command(self) -> None:
+    def _handle_show_black_list_command(
+            self, user_session: UserSession
+    ) -> None:
         """Метод для обработки команды show_black_list."""
         self.send_message(
-            self.user_id,
-            self.black_list_db.show_black_list(self.user_id),
+            user_session.user_id,
+            self.black_list_db.show_black_list(user_session.user_id),
             KEYBOARDS["del_from_black_list"]
         )
 
-    def _handle_delete_from_black_list_command(self) -> None:
+    def _handle_delete_from_black_list_command(
+            self, user_session: UserSession
+    ) -> None:
         """Метод для обработки команды delete_from_black_list."""
         self.send_message(
-            self.user_id,
+            user_session.user_id,
             MESSAGES["del_from_black_list_instruction"],
             KEYBOARDS["next"]
         )
-        self.USER_STATE[self.user_id] = 'delete_blacklist'
+        user_session.state = 'delete_blacklist'
 
-    def _handle_delete_from_favorites_command(self) -> None:
+    def _handle_delete_from_favorites_command(
+            self, user_session: UserSession
+    ) -> None:
         """Метод для обработки команды delete_from_favorites."""
         self.send_message(
-            self.user_id,
+            user_session.user_id,
             MESSAGES["del_from_favorites_instruction"],
             KEYBOARDS["next"]
         )
-        self.USER_STATE[self.user_id] = 'delete_favorites'
+        user_session.state = 'delete_favorites'
+
+    def _handle_url_request(
+            self, user_session: UserSession, match: re.Match
+    ) -> None:
+        """Метод для обработки URL-запроса.
 
-    def _handle_url_request(self, request: str) -> None:
-        """Метод для обработки URL-запроса."""
-        match = re.match(VK_URL_PATTERN, request)
+        Args:
+            user_session (UserSession): Сессия пользователя.
+            match (re.Match): Результат сопоставления запроса пользователя
+                с VK_URL_PATTERN.
+        """
         del_user_id = int(match.group(1))
 
-        if self.USER_STATE.get(self.user_id) == 'delete_blacklist':
+        if user_session.state == 'delete_blacklist':
             self.black_list_db.remove_from_black_list(
-                self.user_id, del_user_id
+                user_session.user_id, del_user_id
             )
             self.send_message(
-                self.user_id,
+                user_session.user_id,
                 f"Пользователь с ID {del_user_id} "
                 f"был удален из черного списка.",
                 KEYBOARDS["next"]
             )
-        if self.USER_STATE.get(self.user_id) == 'delete_favorites':
+        if user_session.state == 'delete_favorites':
             self.favorites_db.remove_from_favorites(
-                self.user_id, del_user_id
+                user_session.user_id, del_user_id
             )
             self.send_message(
-                self.user_id,
+                user_session.user_id,
                 f"Пользователь с ID {del_user_id} "
                 f"был удален из избранного.",
                 KEYBOARDS["next"]
             )
-            self.USER_STATE[self.user_id] = None
+            user_session.state = None
 
-    def _handle_unknown_command(self) -> None:
+    def _handle_unknown_command(self, user_session: UserSession) -> None:
         """Метод для обработки неизвестной команды."""
-        self.send_message(self.user_id, MESSAGES["unknown_command"])
+        self.send_message(user_session.user_id, MESSAGES["unknown_command"])
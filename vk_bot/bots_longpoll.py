@@ -0,0 +1,145 @@
+"""Модуль для получения событий сообщества через Bots Long Poll API.
+
+Модуль содержит класс AsyncBotsLongPoll, который асинхронно ожидает
+новые события сообщества на сервере Long Poll и передает их по одному.
+Пока запрос к серверу ожидает события, поток не занят, поэтому цикл
+событий в это время обрабатывает сообщения пользователей. Ошибки сети и
+VK API не останавливают получение событий: запрос повторяется с
+увеличивающейся задержкой.
+"""
+import asyncio
+from typing import AsyncIterator
+
+import aiohttp
+
+from settings import BOT_SETTINGS
+from vk_bot.async_api_client import REQUEST_ERRORS, AsyncVKApiClient
+
+#: Ошибки, после которых запрос к серверу Long Poll повторяется. Кроме
+#: ошибок запроса, это ответы сервера неожиданного формата.
+LONGPOLL_ERRORS = (*REQUEST_ERRORS, KeyError, TypeError, AttributeError)
+
+
+class AsyncBotsLongPoll:
+    """Класс для получения событий сообщества через Bots Long Poll API."""
+    def __init__(
+            self,
+            api_client: AsyncVKApiClient,
+            group_id: int,
+            wait: int = BOT_SETTINGS["longpoll_wait"],
+            retry_delay: float = BOT_SETTINGS["longpoll_retry_delay"],
+            max_retry_delay: float = BOT_SETTINGS["longpoll_max_retry_delay"]
+    ) -> None:
+        """Инициализирует объект для получения событий сообщества.
+
+        Args:
+            api_client (AsyncVKApiClient): Клиент VK API с токеном
+                сообщества.
+            group_id (int): ID сообщества.
+            wait (int): Время ожидания событий одним запросом в секундах
+                (не больше 90). По умолчанию берется из настроек.
+            retry_delay (float): Задержка перед повтором после ошибки в
+                секундах. Удваивается с каждой ошибкой подряд.
+                По умолчанию берется из настроек.
+            max_retry_delay (float): Максимальная задержка перед повтором
+                в секундах. По умолчанию берется из настроек.
+        """
+        self.api_client = api_client
+        self.group_id = group_id
+        self.wait = wait
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        # Ответ сервера Long Poll приходит не раньше чем через wait секунд,
+        # поэтому таймаут чтения запроса увеличен на это время
+        self.timeout = aiohttp.ClientTimeout(sock_read=wait + 10)
+        self.server: str | None = None
+        self.key: str | None = None
+        self.ts: str | None = None
+
+    async def update_server(self, update_ts: bool = True) -> None:
+        """Получает адрес и ключ сервера Long Poll.
+
+        Args:
+            update_ts (bool): Получить также номер последнего события.
+                Если False, события после текущего номера не теряются.
+                По умолчанию True.
+        """
+        response = await self.api_client.call(
+            "groups.getLongPollServer", {"group_id": self.group_id}
+        )
+        server_info = response["response"]
+        self.server = server_info["server"]
+        self.key = server_info["key"]
+
+        if update_ts or self.ts is None:
+            self.ts = server_info["ts"]
+
+    async def check(self) -> list[dict]:
+        """Выполняет один запрос к серверу Long Poll.
+
+        При ошибках сервера номер события или ключ обновляются, и метод
+        возвращает пустой список.
+
+        Returns:
+            list[dict]: Новые события сообщества.
+        """
+        if self.server is None:
+            await self.update_server()
+
+        data = await self.api_client.request(
+            "GET",
+            self.server,
+            params={
+                "act": "a_check",
+                "key": self.key,
+                "ts": self.ts,
+                "wait": str(self.wait)
+            },
+            timeout=self.timeout
+        )
+        failed = data.get("failed")
+
+        if failed == 1:
+            # История событий устарела, продолжаем с номера из ответа
+            self.ts = data["ts"]
+        elif failed == 2:
+            await self.update_server(update_ts=False)
+        elif failed == 3:
+            await self.update_server()
+        elif failed is None:
+            self.ts = data["ts"]
+            return data.get("updates", [])
+
+        return []
+
+    async def listen(self) -> AsyncIterator[dict]:
+        """Ожидает события сообщества и передает их по одному.
+
+        После ошибки запроса метод ждет, заново получает адрес и ключ
+        сервера, сохраняя номер последнего события, и продолжает
+        получать события.
+
+        Yields:
+            dict: Событие сообщества, например с типом "message_new".
+        """
+        retry_delay = self.retry_delay
+        reconnect = False
+
+        while True:
+            try:
+                if reconnect:
+                    await self.update_server(update_ts=False)
+                    reconnect = False
+
+                events = await self.check()
+            except LONGPOLL_ERRORS as e:
+                print(f"Ошибка при получении событий сообщества: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self.max_retry_delay)
+                reconnect = True
+                continue
+
+            retry_delay = self.retry_delay
+
+            for event in events:
+                yield event
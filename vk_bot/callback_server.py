@@ -0,0 +1,361 @@
+"""Модуль для получения событий сообщества через Callback API.
+
+Модуль содержит HTTP-сервер VKCallbackServer, который принимает события
+сообщества от VK, сразу отвечает на них "ok" и передает сообщения в пул
+обработчиков CallbackWorkerPool. Пул запускает несколько процессов с
+ботом (модель pre-fork), поэтому обработка событий распределяется по
+ядрам процессора, а сервер слушает один порт.
+
+Сообщения одного пользователя всегда попадают в один процесс: в нем
+хранятся сессия пользователя и очередь его сообщений, поэтому сообщения
+обрабатываются по порядку.
+"""
+import json
+import multiprocessing
+import queue
+import signal
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+from database.base import engine
+from settings import BOT_SETTINGS
+from vk_bot.rate_limiter import set_rate_share
+
+#: Ответ, которого VK ждет на каждое событие, кроме подтверждения.
+OK_RESPONSE = "ok"
+#: Ответ на событие, которое не удалось принять из-за переполнения
+#: очереди. VK повторит такое событие позже.
+BUSY_RESPONSE = "busy"
+
+
+class CallbackRequestHandler(BaseHTTPRequestHandler):
+    """Класс для обработки HTTP-запроса с событием сообщества."""
+    # Соединения с VK переиспользуются для следующих событий. Заголовки и
+    # тело ответа отправляются отдельно, поэтому без отключения алгоритма
+    # Нейгла каждый ответ задерживался бы на время отложенного ACK
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:
+        """Обрабатывает POST-запрос с событием в формате JSON."""
+        length = int(self.headers.get("Content-Length") or 0)
+
+        try:
+            event = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._reply(400, "bad request")
+            return
+
+        if not isinstance(event, dict):
+            self._reply(400, "bad request")
+            return
+
+        self._reply(*self.server.handle_event(event))
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Отключает вывод каждого запроса в консоль."""
+
+    def _reply(self, status: int, body: str) -> None:
+        """Отправляет текстовый ответ.
+
+        Args:
+            status (int): Код ответа HTTP.
+            body (str): Текст ответа.
+        """
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class VKCallbackServer(ThreadingHTTPServer):
+    """Класс HTTP-сервера для получения событий через Callback API."""
+    daemon_threads = True
+
+    def __init__(
+            self,
+            address: tuple[str, int],
+            route: Callable[..., bool],
+            confirmation_code: str,
+            secret: str | None = None,
+            dedup_size: int = BOT_SETTINGS["callback_dedup_size"]
+    ) -> None:
+        """Инициализирует сервер и начинает слушать адрес.
+
+        Args:
+            address (tuple[str, int]): Адрес и порт сервера.
+            route (Callable[..., bool]): Функция, которая получает ID
+                пользователя, текст сообщения и payload кнопки и
+                возвращает False, если сообщение не удалось принять.
+                Должна быстро возвращать управление, так как ответ VK
+                отправляется после ее вызова.
+            confirmation_code (str): Строка, которую нужно вернуть на
+                событие confirmation при подключении сервера в настройках
+                сообщества.
+            secret (str | None, optional): Секретный ключ из настроек
+                Callback API. События с другим ключом отклоняются.
+                По умолчанию None — ключ не проверяется.
+            dedup_size (int): Количество последних event_id, по которым
+                отбрасываются повторы событий. По умолчанию берется из
+                настроек.
+
+        Raises:
+            ValueError: Если не передана строка подтверждения.
+        """
+        if not confirmation_code:
+            raise ValueError("Не задана строка подтверждения Callback API")
+
+        super().__init__(address, CallbackRequestHandler)
+        self.route = route
+        self.confirmation_code = confirmation_code
+        self.secret = secret
+        self.dedup_size = dedup_size
+        self._seen_events: OrderedDict[str, None] = OrderedDict()
+        self._seen_lock = threading.Lock()
+
+    def handle_event(self, event: dict) -> tuple[int, str]:
+        """Обрабатывает событие сообщества.
+
+        Args:
+            event (dict): Событие в формате Callback API.
+
+        Returns:
+            tuple[int, str]: Код ответа HTTP и текст ответа.
+        """
+        if self.secret and event.get("secret") != self.secret:
+            return 403, "forbidden"
+
+        event_type = event.get("type")
+
+        if event_type == "confirmation":
+            return 200, self.confirmation_code
+
+        if event_type == "message_new":
+            event_object = event.get("object")
+            message = (
+                event_object.get("message")
+                if isinstance(event_object, dict) else None
+            )
+
+            if not isinstance(message, dict):
+                return 400, "bad request"
+
+            user_id = message.get("from_id")
+            text = message.get("text", "")
+            # payload есть только у сообщений, отправленных нажатием кнопки
+            payload = message.get("payload")
+            event_id = event.get("event_id")
+
+            # bool тоже является int, но ID пользователя быть не может
+            if (not isinstance(user_id, int) or isinstance(user_id, bool)
+                    or not isinstance(text, str)
+                    or not isinstance(payload, (str, type(None)))
+                    or not isinstance(event_id, (str, type(None)))):
+                return 400, "bad request"
+
+            # VK повторяет событие, если не получил ответ вовремя, поэтому
+            # уже принятое событие только подтверждается
+            if event_id is not None and not self._claim(event_id):
+                return 200, OK_RESPONSE
+
+            if not self.route(user_id, text, payload):
+                if event_id is not None:
+                    self._release(event_id)
+
+                return 503, BUSY_RESPONSE
+
+        # На остальные события VK тоже ждет "ok", иначе повторяет их
+        return 200, OK_RESPONSE
+
+    def _claim(self, event_id: str) -> bool:
+        """Запоминает событие, если оно еще не принималось.
+
+        Самые старые запомненные события забываются.
+
+        Args:
+            event_id (str): ID события.
+
+        Returns:
+            bool: False, если событие уже было принято.
+        """
+        with self._seen_lock:
+            if event_id in self._seen_events:
+                return False
+
+            self._seen_events[event_id] = None
+
+            while len(self._seen_events) > self.dedup_size:
+                self._seen_events.popitem(last=False)
+
+            return True
+
+    def _release(self, event_id: str) -> None:
+        """Забывает событие, которое не удалось принять.
+
+        Args:
+            event_id (str): ID события.
+        """
+        with self._seen_lock:
+            self._seen_events.pop(event_id, None)
+
+
+def _run_worker(
+        make_bot: Callable[[], Any], events: Any, workers: int = 1
+) -> None:
+    """Обрабатывает сообщения из очереди в боте, пока не получит None.
+
+    Args:
+        make_bot (Callable[[], Any]): Функция, создающая бота.
+        events (Any): Очередь сообщений обработчика.
+        workers (int): Количество обработчиков в пуле. Лимиты запросов
+            токенов делятся между ними поровну. По умолчанию 1.
+    """
+    if multiprocessing.parent_process() is not None:
+        # Все обработчики используют одни токены, поэтому каждый получает
+        # свою часть лимитов запросов к VK API
+        set_rate_share(workers)
+        # Прерывание обрабатывает родительский процесс: он останавливает
+        # сервер и передает обработчикам None после принятых сообщений
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        # Соединения с базой данных, открытые родительским процессом до
+        # запуска обработчиков, не должны использоваться в дочернем
+        engine.dispose(close=False)
+
+    bot = make_bot()
+    bot.handle_events(iter(events.get, None))
+
+
+class CallbackWorkerPool:
+    """Класс пула процессов для обработки сообщений пользователей."""
+    def __init__(
+            self,
+            make_bot: Callable[[], Any],
+            workers: int = BOT_SETTINGS["callback_workers"],
+            queue_size: int = BOT_SETTINGS["callback_queue_size"],
+            queue_timeout: float = BOT_SETTINGS["callback_queue_timeout"]
+    ) -> None:
+        """Инициализирует пул обработчиков.
+
+        Args:
+            make_bot (Callable[[], Any]): Функция, создающая бота.
+                Вызывается в каждом обработчике. Если процессы
+                запускаются методом spawn, функция должна быть доступна
+                для импорта.
+            workers (int): Количество процессов-обработчиков. Если 0,
+                сообщения обрабатываются одним ботом в потоке текущего
+                процесса. По умолчанию берется из настроек.
+            queue_size (int): Максимальный размер очереди одного
+                обработчика. По умолчанию берется из настроек.
+            queue_timeout (float): Время ожидания места в заполненной
+                очереди в секундах. По умолчанию берется из настроек.
+        """
+        self.queue_timeout = queue_timeout
+
+        if workers > 0:
+            context = multiprocessing.get_context(
+                "fork"
+                if "fork" in multiprocessing.get_all_start_methods()
+                else "spawn"
+            )
+            self._queues = [
+                context.Queue(maxsize=queue_size) for _ in range(workers)
+            ]
+            self._workers = [
+                context.Process(
+                    target=_run_worker,
+                    args=(make_bot, events, workers),
+                    daemon=True
+                )
+                for events in self._queues
+            ]
+        else:
+            self._queues = [queue.Queue(maxsize=queue_size)]
+            self._workers = [
+                threading.Thread(
+                    target=_run_worker, args=(make_bot, self._queues[0])
+                )
+            ]
+
+    def start(self) -> None:
+        """Запускает обработчики.
+
+        Должен вызываться до запуска сервера, чтобы процессы создавались
+        без его потоков.
+        """
+        for worker in self._workers:
+            worker.start()
+
+    def dispatch(self, user_id: int, *args: Any) -> bool:
+        """Передает сообщение пользователя в очередь его обработчика.
+
+        Args:
+            user_id (int): ID пользователя, от которого пришло сообщение.
+            *args (Any): Текст сообщения и payload кнопки.
+
+        Returns:
+            bool: False, если очередь обработчика осталась заполненной
+                дольше queue_timeout секунд и сообщение не принято.
+        """
+        try:
+            self._queues[user_id % len(self._queues)].put(
+                (user_id, *args), timeout=self.queue_timeout
+            )
+            return True
+        except queue.Full:
+            return False
+
+    def stop(self) -> None:
+        """Дожидается обработки сообщений и останавливает обработчики."""
+        for events in self._queues:
+            events.put(None)
+
+        for worker in self._workers:
+            worker.join()
+
+
+def serve_callback(
+        make_bot: Callable[[], Any],
+        confirmation_code: str,
+        secret: str | None = None,
+        host: str = BOT_SETTINGS["callback_host"],
+        port: int = BOT_SETTINGS["callback_port"],
+        workers: int = BOT_SETTINGS["callback_workers"]
+) -> None:
+    """Запускает сервер Callback API и пул обработчиков.
+
+    Работает до прерывания, после чего дожидается обработки уже
+    принятых сообщений.
+
+    Args:
+        make_bot (Callable[[], Any]): Функция, создающая бота.
+        confirmation_code (str): Строка для подтверждения адреса сервера.
+        secret (str | None, optional): Секретный ключ Callback API.
+            По умолчанию None.
+        host (str): Адрес сервера. По умолчанию берется из настроек.
+        port (int): Порт сервера. По умолчанию берется из настроек.
+        workers (int): Количество процессов-обработчиков.
+            По умолчанию берется из настроек.
+
+    Raises:
+        ValueError: Если не передана строка подтверждения.
+    """
+    # Строка проверяется до запуска обработчиков, чтобы без нее бот не
+    # запускался вовсе
+    if not confirmation_code:
+        raise ValueError("Не задана строка подтверждения Callback API")
+
+    pool = CallbackWorkerPool(make_bot, workers)
+    pool.start()
+    server = VKCallbackServer(
+        (host, port), pool.dispatch, confirmation_code, secret
+    )
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        pool.stop()
@@ -0,0 +1,73 @@
+"""Модуль с записью найденного кандидата.
+
+Модуль содержит класс Candidate — компактную запись пользователя из
+результатов поиска. Запись создается один раз из ответа users.search и
+хранит только поля, которые нужны для фильтрации, дополнения
+фотографиями, ранжирования и записи мэтчей в базу данных. Все стадии
+поиска передают друг другу записи Candidate вместо словарей из ответа
+VK API.
+"""
+import sys
+from dataclasses import dataclass
+
+from vk_bot.get_info import UserInfoRetriever
+
+
+def _intern(value: str | None) -> str | None:
+    """Возвращает общую копию строки.
+
+    Имена и даты рождения у кандидатов часто совпадают, поэтому
+    одинаковые значения хранятся в памяти одной строкой.
+
+    Args:
+        value (str | None): Строка из ответа VK API.
+
+    Returns:
+        str | None: Интернированная строка или None.
+    """
+    return sys.intern(value) if value else value
+
+
+@dataclass(slots=True)
+class Candidate:
+    """Класс записи кандидата из результатов поиска."""
+    #: ID пользователя VK.
+    id: int
+    #: Имя и фамилия пользователя.
+    first_name: str
+    last_name: str
+    #: Дата рождения в формате "Д.М.ГГГГ" или "Д.М", если год скрыт.
+    bdate: str | None = None
+    #: Время последнего посещения в секундах или None, если неизвестно.
+    last_seen: int | None = None
+    #: ID трех самых популярных фотографий.
+    photo_id1: str | None = None
+    photo_id2: str | None = None
+    photo_id3: str | None = None
+    #: Сумма лайков трех самых популярных фотографий.
+    likes: int | None = None
+    #: Позиция кандидата в выдаче пользователю.
+    rank: int = 0
+
+    @classmethod
+    def from_api(cls, item: dict) -> "Candidate":
+        """Создает запись из элемента ответа users.search.
+
+        Args:
+            item (dict): Данные пользователя из ответа users.search.
+
+        Returns:
+            Candidate: Запись кандидата.
+        """
+        return cls(
+            id=item["id"],
+            first_name=_intern(item.get("first_name", "")),
+            last_name=_intern(item.get("last_name", "")),
+            bdate=_intern(item.get("bdate")),
+            last_seen=(item.get("last_seen") or {}).get("time")
+        )
+
+    @property
+    def url(self) -> str:
+        """Ссылка на профиль пользователя."""
+        return UserInfoRetriever.get_user_url(self.id)
@@ -0,0 +1,126 @@
+"""Модуль для параллельной обработки событий бота.
+
+Модуль содержит класс EventDispatcher, который распределяет события
+пользователей по пулу потоков. События каждого пользователя хранятся в
+его собственной очереди и обрабатываются строго по порядку, а события
+разных пользователей обрабатываются параллельно любыми свободными
+потоками. Поэтому долгая обработка события одного пользователя не
+задерживает события других пользователей.
+"""
+import queue
+import threading
+from collections import deque
+from typing import Any, Callable
+
+from settings import BOT_SETTINGS
+
+
+class EventDispatcher:
+    """Класс для распределения событий пользователей по пулу потоков."""
+    def __init__(
+            self,
+            handler: Callable[..., None],
+            workers: int = BOT_SETTINGS["event_workers"],
+            queue_size: int = BOT_SETTINGS["event_queue_size"]
+    ) -> None:
+        """Инициализирует диспетчер событий.
+
+        Args:
+            handler (Callable[..., None]): Обработчик события. Первым
+                аргументом получает ID пользователя.
+            workers (int): Количество потоков-обработчиков.
+                По умолчанию берется из настроек.
+            queue_size (int): Максимальное количество необработанных
+                событий. При превышении dispatch блокируется, пока одно
+                из событий не будет обработано. По умолчанию берется из
+                настроек.
+        """
+        self.handler = handler
+        # Необработанные события пользователей, у которых есть события в
+        # обработке или в очереди. Пользователь удаляется, когда его
+        # события заканчиваются
+        self._events: dict[int, deque[tuple]] = {}
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        # Пользователи, чье следующее событие можно обработать. Каждый
+        # пользователь находится в очереди не более одного раза, поэтому
+        # его события не обрабатываются параллельно
+        self._ready: queue.Queue[int | None] = queue.Queue()
+        self._slots = threading.Semaphore(max(1, queue_size))
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(max(1, workers))
+        ]
+
+    @property
+    def pending(self) -> int:
+        """Количество событий, ожидающих обработки."""
+        with self._lock:
+            return sum(len(events) for events in self._events.values())
+
+    def start(self) -> None:
+        """Запускает потоки-обработчики."""
+        for thread in self._threads:
+            thread.start()
+
+    def dispatch(self, user_id: int, *args: Any) -> None:
+        """Передает событие пользователя в его очередь.
+
+        Args:
+            user_id (int): ID пользователя, от которого пришло событие.
+            *args (Any): Остальные аргументы обработчика.
+        """
+        self._slots.acquire()
+
+        with self._lock:
+            events = self._events.get(user_id)
+
+            if events is None:
+                self._events[user_id] = deque([(user_id, *args)])
+                self._ready.put(user_id)
+            else:
+                events.append((user_id, *args))
+
+    def stop(self) -> None:
+        """Дожидается обработки всех событий и останавливает потоки."""
+        with self._drained:
+            self._drained.wait_for(lambda: not self._events)
+
+        for _ in self._threads:
+            self._ready.put(None)
+
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self) -> None:
+        """Обрабатывает события готовых пользователей, пока не получит None.
+
+        За один раз обрабатывается одно событие пользователя, после чего
+        пользователь возвращается в конец очереди, если у него остались
+        события. Так пользователи с большим количеством событий не
+        занимают потоки надолго.
+        """
+        while True:
+            user_id = self._ready.get()
+
+            if user_id is None:
+                break
+
+            with self._lock:
+                event = self._events[user_id].popleft()
+
+            try:
+                self.handler(*event)
+            except Exception as e:
+                print(f"Ошибка при обработке события: {e}")
+            finally:
+                self._slots.release()
+
+                with self._lock:
+                    if self._events[user_id]:
+                        self._ready.put(user_id)
+                    else:
+                        del self._events[user_id]
+
+                        if not self._events:
+                            self._drained.notify_all()
@@ -6,21 +6,37 @@
 import requests
 
 from database.db_funcs import UserDBManager
+from vk_bot.api_client import VKApiClient
+from vk_bot.batch import VKExecuteBatcher
+
+#: Поля профиля пользователя бота, которые запрашиваются через users.get.
+PROFILE_FIELDS = "city, bdate, sex, relation, has_photo, last_seen"
 
 
 class UserInfoRetriever:
     """Класс для получения информации о пользователях."""
-    def __init__(self, token: str, vk_api_version: float) -> None:
+    def __init__(
+            self,
+            token: str,
+            vk_api_version: float,
+            api_client: VKApiClient | None = None
+    ) -> None:
         """Инициализирует объект класса UserInfoRetriever.
 
         Args:
             token (str): Токен для доступа к API ВКонтакте.
             vk_api_version (float): Версия API ВКонтакте.
+            api_client (VKApiClient | None, optional): Общий клиент VK API.
+                Если не передан, создается собственный клиент.
+                По умолчанию None.
         """
-        self.URL = "https://api.vk.com/method/"
         self.TOKEN = token
         self.vk_api_version = vk_api_version
+        self.api_client = api_client or VKApiClient(
+            self.TOKEN, self.vk_api_version
+        )
         self.user_db = UserDBManager()
+        self.batcher = VKExecuteBatcher(self.api_client)
 
     def get_profile_info(self, user_id: int) -> dict[str, str | int] | None:
         """Получает информацию о профиле пользователя.
@@ -33,16 +49,14 @@ class UserInfoRetriever:
             None: Если профиль не найден.
         """
         try:
-            response = requests.get(
-                f"{self.URL}users.get",
+            response = self.api_client.call(
+                "users.get",
                 {
-                    "access_token": self.TOKEN,
-                    "v": self.vk_api_version,
                     "user_ids": user_id,
-                    "fields": "city, bdate, sex, relation, has_photo, last_seen"
+                    "fields": PROFILE_FIELDS
                 }
             )
-            return response.json()["response"]
+            return response["response"]
         except requests.exceptions.RequestException:
             return None
 
@@ -69,25 +83,87 @@ class UserInfoRetriever:
             None: Если фотографий не найдены.
         """
         try:
-            response = requests.get(
-                f"{self.URL}photos.get",
+            data = self.api_client.call(
+                "photos.get",
                 {
-                    "access_token": self.TOKEN,
-                    "v": self.vk_api_version,
                     "owner_id": user_id,
                     "album_id": "profile",
                     "extended": 1,
                     "photo_sizes": 0
                 }
             )
-            data = response.json()
-
-            if 'response' in data:
-                photos = data['response']
-                return self._get_best_3_photos_id(photos)
+            return self._get_best_3_photos_id(data['response'])
         except requests.exceptions.RequestException:
             return None
 
+    def get_users_photos(
+            self, user_ids: list[int]
+    ) -> list[tuple[list[str], int | None] | None]:
+        """Получает три самых популярных фотографии для списка пользователей.
+
+        Вызовы photos.get объединяются в пакеты метода execute, поэтому
+        на каждые 25 пользователей выполняется один запрос к API.
+
+        Args:
+            user_ids (list[int]): Список ID пользователей.
+
+        Returns:
+            list[tuple[list[str], int | None] | None]: Списки фотографий и
+                сумма их лайков в порядке переданных ID. Для
+                пользователей без фотографий список пуст, а для
+                пользователей с закрытыми фотографиями пуст список и
+                вместо суммы лайков стоит None. None для пользователей,
+                фотографии которых не были получены из-за ошибки.
+        """
+        return self.parse_users_photos(
+            self.batcher.call_many("photos.get", self.photos_params(user_ids))
+        )
+
+    @staticmethod
+    def photos_params(user_ids: list[int]) -> list[dict]:
+        """Возвращает параметры вызовов photos.get для списка пользователей.
+
+        Args:
+            user_ids (list[int]): Список ID пользователей.
+
+        Returns:
+            list[dict]: Параметры вызова для каждого пользователя.
+        """
+        return [
+            {
+                "owner_id": user_id,
+                "album_id": "profile",
+                "extended": 1,
+                "photo_sizes": 0
+            }
+            for user_id in user_ids
+        ]
+
+    def parse_users_photos(
+            self, responses: list[dict | bool | None]
+    ) -> list[tuple[list[str], int | None] | None]:
+        """Выбирает лучшие фотографии из результатов вызовов photos.get.
+
+        Args:
+            responses (list[dict | bool | None]): Результаты вызовов в
+                формате VKExecuteBatcher.call_many.
+
+        Returns:
+            list[tuple[list[str], int | None] | None]: Списки фотографий и
+                сумма их лайков в формате get_users_photos.
+        """
+        users_photos = []
+
+        for photos in responses:
+            if photos is None:
+                users_photos.append(None)
+            elif photos is False:
+                users_photos.append(([], None))
+            else:
+                users_photos.append(self._get_best_3_photos(photos) or ([], 0))
+
+        return users_photos
+
     @staticmethod
     def _find_largest_photo(dict_sizes: dict[str, int | str]) -> int:
         """Возвращает наибольшую сторону изображения.
@@ -107,14 +183,30 @@ class UserInfoRetriever:
     def _get_best_3_photos_id(self, photos: dict) -> list[str] | None:
         """Возвращает список ID трех самых популярных фотографий.
 
-        Популярность фотографий определяется количеством лайков.
+        Популярность фотографий определяется количеством лайков.
 
         Args:
             photos (dict): Словарь с информацией о фотографиях.
 
         Returns:
             list[str]: Список ID самых популярных фотографий.
-            None: Если фотографий не найдены.
+            None: Если фотографий не найдены.
+        """
+        best_photos = self._get_best_3_photos(photos)
+        return best_photos[0] if best_photos else None
+
+    def _get_best_3_photos(
+            self, photos: dict
+    ) -> tuple[list[str], int] | None:
+        """Возвращает ID трех самых популярных фотографий и их лайки.
+
+        Args:
+            photos (dict): Словарь с информацией о фотографиях.
+
+        Returns:
+            tuple[list[str], int]: Список ID самых популярных фотографий и
+                сумма их лайков.
+            None: Если фотографий не найдены.
         """
         if not photos or 'items' not in photos:
             return None
@@ -136,5 +228,8 @@ class UserInfoRetriever:
             photos_dict.items(),
             key=lambda item: item[1][1],
             reverse=True
+        )[:3]
+        return (
+            [id_ for id_, _ in sorted_tuples],
+            sum(likes for _, (_, likes) in sorted_tuples)
         )
-        return [id_ for id_, _ in sorted_tuples[:3]]
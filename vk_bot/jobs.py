@@ -0,0 +1,122 @@
+"""Модуль для фонового поиска мэтчей.
+
+Модуль содержит класс SearchJob с состоянием поиска для одного
+пользователя и класс SearchJobRunner, который выполняет поиск в фоновых
+потоках. Найденные пользователи дополняются фотографиями и записываются
+в базу данных небольшими пакетами, поэтому первая анкета доступна сразу
+после записи первого пакета, а не после обработки всех кандидатов.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from database.base import session_scope
+from database.db_funcs import UserDBManager
+from settings import BOT_SETTINGS
+from vk_bot.searcher import UserSearcher
+
+#: Статусы фонового поиска.
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class SearchJob:
+    """Класс с состоянием фонового поиска мэтчей одного пользователя."""
+    #: ID пользователя VK, для которого выполняется поиск.
+    user_id: int
+    #: Текущий статус поиска.
+    status: str = JOB_PENDING
+    #: Количество мэтчей, уже записанных в базу данных.
+    matches_stored: int = 0
+    #: Время создания задачи по time.monotonic().
+    created_at: float = field(default_factory=time.monotonic)
+    #: Время записи первого пакета мэтчей по time.monotonic().
+    first_chunk_at: float | None = None
+    #: Время завершения поиска по time.monotonic().
+    finished_at: float | None = None
+
+    @property
+    def in_progress(self) -> bool:
+        """Поиск еще не завершен."""
+        return self.status in (JOB_PENDING, JOB_RUNNING)
+
+
+class SearchJobRunner:
+    """Класс для выполнения поиска мэтчей в фоновых потоках."""
+    def __init__(
+            self,
+            searcher: UserSearcher,
+            user_db: UserDBManager,
+            workers: int = BOT_SETTINGS["search_job_workers"],
+            chunk_size: int = BOT_SETTINGS["search_job_chunk_size"],
+            with_photos: bool = not BOT_SETTINGS["lazy_photos"]
+    ) -> None:
+        """Инициализирует исполнителя фоновых поисков.
+
+        Args:
+            searcher (UserSearcher): Объект для поиска пользователей.
+            user_db (UserDBManager): Объект для работы с пользователями в
+                базе данных.
+            workers (int): Количество одновременно выполняемых поисков.
+                По умолчанию берется из настроек.
+            chunk_size (int): Количество мэтчей, которые дополняются
+                фотографиями и записываются в базу данных за один раз.
+                По умолчанию берется из настроек.
+            with_photos (bool): Запрашивать фотографии мэтчей при поиске.
+                Если False, мэтчи записываются без фотографий, а
+                фотографии загружаются при просмотре анкет.
+                По умолчанию зависит от настройки lazy_photos.
+        """
+        self.searcher = searcher
+        self.user_db = user_db
+        self.chunk_size = chunk_size
+        self.with_photos = with_photos
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="search-job"
+        )
+
+    def submit(self, user_id: int) -> SearchJob:
+        """Ставит поиск мэтчей пользователя в очередь.
+
+        Args:
+            user_id (int): ID пользователя VK.
+
+        Returns:
+            SearchJob: Состояние созданного поиска.
+        """
+        job = SearchJob(user_id)
+        self._executor.submit(self._run, job)
+        return job
+
+    def stop(self) -> None:
+        """Дожидается завершения всех поисков и останавливает потоки."""
+        self._executor.shutdown(wait=True)
+
+    def _run(self, job: SearchJob) -> None:
+        """Выполняет поиск и записывает мэтчи в базу данных пакетами.
+
+        Args:
+            job (SearchJob): Состояние выполняемого поиска.
+        """
+        job.status = JOB_RUNNING
+
+        try:
+            with session_scope():
+                for chunk in self.searcher.search_users_in_chunks(
+                        job.user_id, self.chunk_size, self.with_photos
+                ):
+                    self.user_db.add_match_user_to_db(chunk, job.user_id)
+                    job.matches_stored += len(chunk)
+
+                    if job.first_chunk_at is None:
+                        job.first_chunk_at = time.monotonic()
+
+            job.status = JOB_DONE
+        except Exception as e:
+            job.status = JOB_FAILED
+            print(f"Ошибка при поиске мэтчей: {e}")
+        finally:
+            job.finished_at = time.monotonic()
@@ -1,62 +1,147 @@
-"""Модуль для создания клавиатуры."""
-from vk_api.keyboard import VkKeyboard
+"""Модуль для создания клавиатуры.
+
+Все клавиатуры из настроек проверяются и переводятся в JSON один раз при
+создании VKKeyboard, поэтому ошибки в их описании обнаруживаются при
+запуске бота, а при отправке сообщения JSON берется готовым. JSON
+клавиатур, собранных во время работы, кэшируется.
+"""
+from functools import lru_cache
+
+from vk_api.keyboard import VkKeyboard, VkKeyboardColor
+
+from settings import BOT_SETTINGS, COMMANDS, KEYBOARDS
+
+#: Допустимые цвета кнопок.
+BUTTON_COLORS = frozenset(color.value for color in VkKeyboardColor)
 
 
 class VKKeyboard:
     """Класс для создания клавиатуры."""
+    def __init__(
+            self,
+            keyboards: dict[str, dict] | None = None
+    ) -> None:
+        """Проверяет клавиатуры и заранее создает их JSON.
+
+        Args:
+            keyboards (dict[str, dict] | None, optional): Словарь с
+                названиями и описаниями клавиатур. По умолчанию
+                используются клавиатуры из настроек.
+
+        Raises:
+            ValueError: Если описание одной из клавиатур некорректно.
+        """
+        if keyboards is None:
+            keyboards = KEYBOARDS
+
+        self._compiled: dict[tuple, str] = {}
+        # Клавиатуры из настроек не меняются во время работы, поэтому их
+        # JSON можно найти по самому объекту описания без проверки
+        self._static: dict[int, tuple[dict, str]] = {}
+
+        for name, btns in keyboards.items():
+            key = self._make_key(btns)
+            markup = self._render(key) if key is not None else None
+
+            if markup is None:
+                raise ValueError(f"Некорректное описание клавиатуры {name!r}")
+
+            self._compiled[key] = markup
+            self._static[id(btns)] = (btns, markup)
+
     def create_markup(
             self,
-            btns: dict[str, list[tuple[str, str]] | bool] | None = None
+            btns: dict[str, list[tuple[str, ...]] | bool] | None = None
     ) -> str | None:
         """Метод для создания клавиатуры.
 
+        Для клавиатур из настроек возвращается JSON, созданный при
+        запуске, для остальных — JSON из кэша.
+
         Args:
-            btns (dict[str, list[tuple[str, str]] | bool] | None, optional):
+            btns (dict[str, list[tuple[str, ...]] | bool] | None, optional):
                 Кнопки клавиатуры. По умолчанию None.
 
         Returns:
             str: Клавиатура в формате JSON.
-            None: Если параметр btns не является словарем.
+            None: Если параметр btns не является словарем или описание
+                клавиатуры некорректно.
         """
-        keyboard = self._create_layout(btns)
+        static = self._static.get(id(btns))
+
+        if static is not None and static[0] is btns:
+            return static[1]
+
+        key = self._make_key(btns)
+
+        if key is None:
+            return None
 
-        if keyboard is not None:
-            return keyboard.get_keyboard()
+        markup = self._compiled.get(key)
 
-    def _create_layout(
+        if markup is None:
+            markup = self._render(key)
+
+        return markup
+
+    def _make_key(
             self,
-            btns: dict[str, list[tuple[str, str]] | bool] | None = None
-    ) -> VkKeyboard | None:
-        """Метод для создания разметки клавиатуры.
+            btns: dict[str, list[tuple[str, ...]] | bool] | None = None
+    ) -> tuple | None:
+        """Метод для проверки клавиатуры и получения ее ключа в кэше.
 
         Args:
-            btns (dict[str, list[tuple[str, str]] | bool] | None, optional):
+            btns (dict[str, list[tuple[str, ...]] | bool] | None, optional):
                 Кнопки клавиатуры. По умолчанию None.
 
         Returns:
-            VkKeyboard: Клавиатура.
-            None: Если параметр btns не является словарем.
+            tuple: Неизменяемое представление клавиатуры: параметры
+                one_time и inline и кортеж кнопок.
+            None: Если описание клавиатуры некорректно.
         """
         if not self._validate_buttons_dict(btns):
             return None
 
-        keyboard = VkKeyboard(btns.get("one_time"), btns.get("inline"))
-
         for btn in btns["btns"]:
             if not self._validate_button(btn):
                 return None
 
-            keyboard.add_button(btn[0], btn[1])
+        return btns["one_time"], btns["inline"], tuple(btns["btns"])
+
+    @staticmethod
+    @lru_cache(maxsize=BOT_SETTINGS["keyboard_cache_size"])
+    def _render(key: tuple) -> str | None:
+        """Метод для создания JSON клавиатуры по ее ключу.
+
+        Args:
+            key (tuple): Ключ клавиатуры, созданный методом _make_key.
+
+        Returns:
+            str: Клавиатура в формате JSON.
+            None: Если VK API не допускает такую клавиатуру, например
+                из-за количества кнопок.
+        """
+        one_time, inline, buttons = key
+
+        try:
+            keyboard = VkKeyboard(one_time, inline)
+
+            for btn in buttons:
+                payload = {"command": btn[2]} if len(btn) == 3 else None
+                keyboard.add_button(btn[0], btn[1], payload)
+        except ValueError as e:
+            print(f"Ошибка при создании клавиатуры: {e}")
+            return None
 
-        return keyboard
+        return keyboard.get_keyboard()
 
     @staticmethod
     def _validate_buttons_dict(
-            btns: dict[str, list[tuple[str, str]] | bool] | None) -> bool:
+            btns: dict[str, list[tuple[str, ...]] | bool] | None) -> bool:
         """Метод для проверки корректности словаря с кнопками клавиатуры.
 
         Args:
-            btns (dict[str, list[tuple[str, str]] | bool] | None, optional):
+            btns (dict[str, list[tuple[str, ...]] | bool] | None, optional):
                 Кнопки клавиатуры. По умолчанию None.
 
         Returns:
@@ -72,17 +157,24 @@ class VKKeyboard:
         return True
 
     @staticmethod
-    def _validate_button(btn: tuple[str, str]) -> bool:
+    def _validate_button(btn: tuple[str, ...]) -> bool:
         """Метод для проверки корректности кнопки клавиатуры.
 
+        Цвет кнопки должен быть одним из цветов VK, а команда — ключом
+        словаря COMMANDS.
+
         Args:
-            btn (tuple[str, str]): Кнопка клавиатуры.
+            btn (tuple[str, ...]): Кнопка клавиатуры: текст, цвет и
+                необязательное название команды для payload.
 
         Returns:
             bool: Результат проверки.
         """
-        if (not isinstance(btn, tuple) or len(btn) != 2
+        if (not isinstance(btn, tuple) or len(btn) not in (2, 3)
                 or not all(isinstance(x, str) for x in btn)):
             return False
 
-        return True
+        if btn[1] not in BUTTON_COLORS:
+            return False
+
+        return len(btn) == 2 or btn[2] in COMMANDS
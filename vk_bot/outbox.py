@@ -0,0 +1,214 @@
+"""Модуль для асинхронной отправки сообщений пользователям.
+
+Модуль содержит класс MessageOutbox — очередь исходящих сообщений с
+отдельными потоками отправки. Обработчики команд только ставят ответы в
+очередь и сразу переходят к следующему событию, а потоки отправки
+вызывают messages.send в пределах лимита токена сообщества, повторяют
+неудачные отправки и учитывают задержку сообщений в очереди.
+
+Сообщения одному пользователю всегда попадают в одну очередь и
+отправляются строго по порядку.
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+import requests
+from vk_api.utils import get_random_id
+
+from settings import BOT_SETTINGS
+from vk_bot.api_client import VKApiClient, VKApiError
+
+#: Коды внутренних ошибок VK API, при которых отправка повторяется.
+RETRYABLE_SEND_ERROR_CODES = (1, 10)
+
+
+@dataclass
+class OutgoingMessage:
+    """Класс исходящего сообщения в очереди отправки."""
+    #: ID пользователя, которому отправляется сообщение.
+    peer_id: int
+    #: Параметры метода messages.send.
+    params: dict
+    #: Время постановки в очередь по time.monotonic().
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class MessageOutbox:
+    """Класс очереди исходящих сообщений с потоками отправки."""
+    def __init__(
+            self,
+            api_client: VKApiClient,
+            workers: int = BOT_SETTINGS["outbox_workers"],
+            queue_size: int = BOT_SETTINGS["outbox_queue_size"],
+            retries: int = BOT_SETTINGS["outbox_retries"],
+            backoff: float = BOT_SETTINGS["outbox_retry_backoff"]
+    ) -> None:
+        """Инициализирует очередь исходящих сообщений.
+
+        Args:
+            api_client (VKApiClient): Клиент VK API с токеном сообщества.
+                Лимит запросов соблюдается его планировщиком.
+            workers (int): Количество потоков отправки.
+                По умолчанию берется из настроек.
+            queue_size (int): Максимальный размер очереди одного потока.
+                По умолчанию берется из настроек.
+            retries (int): Количество повторов при ошибках отправки.
+                По умолчанию берется из настроек.
+            backoff (float): Начальная задержка перед повтором в секундах.
+                По умолчанию берется из настроек.
+        """
+        self.api_client = api_client
+        self.retries = retries
+        self.backoff = backoff
+        self._queues = [
+            queue.Queue(maxsize=queue_size) for _ in range(max(1, workers))
+        ]
+        self._threads = [
+            threading.Thread(
+                target=self._work, args=(message_queue,), daemon=True
+            )
+            for message_queue in self._queues
+        ]
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Запускает потоки отправки."""
+        for thread in self._threads:
+            thread.start()
+
+    def send(
+            self,
+            peer_id: int,
+            message: str,
+            keyboard: str | None = None,
+            attachment: str | None = None
+    ) -> None:
+        """Ставит сообщение в очередь отправки.
+
+        Каждому сообщению назначается случайный random_id, поэтому при
+        повторной отправке VK не доставит его дважды.
+
+        Args:
+            peer_id (int): ID пользователя.
+            message (str): Текст сообщения.
+            keyboard (str | None, optional): JSON клавиатуры.
+                По умолчанию None.
+            attachment (str | None, optional): Вложения.
+                По умолчанию None.
+        """
+        self._queues[peer_id % len(self._queues)].put(
+            OutgoingMessage(
+                peer_id,
+                {
+                    "user_id": peer_id,
+                    "message": message,
+                    "keyboard": keyboard,
+                    "attachment": attachment,
+                    "random_id": get_random_id()
+                }
+            )
+        )
+
+    def stop(self) -> None:
+        """Дожидается отправки всех сообщений и останавливает потоки."""
+        for message_queue in self._queues:
+            message_queue.put(None)
+
+        for thread in self._threads:
+            thread.join()
+
+    def stats(self) -> dict[str, int | float]:
+        """Возвращает статистику отправки сообщений.
+
+        Returns:
+            dict[str, int | float]: Количество сообщений в очередях
+                (queued), отправленных (sent), неотправленных (failed) и
+                повторных попыток (retried), а также среднее (avg_lag_ms)
+                и максимальное (max_lag_ms) время от постановки
+                сообщения в очередь до начала его отправки в
+                миллисекундах.
+        """
+        with self._lock:
+            processed = self.sent + self.failed
+
+            return {
+                "queued": sum(
+                    message_queue.qsize() for message_queue in self._queues
+                ),
+                "sent": self.sent,
+                "failed": self.failed,
+                "retried": self.retried,
+                "avg_lag_ms": (
+                    self.total_lag / processed * 1000 if processed else 0.0
+                ),
+                "max_lag_ms": self.max_lag * 1000
+            }
+
+    def _work(self, message_queue: queue.Queue) -> None:
+        """Отправляет сообщения из очереди, пока не получит None.
+
+        Args:
+            message_queue (queue.Queue): Очередь сообщений потока.
+        """
+        while True:
+            outgoing = message_queue.get()
+
+            if outgoing is None:
+                break
+
+            lag = time.monotonic() - outgoing.enqueued_at
+            sent = self._deliver(outgoing)
+
+            with self._lock:
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+
+                if sent:
+                    self.sent += 1
+                else:
+                    self.failed += 1
+
+    def _deliver(self, outgoing: OutgoingMessage) -> bool:
+        """Отправляет сообщение с повторами при временных ошибках.
+
+        Повторы выполняются в потоке отправки, поэтому следующие
+        сообщения тому же пользователю ждут и не обгоняют это.
+
+        Args:
+            outgoing (OutgoingMessage): Отправляемое сообщение.
+
+        Returns:
+            bool: True, если сообщение отправлено.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                self.api_client.call(
+                    "messages.send", outgoing.params, post=True
+                )
+                return True
+            except VKApiError as e:
+                error = e
+
+                if e.code not in RETRYABLE_SEND_ERROR_CODES:
+                    break
+            except requests.exceptions.RequestException as e:
+                error = e
+
+            if attempt < self.retries:
+                with self._lock:
+                    self.retried += 1
+
+                time.sleep(self.backoff * 2 ** attempt)
+
+        print(
+            f"Ошибка при отправке сообщения пользователю "
+            f"{outgoing.peer_id}: {error}"
+        )
+        return False
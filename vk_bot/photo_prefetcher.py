@@ -0,0 +1,151 @@
+"""Модуль для отложенной загрузки фотографий анкет.
+
+Модуль содержит класс PhotoPrefetcher, который загружает фотографии
+мэтчей только при просмотре анкет. Пока пользователь смотрит текущую
+анкету, фотографии нескольких следующих загружаются в фоне, поэтому к
+нажатию «Далее» они уже готовы.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable
+
+from database.base import session_scope
+from database.db_funcs import UserDBManager
+from settings import BOT_SETTINGS
+from vk_bot.searcher import UserSearcher
+
+
+def store_match_photos(
+        user_db: UserDBManager,
+        matches: list[list],
+        photos: dict[int, tuple[list[str], int | None]]
+) -> None:
+    """Добавляет фотографии в мэтчи и сохраняет их в базу данных.
+
+    Args:
+        user_db (UserDBManager): Объект для работы с пользователями в
+            базе данных.
+        matches (list[list]): Мэтчи в формате
+            UserDBManager.get_next_matches. Список фотографий мэтча
+            заполняется на месте.
+        photos (dict[int, tuple[list[str], int | None]]): Фотографии в
+            формате UserSearcher.get_photos.
+    """
+    match_photos = {}
+
+    for match in matches:
+        photo_ids, _ = photos.get(match[2], ([], None))
+
+        if photo_ids:
+            match[3][:] = UserDBManager.get_photo_attachments(
+                match[2], photo_ids
+            )
+            match_photos[match[4]] = photo_ids
+
+    user_db.update_match_photos(match_photos)
+
+
+class PhotoPrefetcher:
+    """Класс для фоновой загрузки фотографий следующих анкет."""
+    def __init__(
+            self,
+            searcher: UserSearcher,
+            user_db: UserDBManager,
+            prefetch_size: int = BOT_SETTINGS["photo_prefetch_size"],
+            workers: int = BOT_SETTINGS["photo_prefetch_workers"]
+    ) -> None:
+        """Инициализирует объект для загрузки фотографий анкет.
+
+        Args:
+            searcher (UserSearcher): Объект для поиска пользователей,
+                через который запрашиваются фотографии.
+            user_db (UserDBManager): Объект для работы с пользователями в
+                базе данных.
+            prefetch_size (int): Количество следующих анкет, фотографии
+                которых загружаются заранее. По умолчанию берется из
+                настроек.
+            workers (int): Количество потоков для загрузки фотографий.
+                По умолчанию берется из настроек.
+        """
+        self.searcher = searcher
+        self.user_db = user_db
+        self.prefetch_size = prefetch_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="photo-prefetch"
+        )
+        self._pending: dict[int, Future] = {}
+        self._lock = threading.Lock()
+
+    def ensure_photos(self, match: list) -> None:
+        """Дожидается загрузки фотографий мэтча.
+
+        Если фотографии уже загружаются в фоне, метод ждет завершения
+        загрузки, иначе загружает их сразу.
+
+        Args:
+            match (list): Данные мэтча в формате
+                UserDBManager.get_next_matches. Список фотографий мэтча
+                заполняется на месте.
+        """
+        if match[3]:
+            return
+
+        with self._lock:
+            future = self._pending.get(match[4])
+
+        if future is not None:
+            future.result()
+        else:
+            self._load([match])
+
+    def prefetch(self, matches: Iterable[list]) -> None:
+        """Запускает фоновую загрузку фотографий следующих анкет.
+
+        Загружаются фотографии первых prefetch_size мэтчей, у которых их
+        еще нет и для которых загрузка еще не запущена.
+
+        Args:
+            matches (Iterable[list]): Следующие мэтчи пользователя в
+                порядке просмотра.
+        """
+        with self._lock:
+            to_load = []
+
+            for i, match in enumerate(matches):
+                if i >= self.prefetch_size:
+                    break
+
+                if not match[3] and match[4] not in self._pending:
+                    to_load.append(match)
+
+            if not to_load:
+                return
+
+            future = self._executor.submit(self._load, to_load)
+
+            for match in to_load:
+                self._pending[match[4]] = future
+
+    def stop(self) -> None:
+        """Дожидается завершения загрузок и останавливает потоки."""
+        self._executor.shutdown(wait=True)
+
+    def _load(self, matches: list[list]) -> None:
+        """Загружает фотографии мэтчей и сохраняет их в базу данных.
+
+        Args:
+            matches (list[list]): Мэтчи, фотографии которых нужно
+                загрузить.
+        """
+        try:
+            with session_scope():
+                photos = self.searcher.get_photos(
+                    [match[2] for match in matches]
+                )
+                store_match_photos(self.user_db, matches, photos)
+        except Exception as e:
+            print(f"Ошибка при загрузке фотографий анкет: {e}")
+        finally:
+            with self._lock:
+                for match in matches:
+                    self._pending.pop(match[4], None)
@@ -0,0 +1,131 @@
+"""Модуль со стадиями потоковой обработки кандидатов.
+
+Поиск мэтчей собирается из стадий-генераторов: получение кандидатов,
+фильтрация по активности, исключение избранных и черного списка,
+ранжирование, дополнение фотографиями и запись в базу данных. Стадии,
+кроме ранжирования, обрабатывают кандидатов по мере поступления, поэтому
+следующая стадия начинает работу, не дожидаясь окончания предыдущей.
+Ранжирование собирает кандидатов в группу и выдает их после оценки всей
+группы: при одном запросе users.search группой являются все кандидаты, а
+в режиме обхода — очередные search_rank_window кандидатов. Поэтому в
+памяти одновременно находятся элементы в буферах между стадиями и
+кандидаты текущей группы ранжирования.
+"""
+import queue
+import threading
+from typing import Callable, Hashable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+#: Маркер окончания потока в буфере.
+_DONE = object()
+
+
+def unique_by(items: Iterable[T], key: Callable[[T], Hashable]) -> Iterator[T]:
+    """Пропускает элементы с уже встречавшимся ключом.
+
+    Args:
+        items (Iterable[T]): Входной поток элементов.
+        key (Callable[[T], Hashable]): Функция получения ключа элемента.
+
+    Yields:
+        T: Элементы с первым вхождением ключа.
+    """
+    seen = set()
+
+    for item in items:
+        item_key = key(item)
+
+        if item_key not in seen:
+            seen.add(item_key)
+            yield item
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Группирует поток элементов в пакеты.
+
+    Args:
+        items (Iterable[T]): Входной поток элементов.
+        size (int): Количество элементов в пакете. Последний пакет может
+            быть меньше.
+
+    Yields:
+        list[T]: Пакет элементов.
+    """
+    chunk = []
+
+    for item in items:
+        chunk.append(item)
+
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def buffered(items: Iterable[T], size: int) -> Iterator[T]:
+    """Выполняет предыдущие стадии в отдельном потоке через буфер.
+
+    Предыдущие стадии заполняют очередь из size элементов, пока
+    следующие стадии обрабатывают уже полученные элементы. При заполнении
+    очереди предыдущие стадии приостанавливаются. Исключение, возникшее в
+    предыдущих стадиях, передается потребителю после элементов,
+    полученных до него. Если потребитель прекращает чтение, предыдущие
+    стадии останавливаются и закрываются.
+
+    Args:
+        items (Iterable[T]): Входной поток элементов.
+        size (int): Размер буфера.
+
+    Yields:
+        T: Элементы входного потока в исходном порядке.
+    """
+    buffer = queue.Queue(maxsize=max(1, size))
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        error = None
+        iterator = iter(items)
+
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            error = e
+        finally:
+            # Генераторы предыдущих стадий закрываются в этом же потоке,
+            # чтобы их блоки finally и with выполнились сразу
+            close = getattr(iterator, "close", None)
+
+            if close is not None:
+                close()
+
+        put((_DONE, error))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item, error = buffer.get()
+
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+
+            yield item
+    finally:
+        stopped.set()
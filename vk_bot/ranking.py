@@ -0,0 +1,161 @@
+"""Модуль для ранжирования найденных кандидатов.
+
+Модуль содержит класс CandidateRanker, который упорядочивает всех
+кандидатов поиска по взвешенной оценке. Признаки кандидатов собираются
+в столбцы массива NumPy, а нормализация и оценка вычисляются для всех
+кандидатов сразу, без цикла по кандидатам. Поэтому оценки кандидатов
+одного поиска сравнимы между собой.
+
+Ранг кандидата сохраняется в мэтче, и мэтчи выдаются пользователю в
+порядке ранга.
+"""
+import time
+
+import numpy as np
+
+from settings import RANKING_SETTINGS
+from vk_bot.candidate import Candidate
+
+#: Признаки кандидата в порядке строк матрицы признаков.
+FEATURES = ("recency", "likes", "age")
+#: Для каких признаков большее значение лучше. Время с последнего
+#: посещения и разница в возрасте тем лучше, чем меньше.
+HIGHER_IS_BETTER = np.array([False, True, False])
+
+
+def parse_birth_year(bdate: str | None) -> float:
+    """Возвращает год рождения из даты рождения VK.
+
+    Args:
+        bdate (str | None): Дата рождения в формате "Д.М.ГГГГ" или "Д.М",
+            если пользователь скрыл год.
+
+    Returns:
+        float: Год рождения или NaN, если год неизвестен.
+    """
+    if not bdate or bdate.count(".") != 2:
+        return np.nan
+
+    year = bdate[bdate.rindex(".") + 1:]
+    return float(year) if year.isdigit() else np.nan
+
+
+class CandidateRanker:
+    """Класс для ранжирования кандидатов по взвешенной оценке."""
+    def __init__(
+            self,
+            weights: dict[str, float] = RANKING_SETTINGS["weights"]
+    ) -> None:
+        """Инициализирует объект для ранжирования кандидатов.
+
+        Args:
+            weights (dict[str, float]): Веса признаков recency, likes и
+                age. Отсутствующий признак получает вес 0.
+                По умолчанию берутся из настроек.
+        """
+        self.weights = np.array(
+            [weights.get(feature, 0.0) for feature in FEATURES],
+            dtype=float
+        )
+
+    def features(
+            self,
+            users: list[Candidate],
+            user_bdate: str | None = None,
+            now: float | None = None
+    ) -> np.ndarray:
+        """Собирает признаки кандидатов в матрицу.
+
+        Args:
+            users (list[Candidate]): Кандидаты.
+            user_bdate (str | None, optional): Дата рождения пользователя
+                бота. По умолчанию None — разница в возрасте неизвестна.
+            now (float | None, optional): Текущее время в секундах.
+                По умолчанию time.time().
+
+        Returns:
+            np.ndarray: Матрица размером (3, количество кандидатов) со
+                строками FEATURES. Неизвестные значения равны NaN.
+        """
+        now = time.time() if now is None else now
+        # Значения собираются в списки за один проход по кандидатам, а
+        # None при преобразовании в массив float становится NaN
+        last_seen = np.array(
+            [user.last_seen for user in users], dtype=float
+        )
+        likes = np.array([user.likes for user in users], dtype=float)
+        birth_years = np.array(
+            [parse_birth_year(user.bdate) for user in users], dtype=float
+        )
+
+        return np.vstack((
+            (now - last_seen) / 3600,
+            likes,
+            np.abs(birth_years - parse_birth_year(user_bdate))
+        ))
+
+    def score(self, features: np.ndarray) -> np.ndarray:
+        """Вычисляет оценки кандидатов по матрице признаков.
+
+        Неизвестные значения признака заменяются его средним, а признаки
+        нормализуются к диапазону от 0 до 1 по минимуму и максимуму среди
+        переданных кандидатов. Признак, одинаковый у всех кандидатов, не
+        влияет на оценку.
+
+        Args:
+            features (np.ndarray): Матрица признаков из метода features.
+
+        Returns:
+            np.ndarray: Оценки кандидатов. Чем больше, тем выше кандидат.
+        """
+        known = ~np.isnan(features)
+        counts = known.sum(axis=1)
+        sums = np.where(known, features, 0.0).sum(axis=1)
+        means = np.divide(
+            sums, counts, out=np.zeros_like(sums), where=counts > 0
+        )
+        filled = np.where(known, features, means[:, None])
+
+        minimums = filled.min(axis=1, keepdims=True)
+        spans = filled.max(axis=1, keepdims=True) - minimums
+        normalized = np.divide(
+            filled - minimums,
+            spans,
+            out=np.zeros_like(filled),
+            where=spans > 0
+        )
+        normalized = np.where(
+            HIGHER_IS_BETTER[:, None], normalized, 1.0 - normalized
+        )
+
+        return self.weights @ normalized
+
+    def rank(
+            self,
+            users: list[Candidate],
+            user_bdate: str | None = None
+    ) -> list[Candidate]:
+        """Упорядочивает кандидатов и назначает им ранги.
+
+        Кандидаты с одинаковой оценкой сохраняют исходный порядок.
+
+        Args:
+            users (list[Candidate]): Все кандидаты поиска. Каждому
+                кандидату назначается ранг.
+            user_bdate (str | None, optional): Дата рождения пользователя
+                бота. По умолчанию None.
+
+        Returns:
+            list[Candidate]: Кандидаты по убыванию оценки.
+        """
+        if not users:
+            return []
+
+        scores = self.score(self.features(users, user_bdate))
+        order = np.argsort(-scores, kind="stable")
+        ranked = [users[i] for i in order]
+
+        for rank, user in enumerate(ranked):
+            user.rank = rank
+
+        return ranked
@@ -0,0 +1,279 @@
+"""Модуль для ограничения частоты запросов к VK API.
+
+Модуль содержит алгоритм «ведро токенов» (TokenBucket) и планировщик
+запросов VKRequestScheduler, который выравнивает всплески запросов под
+лимиты токена и отдельных методов и повторяет запросы, получившие ошибки
+VK API 6 («Слишком много запросов в секунду») и 9 («Flood control»).
+"""
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable
+
+from settings import VK_API_SETTINGS
+
+#: Коды ошибок VK API, при которых запрос повторяется с задержкой.
+RETRYABLE_ERROR_CODES = (6, 9)
+
+
+class TokenBucket:
+    """Класс ведра токенов для равномерного распределения запросов."""
+    def __init__(self, rate: float, capacity: float = 1) -> None:
+        """Инициализирует ведро токенов.
+
+        Args:
+            rate (float): Количество токенов, добавляемых в секунду.
+            capacity (float, optional): Максимальное количество
+                накопленных токенов. По умолчанию 1: запросы идут с
+                равными интервалами, поэтому в любом окне длиной в
+                секунду их не больше rate. При большем значении
+                допускаются всплески сверх лимита VK.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Резервирует один токен.
+
+        Токен списывается сразу, даже если ведро пусто: в этом случае
+        баланс уходит в минус, и каждый следующий вызов получает более
+        позднее время. Так запросы выстраиваются в очередь в порядке
+        резервирования.
+
+        Returns:
+            float: Время в секундах, которое нужно подождать перед запросом.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= 1
+
+            return max(0.0, -self._tokens / self.rate)
+
+
+class VKRequestScheduler:
+    """Класс планировщика запросов к VK API с учетом лимитов."""
+    def __init__(
+            self,
+            requests_per_second: float = (
+                VK_API_SETTINGS["requests_per_second"]
+            ),
+            method_limits: dict[str, float] | None = None,
+            max_retries: int = VK_API_SETTINGS["rate_limit_retries"],
+            backoff: float = VK_API_SETTINGS["rate_limit_backoff"]
+    ) -> None:
+        """Инициализирует планировщик запросов.
+
+        Args:
+            requests_per_second (float): Общий лимит запросов в секунду
+                для токена.
+            method_limits (dict[str, float] | None, optional): Лимиты
+                запросов в секунду для отдельных методов. По умолчанию
+                берутся из настроек.
+            max_retries (int): Количество повторов при ошибках 6 и 9.
+            backoff (float): Начальная задержка перед повтором в секундах.
+                Удваивается с каждой попыткой.
+        """
+        if method_limits is None:
+            method_limits = VK_API_SETTINGS["method_rate_limits"]
+
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._token_bucket = TokenBucket(requests_per_second)
+        self._method_buckets = {
+            method: TokenBucket(rate) for method, rate in method_limits.items()
+        }
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество запросов, ожидающих своей очереди."""
+        return self._waiting
+
+    def acquire(self, method: str) -> None:
+        """Ожидает, пока запрос к методу не уложится в лимиты.
+
+        Сначала запрос дожидается очереди в лимите метода и только затем
+        занимает токен общего лимита. Иначе запрос, ожидающий лимита
+        метода, занимал бы место в общем лимите, которое могли бы
+        использовать запросы к другим методам.
+
+        Args:
+            method (str): Название метода API.
+        """
+        method_bucket = self._method_buckets.get(method)
+
+        if method_bucket is not None:
+            self._sleep(method_bucket.reserve())
+
+        self._sleep(self._token_bucket.reserve())
+
+    async def acquire_async(self, method: str) -> None:
+        """Асинхронно ожидает, пока запрос к методу не уложится в лимиты.
+
+        Использует те же ведра токенов, что и acquire, поэтому синхронные
+        и асинхронные клиенты одного токена делят один бюджет запросов.
+
+        Args:
+            method (str): Название метода API.
+        """
+        method_bucket = self._method_buckets.get(method)
+
+        if method_bucket is not None:
+            await self._sleep_async(method_bucket.reserve())
+
+        await self._sleep_async(self._token_bucket.reserve())
+
+    def _sleep(self, delay: float) -> None:
+        """Ожидает своей очереди, учитывая запрос в queue_depth.
+
+        Args:
+            delay (float): Время ожидания в секундах.
+        """
+        if delay <= 0:
+            return
+
+        with self._lock:
+            self._waiting += 1
+        try:
+            time.sleep(delay)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    async def _sleep_async(self, delay: float) -> None:
+        """Асинхронный вариант _sleep.
+
+        Args:
+            delay (float): Время ожидания в секундах.
+        """
+        if delay <= 0:
+            return
+
+        with self._lock:
+            self._waiting += 1
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def execute(self, method: str, send: Callable[[], dict]) -> dict:
+        """Выполняет запрос с учетом лимитов и повторяет его при ошибках 6 и 9.
+
+        Args:
+            method (str): Название метода API.
+            send (Callable[[], dict]): Функция, выполняющая запрос и
+                возвращающая разобранный JSON-ответ.
+
+        Returns:
+            dict: Ответ VK API. Если повторы исчерпаны, возвращается
+                последний ответ с ошибкой.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(method)
+            data = send()
+            error_code = data.get("error", {}).get("error_code")
+
+            if (error_code not in RETRYABLE_ERROR_CODES
+                    or attempt == self.max_retries):
+                return data
+
+            time.sleep(self.backoff * 2 ** attempt)
+
+        return data
+
+    async def execute_async(
+            self, method: str, send: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        """Асинхронный вариант execute.
+
+        Args:
+            method (str): Название метода API.
+            send (Callable[[], Awaitable[dict]]): Корутинная функция,
+                выполняющая запрос и возвращающая разобранный JSON-ответ.
+
+        Returns:
+            dict: Ответ VK API. Если повторы исчерпаны, возвращается
+                последний ответ с ошибкой.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(method)
+            data = await send()
+            error_code = data.get("error", {}).get("error_code")
+
+            if (error_code not in RETRYABLE_ERROR_CODES
+                    or attempt == self.max_retries):
+                return data
+
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+        return data
+
+
+_schedulers: dict[str, VKRequestScheduler] = {}
+_schedulers_lock = threading.Lock()
+#: Доля лимитов запросов, доступная текущему процессу.
+_rate_share = 1.0
+
+
+def set_rate_share(processes: int) -> None:
+    """Делит лимиты запросов между процессами с одними и теми же токенами.
+
+    VK считает лимиты по токену, а не по процессу, поэтому каждый из
+    processes процессов получает свою часть лимита токена и лимитов
+    отдельных методов. Вызывается в процессе до создания клиентов VK API.
+    Планировщики, созданные раньше (например, унаследованные от
+    родительского процесса), сбрасываются.
+
+    Args:
+        processes (int): Количество процессов, которые одновременно
+            отправляют запросы с одними токенами.
+    """
+    global _rate_share
+
+    with _schedulers_lock:
+        _rate_share = 1 / max(1, processes)
+        _schedulers.clear()
+
+
+def get_scheduler(
+        token: str,
+        requests_per_second: float = VK_API_SETTINGS["requests_per_second"]
+) -> VKRequestScheduler:
+    """Возвращает общий планировщик запросов для токена.
+
+    Все клиенты процесса, использующие один токен, делят один бюджет
+    запросов. Если лимиты разделены между процессами функцией
+    set_rate_share, планировщик получает долю процесса.
+
+    Args:
+        token (str): Токен для доступа к API ВКонтакте.
+        requests_per_second (float): Лимит запросов в секунду. Учитывается
+            только при первом обращении для токена. По умолчанию
+            берется лимит пользовательского токена из настроек.
+
+    Returns:
+        VKRequestScheduler: Планировщик запросов для токена.
+    """
+    with _schedulers_lock:
+        if token not in _schedulers:
+            _schedulers[token] = VKRequestScheduler(
+                requests_per_second * _rate_share,
+                {
+                    method: rate * _rate_share
+                    for method, rate in (
+                        VK_API_SETTINGS["method_rate_limits"].items()
+                    )
+                }
+            )
+
+        return _schedulers[token]
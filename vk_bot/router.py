@@ -0,0 +1,160 @@
+"""Модуль для выбора обработчика сообщения пользователя.
+
+Модуль содержит класс CommandRouter, который один раз при запуске бота
+строит таблицу соответствия текстов команд и их обработчиков. Обработчик
+сообщения находится поиском по словарю, а не перебором всех команд.
+Нажатия кнопок с полезной нагрузкой (payload) обрабатываются напрямую по
+названию команды без разбора текста.
+"""
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable
+
+from settings import COMMANDS
+
+
+class CommandRouter:
+    """Класс для выбора обработчика по тексту сообщения или payload."""
+    def __init__(
+            self,
+            default_handler: Callable[..., None],
+            commands: dict[str, tuple[str, ...]] | None = None
+    ) -> None:
+        """Инициализирует маршрутизатор команд.
+
+        Args:
+            default_handler (Callable[..., None]): Обработчик сообщений,
+                для которых не нашлось команды.
+            commands (dict[str, tuple[str, ...]] | None, optional):
+                Словарь с названиями команд и их текстами. По умолчанию
+                используются команды из настроек.
+        """
+        self.default_handler = default_handler
+        self._commands = COMMANDS if commands is None else commands
+        self._handlers: dict[str, Callable[..., None]] = {}
+        self._text_routes: dict[str, Callable[..., None]] = {}
+        self._patterns: list[tuple[re.Pattern, Callable[..., None]]] = []
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Приводит текст сообщения к виду, в котором хранятся команды.
+
+        Args:
+            text (str): Текст сообщения.
+
+        Returns:
+            str: Текст без пробелов по краям в нижнем регистре.
+        """
+        return text.strip().lower()
+
+    def add_command(
+            self, command: str, handler: Callable[..., None]
+    ) -> None:
+        """Регистрирует обработчик команды.
+
+        Обработчик вызывается для всех текстов команды из словаря команд
+        и для кнопок, payload которых содержит название команды.
+
+        Args:
+            command (str): Название команды, ключ словаря команд.
+            handler (Callable[..., None]): Обработчик команды.
+
+        Raises:
+            KeyError: Если команды нет в словаре команд.
+        """
+        texts = self._commands[command]
+        self._handlers[command] = handler
+
+        for text in texts:
+            self._text_routes[self.normalize(text)] = handler
+
+    def add_pattern(
+            self, pattern: str, handler: Callable[..., None]
+    ) -> None:
+        """Регистрирует обработчик сообщений по регулярному выражению.
+
+        Выражения проверяются по порядку регистрации, если текст сообщения
+        не совпал ни с одной командой. Обработчик получает объект
+        re.Match вторым аргументом.
+
+        Args:
+            pattern (str): Регулярное выражение.
+            handler (Callable[..., None]): Обработчик сообщения.
+        """
+        self._patterns.append((re.compile(pattern), handler))
+
+    def resolve(
+            self, text: str, payload: str | None = None
+    ) -> tuple[Callable[..., None], tuple[Any, ...]]:
+        """Находит обработчик сообщения.
+
+        Args:
+            text (str): Текст сообщения.
+            payload (str | None, optional): Payload нажатой кнопки в
+                формате JSON, например '{"command": "next"}'.
+                По умолчанию None.
+
+        Returns:
+            tuple[Callable[..., None], tuple[Any, ...]]: Обработчик и
+                дополнительные аргументы, которые нужно ему передать.
+        """
+        if payload:
+            handler = self._handlers.get(_get_payload_command(payload))
+
+            if handler is not None:
+                return handler, ()
+
+        text = self.normalize(text)
+        handler = self._text_routes.get(text)
+
+        if handler is not None:
+            return handler, ()
+
+        for pattern, handler in self._patterns:
+            match = pattern.match(text)
+
+            if match:
+                return handler, (match,)
+
+        return self.default_handler, ()
+
+    def dispatch(
+            self, user_session: Any, text: str, payload: str | None = None
+    ) -> None:
+        """Вызывает обработчик сообщения.
+
+        Args:
+            user_session (Any): Сессия пользователя, передается
+                обработчику первым аргументом.
+            text (str): Текст сообщения.
+            payload (str | None, optional): Payload нажатой кнопки.
+                По умолчанию None.
+        """
+        handler, args = self.resolve(text, payload)
+        handler(user_session, *args)
+
+
+@lru_cache(maxsize=256)
+def _get_payload_command(payload: str) -> str | None:
+    """Получает название команды из payload кнопки.
+
+    Кнопок в боте немного, поэтому результат разбора кэшируется.
+
+    Args:
+        payload (str): Payload кнопки в формате JSON.
+
+    Returns:
+        str: Название команды.
+        None: Если payload не содержит команды или команда не является
+            строкой.
+    """
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return None
+
+    command = data.get("command") if isinstance(data, dict) else None
+    # Команда используется как ключ таблицы обработчиков, поэтому другие
+    # типы (например, список) не принимаются
+    return command if isinstance(command, str) else None
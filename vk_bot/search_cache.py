@@ -0,0 +1,142 @@
+"""Модуль с кэшем результатов поиска пользователей.
+
+Результат users.search полностью определяется параметрами поиска, поэтому
+пользователи бота из одного города с одинаковыми параметрами получают
+один и тот же список кандидатов. Модуль содержит класс SearchResultCache,
+который хранит списки кандидатов по набору параметров и не допускает
+одновременных одинаковых запросов к VK API.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from settings import VK_API_SETTINGS
+from vk_bot.candidate import Candidate
+
+
+class SearchResultCache:
+    """Класс кэша результатов поиска с ограниченным временем жизни."""
+    def __init__(
+            self,
+            ttl: float = VK_API_SETTINGS["search_cache_ttl"],
+            max_size: int = VK_API_SETTINGS["search_cache_size"]
+    ) -> None:
+        """Инициализирует кэш результатов поиска.
+
+        Args:
+            ttl (float): Время жизни результата в секундах.
+                По умолчанию берется из настроек.
+            max_size (int): Максимальное количество наборов параметров в
+                кэше. По умолчанию берется из настроек.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[
+            Hashable, tuple[float, list[Candidate]]
+        ] = OrderedDict()
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_fetch(
+            self, key: Hashable, fetch: Callable[[], list[Candidate]]
+    ) -> list[Candidate]:
+        """Возвращает результат поиска из кэша или выполняет поиск.
+
+        Если результат для key отсутствует или устарел, поиск выполняет
+        только один поток, а остальные потоки с тем же key дожидаются его
+        результата. Ошибки fetch не кэшируются и передаются вызывающему.
+
+        Args:
+            key (Hashable): Набор параметров поиска.
+            fetch (Callable[[], list[Candidate]]): Функция, выполняющая
+                поиск.
+
+        Returns:
+            list[Candidate]: Копии записей найденных пользователей. Их
+                можно изменять, не затрагивая кэш.
+        """
+        result = self._get_fresh(key)
+
+        if result is None:
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+            try:
+                with key_lock:
+                    # Пока поток ждал блокировку, результат мог получить
+                    # другой поток
+                    result = self._get_fresh(key, count=False)
+
+                    if result is None:
+                        result = fetch()
+                        self._store(key, result)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+        return [copy.copy(item) for item in result]
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает статистику использования кэша.
+
+        Returns:
+            dict[str, int]: Количество попаданий (hits), промахов (misses)
+                и наборов параметров в кэше (size).
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._results)
+            }
+
+    def _store(self, key: Hashable, result: list[Candidate]) -> None:
+        """Сохраняет результат поиска и вытесняет самые старые записи.
+
+        Args:
+            key (Hashable): Набор параметров поиска.
+            result (list[Candidate]): Результат поиска.
+        """
+        with self._lock:
+            self._results[key] = (time.monotonic(), result)
+            self._results.move_to_end(key)
+
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def _get_fresh(
+            self, key: Hashable, count: bool = True
+    ) -> list[Candidate] | None:
+        """Возвращает неустаревший результат из кэша.
+
+        Args:
+            key (Hashable): Набор параметров поиска.
+            count (bool): Учитывать обращение в статистике.
+                По умолчанию True.
+
+        Returns:
+            list[Candidate] | None: Результат поиска или None, если его нет в
+                кэше или он устарел.
+        """
+        with self._lock:
+            cached = self._results.get(key)
+
+            if cached is None or time.monotonic() - cached[0] > self.ttl:
+                self._results.pop(key, None)
+
+                if count:
+                    self.misses += 1
+                return None
+
+            if count:
+                self.hits += 1
+            self._results.move_to_end(key)
+            return cached[1]
+
+
+#: Общий кэш результатов поиска для всех экземпляров UserSearcher.
+SEARCH_CACHE = SearchResultCache()
@@ -4,28 +4,107 @@
 """
 import math
 import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Iterable, Iterator, TypeVar
 
 import requests
 
-from database.db_funcs import UserDBManager, TargetUserSearcher
+from database.base import session_scope
+from database.db_funcs import (
+    PhotoCacheDBManager, UserDBManager, TargetUserSearcher
+)
+from settings import VK_API_SETTINGS
 from vk_bot import UserInfoRetriever
+from vk_bot.api_client import VKApiClient
+from vk_bot.candidate import Candidate
+from vk_bot.pipeline import buffered, chunked, unique_by
+from vk_bot.ranking import CandidateRanker
+from vk_bot.search_cache import SEARCH_CACHE, SearchResultCache
+
+T = TypeVar("T")
+
+
+def in_session_scope(items: Iterable[T]) -> Iterator[T]:
+    """Выполняет стадии поиска в одной сессии базы данных.
+
+    Сессия относится к потоку, в котором читается поток элементов, и
+    закрывается после его окончания.
+
+    Args:
+        items (Iterable[T]): Входной поток элементов.
+
+    Yields:
+        T: Элементы входного потока.
+    """
+    with session_scope():
+        yield from items
 
 
 class UserSearcher:
     """Класс для поиска пользователей."""
-    def __init__(self, token: str, vk_api_version: float) -> None:
+    def __init__(
+        self,
+        token: str,
+        vk_api_version: float,
+        photo_workers: int = VK_API_SETTINGS["photo_workers"],
+        api_client: VKApiClient | None = None,
+        search_cache: SearchResultCache | None = None,
+        sweep: bool = VK_API_SETTINGS["search_sweep"],
+        search_workers: int = VK_API_SETTINGS["search_workers"],
+        sweep_limit: int = VK_API_SETTINGS["search_sweep_limit"],
+        buffer_size: int = VK_API_SETTINGS["pipeline_buffer_size"],
+        ranker: CandidateRanker | None = None,
+        rank_window: int = VK_API_SETTINGS["search_rank_window"]
+    ) -> None:
         """Инициализация класса для поиска пользователей.
 
         Args:
             token (str): Токен для доступа к API.
             vk_api_version (float): Версия API.
+            photo_workers (int): Количество потоков для параллельного
+                получения фотографий кандидатов. Значение 1 отключает
+                параллельный режим. По умолчанию берется из настроек.
+            api_client (VKApiClient | None, optional): Общий клиент VK API.
+                Если не передан, создается собственный клиент.
+                По умолчанию None.
+            search_cache (SearchResultCache | None, optional): Кэш
+                результатов users.search. По умолчанию используется общий
+                кэш SEARCH_CACHE.
+            sweep (bool): Включить режим обхода, в котором поиск
+                разбивается на подзапросы. По умолчанию берется из настроек.
+            search_workers (int): Количество потоков для подзапросов в
+                режиме обхода. По умолчанию берется из настроек.
+            sweep_limit (int): Максимальное количество кандидатов в режиме
+                обхода. По умолчанию берется из настроек.
+            buffer_size (int): Количество пакетов с фотографиями, которые
+                готовятся заранее, пока обрабатываются предыдущие.
+                По умолчанию берется из настроек.
+            ranker (CandidateRanker | None, optional): Объект для
+                ранжирования кандидатов. По умолчанию создается с весами
+                из настроек.
+            rank_window (int): Количество кандидатов, ранжируемых вместе
+                в режиме обхода. По умолчанию берется из настроек.
         """
         self.token = token
         self.vk_api_version = vk_api_version
-        self.URL = "https://api.vk.com/method/"
+        self.photo_workers = max(1, photo_workers)
+        self.api_client = api_client or VKApiClient(
+            self.token, self.vk_api_version
+        )
         self.user_db = UserDBManager()
-        self.user_info = UserInfoRetriever(self.token, self.vk_api_version)
+        self.user_info = UserInfoRetriever(
+            self.token, self.vk_api_version, self.api_client
+        )
         self.target_searcher = TargetUserSearcher()
+        self.photo_cache = PhotoCacheDBManager()
+        self.search_cache = search_cache or SEARCH_CACHE
+        self.sweep = sweep
+        self.search_workers = max(1, search_workers)
+        self.sweep_limit = sweep_limit
+        self.buffer_size = buffer_size
+        self.ranker = ranker or CandidateRanker()
+        self.rank_window = max(1, rank_window)
 
     def search_users(
         self,
@@ -35,7 +114,7 @@ class UserSearcher:
         age_to: int = 50, 
         status: int = 6, 
         has_photo: int = 1
-    ) -> list[dict]:
+    ) -> list[Candidate]:
         """Метод для поиска пользователей по заданным параметрам.
 
         Args:
@@ -48,182 +127,414 @@ class UserSearcher:
             has_photo (int): Наличие фотографии. По умолчанию 1.
 
         Returns:
-            list[dict]: Список словарей с данными о найденных пользователях.
+            list[Candidate]: Список найденных пользователей в порядке
+                ранга.
         """
-        city_id, sex = self._get_user_city_id_and_sex(user_id)
-        return self._process_users_with_photos_and_url(
-            user_id,
-            count, 
-            age_from, 
-            age_to, 
-            city_id, 
-            sex, 
-            status, 
-            has_photo
+        chunk_size = self.user_info.batcher.batch_size * self.photo_workers
+        return list(chain.from_iterable(
+            self.search_users_in_chunks(
+                user_id,
+                chunk_size,
+                count=count,
+                age_from=age_from,
+                age_to=age_to,
+                status=status,
+                has_photo=has_photo
+            )
+        ))
+
+    def search_users_in_chunks(
+        self,
+        user_id: int,
+        chunk_size: int,
+        with_photos: bool = True,
+        count: int = 1000,
+        age_from: int = 18,
+        age_to: int = 50,
+        status: int = 6,
+        has_photo: int = 1
+    ) -> Iterator[list[Candidate]]:
+        """Метод для поиска пользователей с выдачей результата пакетами.
+
+        Поиск собран из потоковых стадий: получение кандидатов, фильтрация
+        по активности, исключение избранных и черного списка, ранжирование
+        и дополнение фотографиями. Ранжирование дожидается всех кандидатов
+        единственного запроса users.search и оценивает их за один проход
+        методом rank_candidates. В режиме обхода кандидаты ранжируются
+        группами по rank_window по мере поступления, поэтому первый пакет
+        выдается, не дожидаясь окончания обхода. Фотографии запрашиваются
+        по пакетам в порядке ранга. Пакеты с фотографиями готовятся в
+        отдельном потоке с буфером из pipeline_buffer_size пакетов,
+        поэтому первый пакет выдается, не дожидаясь фотографий остальных
+        кандидатов.
+
+        Args:
+            user_id (int): ID пользователя.
+            chunk_size (int): Количество пользователей в одном пакете.
+            with_photos (bool): Запрашивать фотографии пользователей.
+                По умолчанию True.
+            count (int): Количество пользователей для возвращения.
+                По умолчанию 1000.
+            age_from (int): Нижняя граница возраста. По умолчанию 18.
+            age_to (int): Верхняя граница возраста. По умолчанию 50.
+            status (int): Статус пользователя. По умолчанию 6.
+            has_photo (int): Наличие фотографии. По умолчанию 1.
+
+        Yields:
+            list[Candidate]: Пакет найденных пользователей с
+                фотографиями. Пакеты выдаются в порядке ранга.
+        """
+        city_id, sex, bdate = self._get_user_params(user_id)
+        params = {
+            "count": count,
+            "age_from": age_from,
+            "age_to": age_to,
+            "city_id": city_id,
+            "sex": 2 if sex == 1 else 1,
+            "status": status,
+            "has_photo": has_photo,
+            "fields": "bdate, last_seen"
+        }
+        found_users = self._iter_search_results(params)
+        active_users = filter(self._is_active, found_users)
+        target_users = self.target_searcher.iter_target_users(
+            active_users, user_id
+        )
+        ranked_users = self._iter_ranked(
+            target_users, bdate, self.rank_window if self.sweep else None
+        )
+        chunks = (
+            self._add_user_photos(chunk, with_photos)
+            for chunk in chunked(ranked_users, chunk_size)
+        )
+
+        try:
+            yield from buffered(
+                in_session_scope(chunks), self.buffer_size
+            )
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка при поиске пользователей: {e}")
+
+    def rank_candidates(
+            self, users: list[Candidate], user_bdate: str | None = None
+    ) -> list[Candidate]:
+        """Метод для ранжирования всех кандидатов поиска.
+
+        Сумма лайков фотографий берется из кэша фотографий одним запросом,
+        поэтому учитывается и без загрузки фотографий при поиске. Лайки
+        кандидатов, которых нет в кэше, считаются неизвестными.
+
+        Args:
+            users (list[Candidate]): Все кандидаты поиска.
+            user_bdate (str | None, optional): Дата рождения пользователя
+                бота. По умолчанию None.
+
+        Returns:
+            list[Candidate]: Кандидаты по убыванию оценки с назначенными
+                рангами.
+        """
+        cached_likes = self.photo_cache.get_fresh_likes(
+            [user.id for user in users]
         )
 
-    def _get_user_city_id_and_sex(self, user_id: int) -> tuple[int, int]:
-        """Метод для получения ID города и пола пользователя, использующего бота
+        for user in users:
+            user.likes = cached_likes.get(user.id, user.likes)
+
+        return self.ranker.rank(users, user_bdate)
+
+    def _iter_ranked(
+            self,
+            users: Iterable[Candidate],
+            user_bdate: str | None,
+            window: int | None = None
+    ) -> Iterator[Candidate]:
+        """Метод-стадия, выдающая кандидатов в порядке ранга.
+
+        Без window стадия дожидается всех кандидатов и ранжирует их
+        вместе. С window кандидаты ранжируются группами по мере
+        поступления: группа выдается, не дожидаясь следующих кандидатов,
+        а ранги каждой группы продолжают ранги предыдущей, поэтому
+        анкеты первой группы показываются раньше.
+
+        Args:
+            users (Iterable[Candidate]): Поток кандидатов.
+            user_bdate (str | None): Дата рождения пользователя бота.
+            window (int | None, optional): Количество кандидатов,
+                ранжируемых вместе. По умолчанию None — все кандидаты.
+
+        Yields:
+            Candidate: Кандидаты по убыванию оценки в пределах группы.
+        """
+        groups = [list(users)] if window is None else chunked(users, window)
+        rank_offset = 0
+
+        for group in groups:
+            ranked = self.rank_candidates(group, user_bdate)
+
+            for user in ranked:
+                user.rank += rank_offset
+
+            rank_offset += len(ranked)
+            yield from ranked
+
+    def _get_user_params(
+            self, user_id: int
+    ) -> tuple[int, int, str | None]:
+        """Метод для получения ID города, пола и даты рождения пользователя,
+        использующего бота
 
         Args:
             user_id (int): ID пользователя, который использует бота.
 
         Returns:
-            tuple[int, int]: Кортеж из ID города и пола пользователя.
+            tuple[int, int, str | None]: Кортеж из ID города, пола и даты
+                рождения пользователя. Дата рождения None, если неизвестна.
         """
         params_from_db: dict = self.user_db.get_user_params(user_id)
         
         if params_from_db:
             city_id = params_from_db.get("city_id", 1)
             sex = params_from_db.get("sex", 1)
+            bdate = params_from_db.get("bdate")
         else:
-            city_id, sex = 1, 1
+            city_id, sex, bdate = 1, 1, None
         
-        return city_id, sex
+        return city_id, sex, bdate
 
-    def _process_users_with_photos_and_url(
-        self,
-        user_id: int,
-        count: int,
-        age_from: int, 
-        age_to: int, 
-        city_id: int, 
-        sex: int, 
-        status: int, 
-        has_photo: int
-    ) -> list[dict]:
-        """Метод для обработки найденных пользователей с фотографиями.
+    def _iter_search_results(self, params: dict) -> Iterator[Candidate]:
+        """Метод для получения потока найденных пользователей.
+
+        Ответ users.search берется из общего кэша SEARCH_CACHE, если такой
+        же поиск уже выполнялся в течение времени жизни кэша. В режиме
+        обхода пользователи выдаются по мере выполнения подзапросов.
 
         Args:
-            user_id (int): ID пользователя, который использует бота.
-            count (int): Количество пользователей для возвращения.
-            age_from (int): Нижняя граница возраста. По умолчанию 18.
-            age_to (int): Верхняя граница возраста. По умолчанию 50.
-            city_id (int): ID города. По умолчанию 1.
-            sex (int): Пол пользователя. По умолчанию 1.
-            status (int): Статус пользователя. По умолчанию 6.
-            has_photo (int): Наличие фотографии. По умолчанию 1.
+            params (dict): Параметры метода users.search.
 
-        Returns:
-            list[dict]: Список словарей с данными о найденных пользователях.
+        Yields:
+            Candidate: Найденный пользователь.
         """
-        try:
-            users = self._fetch_users_from_search(
-                user_id,
-                count, 
-                age_from, 
-                age_to, 
-                city_id, 
-                sex, 
-                status, 
-                has_photo
-            )
-            return self._add_user_photos_and_url(users)
-        except requests.exceptions.RequestException:
-            return []
+        if self.sweep:
+            yield from self._iter_sweep_search(params)
+        else:
+            yield from self._search_candidates(params)
 
-    def _fetch_users_from_search(
-        self,
-        user_id: int,
-        count: int, 
-        age_from: int, 
-        age_to: int, 
-        city_id: int, 
-        sex: int, 
-        status: int, 
-        has_photo: int
-    ) -> list[dict[str, int | str]]:
-        """Метод для получения списка пользователей с фотографиями.
-
-        В данном методе отправляется GET-запрос с параметрами, а также
-        производится фильтрация по активности найденного пользователя и
-        включен ли найденный пользователь в список избранных или черный
-        список пользователя, взаимодействующего с ботом.
+    def _search_candidates(self, params: dict) -> list[Candidate]:
+        """Метод для выполнения одного запроса users.search через кэш.
+
+        Ответ разбирается в записи Candidate сразу после получения, поэтому
+        в кэше хранятся только нужные поиску поля.
 
         Args:
-            user_id (int): ID пользователя, который использует бота.
-            count (int): Количество пользователей для возвращения.
-            age_from (int): Нижняя граница возраста. По умолчанию 18.
-            age_to (int): Верхняя граница возраста. По умолчанию 50.
-            city_id (int): ID города. По умолчанию 1.
-            sex (int): Пол пользователя. По умолчанию 1.
-            status (int): Статус пользователя. По умолчанию 6.
-            has_photo (int): Наличие фотографии. По умолчанию 1.
+            params (dict): Параметры метода users.search.
 
         Returns:
-            list[dict[str, int | str]]: Список словарей с данными
-                о найденных пользователях.
+            list[Candidate]: Список найденных пользователей.
         """
-        params = {
-            "access_token": self.token,
-            "v": self.vk_api_version,
-            "count": count,
-            "age_from": age_from,
-            "age_to": age_to,
-            "city_id": city_id,
-            "sex": 2 if sex == 1 else 1,
-            "status": status,
-            "has_photo": has_photo,
-            "fields": "city, bdate, last_seen"
-        }
-        response = requests.get(f"{self.URL}users.search", params)
-        active_users = self._pass_inactive_users(
-            response.json()["response"]["items"]
+        # Результат поиска не зависит от пользователя бота, поэтому
+        # кэшируется по параметрам запроса, а исключение избранных и
+        # черного списка выполняется для каждого пользователя отдельно
+        cache_key = tuple(sorted(params.items()))
+        return self.search_cache.get_or_fetch(
+            cache_key,
+            lambda: [
+                Candidate.from_api(item)
+                for item in self.api_client.call(
+                    "users.search", params
+                )["response"]["items"]
+            ]
         )
-        target_users = self.target_searcher.get_target_users(
-            list(active_users.values()), user_id
+
+    def _iter_sweep_search(self, params: dict) -> Iterator[Candidate]:
+        """Метод для поиска пользователей подзапросами по возрасту.
+
+        Диапазон age_from..age_to разбивается на подзапросы по одному году.
+        Если подзапрос вернул count пользователей, то есть уперся в лимит
+        users.search, он дополнительно разбивается по месяцу рождения.
+        Подзапросы выполняются волнами по search_workers штук в пределах
+        лимитов планировщика запросов, а их результаты выдаются по мере
+        выполнения без повторов. Обход прекращается, когда выдано
+        sweep_limit кандидатов. Подзапросы, завершившиеся ошибкой,
+        пропускаются.
+
+        Args:
+            params (dict): Параметры метода users.search.
+
+        Yields:
+            Candidate: Найденный пользователь.
+        """
+        def search_partition(sub_params: dict) -> list[Candidate]:
+            try:
+                return self._search_candidates(sub_params)
+            except requests.exceptions.RequestException as e:
+                print(f"Ошибка при выполнении подзапроса поиска: {e}")
+                return []
+
+        def iter_partitions() -> Iterator[Candidate]:
+            partitions = [
+                {**params, "age_from": age, "age_to": age}
+                for age in range(params["age_from"], params["age_to"] + 1)
+            ]
+
+            with ThreadPoolExecutor(
+                    max_workers=self.search_workers
+            ) as executor:
+                while partitions:
+                    wave = partitions[:self.search_workers]
+                    partitions = partitions[self.search_workers:]
+
+                    for sub_params, users in zip(
+                            wave, executor.map(search_partition, wave)
+                    ):
+                        if (len(users) >= params["count"]
+                                and "birth_month" not in sub_params):
+                            partitions.extend(
+                                {**sub_params, "birth_month": month}
+                                for month in range(1, 13)
+                            )
+
+                        yield from users
+
+        yield from islice(
+            unique_by(iter_partitions(), lambda user: user.id),
+            self.sweep_limit
         )
-        
-        return list(target_users.values())
 
-    def _add_user_photos_and_url(self, users: list[dict]) -> list[dict]:
-        """Метод для добавления фотографий пользователей в словари.
+    def get_photos(
+            self, user_ids: list[int]
+    ) -> dict[int, tuple[list[str], int | None]]:
+        """Метод для получения лучших фотографий пользователей.
+
+        Сначала фотографии берутся из общего кэша в базе данных. У VK API
+        запрашиваются только фотографии пользователей, которых нет в кэше
+        или запись о которых устарела. Запросы объединяются в пакеты
+        метода execute, а пакеты выполняются параллельно в пуле из
+        photo_workers потоков. Полученные фотографии сохраняются в кэш.
+
+        Args:
+            user_ids (list[int]): Список ID пользователей VK.
+
+        Returns:
+            dict[int, tuple[list[str], int | None]]: Словарь с ID
+                пользователя, списком ID его фотографий и суммой их
+                лайков (None, если неизвестна). Для пользователей без
+                доступных фотографий список пуст. Пользователей,
+                фотографии которых получить не удалось из-за ошибки, в
+                словаре нет.
+        """
+        cached_photos = self.photo_cache.get_fresh_photos(user_ids)
+        missing_ids = [
+            user_id for user_id in user_ids
+            if user_id not in cached_photos
+        ]
+        batch_size = self.user_info.batcher.batch_size
+        batches = [
+            missing_ids[i:i + batch_size]
+            for i in range(0, len(missing_ids), batch_size)
+        ]
+
+        if self.photo_workers == 1:
+            batches_photos = map(self.user_info.get_users_photos, batches)
+            all_user_photos = list(chain.from_iterable(batches_photos))
+        else:
+            with ThreadPoolExecutor(
+                    max_workers=self.photo_workers
+            ) as executor:
+                batches_photos = executor.map(
+                    self.user_info.get_users_photos, batches
+                )
+                all_user_photos = list(chain.from_iterable(batches_photos))
+
+        return self.merge_photos(cached_photos, missing_ids, all_user_photos)
+
+    def merge_photos(
+            self,
+            cached_photos: dict[int, tuple[list[str], int | None]],
+            missing_ids: list[int],
+            users_photos: list[tuple[list[str], int | None] | None]
+    ) -> dict[int, tuple[list[str], int | None]]:
+        """Сохраняет полученные фотографии в кэш и объединяет их с кэшем.
+
+        Args:
+            cached_photos (dict[int, tuple[list[str], int | None]]):
+                Фотографии из кэша. Словарь дополняется на месте.
+            missing_ids (list[int]): ID пользователей, фотографии которых
+                запрашивались у VK API.
+            users_photos (list[tuple[list[str], int | None] | None]):
+                Результат UserInfoRetriever.get_users_photos для
+                missing_ids.
+
+        Returns:
+            dict[int, tuple[list[str], int | None]]: Фотографии в формате
+                get_photos.
+        """
+        fetched_photos = {
+            user_id: user_photos
+            for user_id, user_photos in zip(missing_ids, users_photos)
+            # Пустой список фотографий тоже сохраняется, чтобы не
+            # запрашивать его при следующих поисках
+            if user_photos is not None
+        }
+        self.photo_cache.store_photos(fetched_photos)
+        cached_photos.update(fetched_photos)
+
+        return cached_photos
+
+    def _add_user_photos(
+            self, users: list[Candidate], with_photos: bool = True
+    ) -> list[Candidate]:
+        """Метод для добавления фотографий в записи пользователей.
+
+        Фотографии получаются методом get_photos. Вместе с фотографиями в
+        запись добавляется сумма их лайков. Полученные фотографии
+        сохраняются в кэш, поэтому при следующих поисках их лайки
+        учитываются в ранжировании. Порядок пользователей в результате
+        совпадает с исходным.
 
         Args:
-            users (list[dict]): Список словарей с данными о пользователях,
-                для которых нужно добавить фотографии.
+            users (list[Candidate]): Список пользователей, для которых
+                нужно добавить фотографии.
+            with_photos (bool): Запрашивать фотографии. Если False,
+                фотографии загружаются позже. По умолчанию True.
 
         Returns:
-            list[dict]: Список словарей с данными о пользователях с фотографиями
+            list[Candidate]: Список пользователей с фотографиями.
         """
+        all_photos = (
+            self.get_photos([item.id for item in users])
+            if with_photos
+            else {}
+        )
+
         for item in users:
-            found_user_id: int = item.get("id")
-            user_photos = self.user_info.get_user_photos(found_user_id)
-            item["url"] = self.user_info.get_user_url(item.get("id"))
+            if item.id not in all_photos:
+                continue
+
+            user_photos, item.likes = all_photos[item.id]
 
             if user_photos:
                 for i in range(3):
-                    item[f"photo_id{i + 1}"] = (
-                        user_photos[i]
-                        if i < len(user_photos)
-                        else None
+                    setattr(
+                        item,
+                        f"photo_id{i + 1}",
+                        user_photos[i] if i < len(user_photos) else None
                     )
         return users
 
-    def _pass_inactive_users(self, data: list[dict]) -> dict:
-        """Метод для фильтрации активных пользователей.
+    def _is_active(self, user: Candidate) -> bool:
+        """Метод для проверки активности найденного пользователя.
 
-        В данном методе производится фильтрация активных пользователей
-        по времени последнего посещения. Если время последнего посещения
-        меньше 10 дней, то пользователь является активным и добавляется
-        в словарь. В противном случае он не пропускается.
+        Пользователь считается активным, если время последнего посещения
+        меньше 10 дней.
 
         Args:
-            data (list[dict]): Список словарей с данными о пользователях.
+            user (Candidate): Найденный пользователь.
 
         Returns:
-            dict: Словарь с активными пользователями.
+            bool: True, если пользователь активен.
         """
-        active_users = {}
-        
-        for user in data:
-            last_visit_time = user.get('last_seen', {}).get('time', 0)
-            time_difference = self._get_time_difference(last_visit_time)
-
-            if time_difference < 10:
-                active_users[user['id']] = user
-
-        return active_users
+        last_visit_time = user.last_seen or 0
+        return self._get_time_difference(last_visit_time) < 10
 
     @staticmethod
     def _get_time_difference(last_visit_time: int) -> int:
@@ -0,0 +1,115 @@
+"""Модуль для хранения состояния пользователей бота.
+
+Модуль содержит класс UserSession с состоянием диалога одного
+пользователя и хранилище UserSessionStore, которое ограничивает
+количество сессий в памяти и удаляет давно неактивные.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+from settings import BOT_SETTINGS
+from vk_bot.jobs import SearchJob
+
+
+@dataclass
+class UserSession:
+    """Класс с состоянием диалога одного пользователя бота."""
+    #: ID пользователя VK.
+    user_id: int
+    #: Мэтч, показанный пользователю последним. Нужен для работы со
+    #: списком избранных и черным списком.
+    current_match: list | None = None
+    #: Небольшое окно следующих мэтчей, загруженных из базы данных.
+    match_window: deque = field(default_factory=deque)
+    #: Ранг и ID последнего загруженного мэтча в таблице мэтчей.
+    last_match_rank: int = -1
+    last_match_id: int = 0
+    #: Состояние выбранного действия в меню.
+    state: str | None = None
+    #: Последний запущенный поиск мэтчей.
+    search_job: SearchJob | None = None
+    #: Время последнего обращения к сессии.
+    last_active: float = field(default_factory=time.monotonic)
+
+    def reset_matches(self) -> None:
+        """Сбрасывает просмотр мэтчей на начало списка."""
+        self.current_match = None
+        self.match_window.clear()
+        self.last_match_rank = -1
+        self.last_match_id = 0
+
+
+class UserSessionStore:
+    """Класс хранилища сессий пользователей с ограничением размера.
+
+    Сессии вытесняются по принципу LRU при превышении max_sessions, а
+    также удаляются, если пользователь не обращался к боту дольше idle_ttl.
+    """
+    def __init__(
+            self,
+            max_sessions: int = BOT_SETTINGS["max_sessions"],
+            idle_ttl: float = BOT_SETTINGS["session_idle_ttl"]
+    ) -> None:
+        """Инициализирует хранилище сессий.
+
+        Args:
+            max_sessions (int): Максимальное количество сессий в памяти.
+                По умолчанию берется из настроек.
+            idle_ttl (float): Время бездействия в секундах, после которого
+                сессия удаляется. По умолчанию берется из настроек.
+        """
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: OrderedDict[int, UserSession] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Возвращает количество сессий в хранилище."""
+        return len(self._sessions)
+
+    def get(self, user_id: int) -> UserSession:
+        """Возвращает сессию пользователя, создавая ее при необходимости.
+
+        Args:
+            user_id (int): ID пользователя VK.
+
+        Returns:
+            UserSession: Сессия пользователя.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_idle(now)
+            user_session = self._sessions.get(user_id)
+
+            if user_session is None:
+                user_session = UserSession(user_id)
+                self._sessions[user_id] = user_session
+            else:
+                self._sessions.move_to_end(user_id)
+
+            user_session.last_active = now
+
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+            return user_session
+
+    def _evict_idle(self, now: float) -> None:
+        """Удаляет сессии, неактивные дольше idle_ttl.
+
+        Сессии упорядочены по времени последнего обращения, поэтому
+        проверка останавливается на первой активной сессии.
+
+        Args:
+            now (float): Текущее время по time.monotonic().
+        """
+        while self._sessions:
+            user_session = next(iter(self._sessions.values()))
+
+            if now - user_session.last_active <= self.idle_ttl:
+                break
+
+            self._sessions.popitem(last=False)